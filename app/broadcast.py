@@ -0,0 +1,150 @@
+"""Push workshop cell edits to every facilitator connected over a WebSocket.
+
+Writes happen in request threads, while subscribers live on the event loop, so
+``BroadcastHub.publish`` only hands the cells to the loop with
+``call_soon_threadsafe``. Each subscription keeps its undelivered cells in a
+dict keyed by (activity, role): a cell edited five times before the client
+reads it is sent once, with its latest value, and a subscriber's backlog is
+bounded by the matrix size rather than by the number of edits.
+
+The sender waits ``batch_window`` seconds after the first pending change, so a
+burst of edits leaves as one message. A subscriber whose backlog exceeds
+``max_pending`` cells is told to ``resync`` (refetch the matrix) instead of
+receiving the backlog, and one whose socket stops accepting data for
+``send_timeout`` seconds is disconnected, so a stalled client never holds up
+the others.
+"""
+import asyncio
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+BATCH_WINDOW_SECONDS = 0.05
+MAX_PENDING_CELLS = 5000
+SEND_TIMEOUT_SECONDS = 5.0
+# WebSocket close code for "try again later"
+CLOSE_TRY_AGAIN_LATER = 1013
+
+CELL_FIELDS = ("activity_id", "role_id", "value")
+
+
+class Subscription:
+    """One client's coalesced backlog of cell changes for a workshop."""
+
+    def __init__(self, workshop_id: int, max_pending: int = MAX_PENDING_CELLS):
+        self.workshop_id = workshop_id
+        self.max_pending = max_pending
+        self.pending: Dict[Tuple[int, int], dict] = {}
+        self.overflowed = False
+        self.ready = asyncio.Event()
+
+    def offer(self, cells: Iterable[dict]):
+        if not self.overflowed:
+            for cell in cells:
+                self.pending[(cell["activity_id"], cell["role_id"])] = cell
+            if len(self.pending) > self.max_pending:
+                self.pending.clear()
+                self.overflowed = True
+        self.ready.set()
+
+    async def next_message(self, batch_window: float = BATCH_WINDOW_SECONDS) -> dict:
+        """Wait for pending changes and return them as one message."""
+        await self.ready.wait()
+        if batch_window:
+            await asyncio.sleep(batch_window)
+        self.ready.clear()
+        if self.overflowed:
+            self.overflowed = False
+            return {"type": "resync", "workshop_id": self.workshop_id}
+        cells, self.pending = list(self.pending.values()), {}
+        return {"type": "cells", "workshop_id": self.workshop_id, "cells": cells}
+
+
+class BroadcastHub:
+    def __init__(
+        self,
+        batch_window: float = BATCH_WINDOW_SECONDS,
+        max_pending: int = MAX_PENDING_CELLS,
+        send_timeout: float = SEND_TIMEOUT_SECONDS,
+    ):
+        self.batch_window = batch_window
+        self.max_pending = max_pending
+        self.send_timeout = send_timeout
+        self._subscriptions: Dict[int, Set[Subscription]] = defaultdict(set)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscriber_count(self, workshop_id: Optional[int] = None) -> int:
+        if workshop_id is not None:
+            return len(self._subscriptions.get(workshop_id, ()))
+        return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+
+    def publish(self, workshop_id: int, cells: Iterable[dict]):
+        """Queue cell changes for the workshop's subscribers; safe to call from any thread."""
+        loop = self._loop
+        if loop is None or not self._subscriptions.get(workshop_id):
+            return
+        payload = [{field: cell.get(field) for field in CELL_FIELDS} for cell in cells]
+        try:
+            loop.call_soon_threadsafe(self._deliver, workshop_id, payload)
+        except RuntimeError:
+            pass  # loop already closed during shutdown
+
+    def _deliver(self, workshop_id: int, cells: List[dict]):
+        for subscription in list(self._subscriptions.get(workshop_id, ())):
+            subscription.offer(cells)
+
+    @contextmanager
+    def subscribe(self, workshop_id: int) -> Iterator[Subscription]:
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(workshop_id, self.max_pending)
+        self._subscriptions[workshop_id].add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscriptions = self._subscriptions.get(workshop_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[workshop_id]
+
+    async def serve(self, websocket, workshop_id: int, hello: Optional[dict] = None):
+        """Stream the workshop's changes to an accepted ``websocket`` until either side disconnects."""
+        with self.subscribe(workshop_id) as subscription:
+            if hello is not None:
+                await websocket.send_json(hello)
+            sender = asyncio.ensure_future(self._send(websocket, subscription))
+            receiver = asyncio.ensure_future(_wait_for_disconnect(websocket))
+            try:
+                await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                sender.cancel()
+                receiver.cancel()
+
+    async def _send(self, websocket, subscription: Subscription):
+        while True:
+            message = await subscription.next_message(self.batch_window)
+            try:
+                await asyncio.wait_for(websocket.send_json(message), self.send_timeout)
+            except asyncio.TimeoutError:
+                # a slow consumer; let it reconnect and resync rather than queue for it
+                try:
+                    await asyncio.wait_for(websocket.close(code=CLOSE_TRY_AGAIN_LATER), self.send_timeout)
+                except Exception:
+                    pass
+                return
+            except Exception:
+                return  # the client went away mid-send
+
+
+async def _wait_for_disconnect(websocket):
+    # clients only listen; anything they send is ignored
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+    except Exception:
+        return  # receive after the connection closed
+
+
+hub = BroadcastHub()
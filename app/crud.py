@@ -1,6 +1,10 @@
-from typing import Iterable, List, Optional
+from collections import Counter, defaultdict
+from operator import itemgetter
+from typing import Callable, Collection, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, Tuple
 
-from sqlalchemy.orm import Session
+from sqlalchemy import String, and_, case, cast, delete, exists, func, insert, literal, or_, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased
 
 from . import models
 
@@ -8,6 +12,7 @@ from . import models
 def create_organization(db: Session, data: dict) -> models.Organization:
     org = models.Organization(**data)
     db.add(org)
+    bump_table_versions(db, models.Organization)
     db.commit()
     db.refresh(org)
     return org
@@ -29,9 +34,16 @@ def list_workshops(db: Session) -> List[models.Workshop]:
     return db.query(models.Workshop).all()
 
 
+def list_workshop_ids(db: Session, organization_id: int) -> List[int]:
+    return list(
+        db.scalars(select(models.Workshop.id).where(models.Workshop.organization_id == organization_id).order_by(models.Workshop.id))
+    )
+
+
 def create_domain(db: Session, data: dict) -> models.Domain:
     domain = models.Domain(**data)
     db.add(domain)
+    bump_table_versions(db, models.Domain)
     db.commit()
     db.refresh(domain)
     return domain
@@ -47,6 +59,9 @@ def list_domains(db: Session, organization_id: Optional[int] = None) -> List[mod
 def create_role(db: Session, data: dict) -> models.Role:
     role = models.Role(**data)
     db.add(role)
+    # every workshop of the organization gains a matrix column
+    _bump_revisions(db, organization_id=data.get("organization_id"))
+    bump_table_versions(db, models.Role)
     db.commit()
     db.refresh(role)
     return role
@@ -62,6 +77,13 @@ def list_roles(db: Session, organization_id: Optional[int] = None) -> List[model
 def create_activity(db: Session, data: dict) -> models.Activity:
     activity = models.Activity(**data)
     db.add(activity)
+    db.flush()
+    # a new activity has no issues yet, so every workshop of its organization must check it
+    _mark_activities_dirty(db, [activity.id])
+    domain = db.get(models.Domain, activity.domain_id)
+    if domain is not None:
+        _bump_revisions(db, organization_id=domain.organization_id)
+    bump_table_versions(db, models.Activity)
     db.commit()
     db.refresh(activity)
     return activity
@@ -80,6 +102,9 @@ def set_recommended_raci(db: Session, entries: Iterable[dict]) -> List[models.Re
         raci = models.RecommendedRACI(**entry)
         db.add(raci)
         created.append(raci)
+    if created:
+        db.flush()
+        _mark_activities_dirty(db, {raci.activity_id for raci in created})
     db.commit()
     for raci in created:
         db.refresh(raci)
@@ -93,6 +118,327 @@ def list_recommended(db: Session, activity_id: Optional[int] = None) -> List[mod
     return query.all()
 
 
+class Page(NamedTuple):
+    items: list
+    # opaque cursor for the next page, None on the last one
+    next_cursor: Optional[str]
+
+
+def encode_cursor(values: Sequence[int]) -> str:
+    return ".".join(str(value) for value in values)
+
+
+def decode_cursor(cursor: str, width: int) -> Tuple[int, ...]:
+    """Parse a cursor from ``encode_cursor``; raises ValueError if it does not hold ``width`` integers."""
+    values = tuple(int(part) for part in cursor.split("."))
+    if len(values) != width:
+        raise ValueError(f"Invalid cursor {cursor!r}")
+    return values
+
+
+def contains_text(column, text: str):
+    """Case-insensitive substring match with LIKE wildcards in ``text`` taken literally."""
+    return func.lower(column).contains(text.lower(), autoescape=True)
+
+
+def list_page(
+    db: Session,
+    model,
+    criteria: Iterable = (),
+    limit: int = 500,
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    keys: Optional[Sequence] = None,
+) -> Page:
+    """One keyset page of ``model`` rows matching ``criteria``, ordered by ``keys`` (default: the id).
+
+    Each page seeks past the previous page's last key instead of using OFFSET,
+    so late pages cost the same as the first. ``limit + 1`` rows are read to
+    learn whether another page exists. With ``fields``, only those columns (and
+    the keys) are selected and rows come back as dicts instead of ORM objects.
+    """
+    keys = list(keys or [model.id])
+    names = [key.key for key in keys]
+    if fields:
+        statement = select(*keys, *(getattr(model, name) for name in fields if name not in names))
+    else:
+        statement = select(model)
+    statement = statement.where(*criteria)
+    if cursor is not None:
+        after = decode_cursor(cursor, len(keys))
+        statement = statement.where(keys[0] > after[0] if len(keys) == 1 else tuple_(*keys) > tuple_(*after))
+    statement = statement.order_by(*keys).limit(limit + 1)
+    items = [dict(row) for row in db.execute(statement).mappings()] if fields else list(db.scalars(statement))
+    if len(items) <= limit:
+        return Page(items, None)
+    items = items[:limit]
+    last = items[-1]
+    return Page(items, encode_cursor([last[name] if fields else getattr(last, name) for name in names]))
+
+
+def _dialect(db: Session):
+    return postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+
+
+DIRTY_ACTIVITY = "activity"
+DIRTY_ROLE = "role"
+
+CHANGE_RACI = "raci"
+CHANGE_ISSUE = "issue"
+CHANGE_ACTION = "action"
+CHANGE_MODELS = {CHANGE_RACI: models.WorkshopRACI, CHANGE_ISSUE: models.Issue, CHANGE_ACTION: models.ActionItem}
+
+# called with (workshop_id, cells) after every committed cell write, e.g. the WebSocket broadcast hub
+CELL_LISTENERS: List[Callable[[int, List[dict]], None]] = []
+
+
+def bump_table_versions(db: Session, *tables):
+    """Advance the write counter of each model's table; no commit."""
+    table = models.TableVersion.__table__
+    statement = _dialect(db).insert(table).values([{"table_name": model.__tablename__, "version": 1} for model in tables])
+    db.execute(statement.on_conflict_do_update(index_elements=[table.c.table_name], set_={"version": table.c.version + 1}))
+
+
+def get_table_version(db: Session, model) -> int:
+    version = db.query(models.TableVersion.version).filter(models.TableVersion.table_name == model.__tablename__).scalar()
+    return version or 0
+
+
+def get_workshop_revision(db: Session, workshop_id: int) -> Optional[int]:
+    return db.query(models.Workshop.revision).filter(models.Workshop.id == workshop_id).scalar()
+
+
+def _bump_revisions(db: Session, workshop_ids: Iterable[int] = (), organization_id: Optional[int] = None):
+    """Advance the revision of the given workshops, or of every workshop of an organization; no commit.
+
+    Exports are cached by revision, so every write that changes what an export
+    shows must call this inside its transaction.
+    """
+    workshop = models.Workshop
+    if organization_id is not None:
+        criterion = workshop.organization_id == organization_id
+    else:
+        workshop_ids = sorted(set(workshop_ids))
+        if not workshop_ids:
+            return
+        criterion = workshop.id.in_(workshop_ids)
+    db.execute(
+        update(workshop).where(criterion).values(revision=workshop.revision + 1).execution_options(synchronize_session=False)
+    )
+
+
+def latest_change_seq(db: Session, workshop_id: int) -> int:
+    change = models.WorkshopChange
+    return db.query(func.max(change.seq)).filter(change.workshop_id == workshop_id).scalar() or 0
+
+
+def list_changes(
+    db: Session, workshop_id: int, since: int, limit: int = 1000, chunk_size: int = 500
+) -> Tuple[List[Tuple[int, str, int, Optional[object]]], int, bool]:
+    """Changes logged after ``since`` with each changed entity's current row.
+
+    Reads at most ``limit`` log entries and keeps only the latest entry per
+    entity, so a cell edited ten times is sent once. Returns ``(changes,
+    last_seq, has_more)``: changes are ``(seq, entity, entity_id, row)`` in seq
+    order with ``row`` None for a deleted entity, and ``last_seq`` is the
+    ``since`` of the next call.
+    """
+    change = models.WorkshopChange
+    log = db.execute(
+        select(change.seq, change.entity, change.entity_id)
+        .where(change.workshop_id == workshop_id, change.seq > since)
+        .order_by(change.seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(log) > limit
+    log = log[:limit]
+    if not log:
+        return [], since, False
+    latest: Dict[Tuple[str, int], int] = {}
+    for seq, entity, entity_id in log:
+        latest[(entity, entity_id)] = seq
+    ids: Dict[str, List[int]] = defaultdict(list)
+    for entity, entity_id in latest:
+        ids[entity].append(entity_id)
+    rows = {}
+    for entity, entity_ids in ids.items():
+        model = CHANGE_MODELS[entity]
+        for start in range(0, len(entity_ids), chunk_size):
+            chunk = entity_ids[start : start + chunk_size]
+            for row in db.query(model).filter(model.workshop_id == workshop_id, model.id.in_(chunk)):
+                rows[(entity, row.id)] = row
+    changes = sorted(
+        ((seq, entity, entity_id, rows.get((entity, entity_id))) for (entity, entity_id), seq in latest.items()), key=itemgetter(0)
+    )
+    return changes, log[-1].seq, has_more
+
+
+def _publish_cells(cells: Iterable[dict]):
+    by_workshop: Dict[int, List[dict]] = defaultdict(list)
+    for cell in cells:
+        by_workshop[cell["workshop_id"]].append(cell)
+    for listener in CELL_LISTENERS:
+        for workshop_id, workshop_cells in by_workshop.items():
+            listener(workshop_id, workshop_cells)
+
+
+def _log_changes(db: Session, entity: str, keys: Iterable[Tuple[int, int]]):
+    """Append (workshop_id, entity_id) writes to the workshops' change feeds; no commit."""
+    rows = [{"workshop_id": workshop_id, "entity": entity, "entity_id": entity_id} for workshop_id, entity_id in keys]
+    if rows:
+        db.execute(insert(models.WorkshopChange.__table__), rows)
+
+
+def _mark_dirty(db: Session, cells: Iterable[Tuple[int, int, int]]):
+    """Record the activities and roles touched by (workshop, activity, role) writes; no commit."""
+    keys = set()
+    for workshop_id, activity_id, role_id in cells:
+        keys.add((workshop_id, DIRTY_ACTIVITY, activity_id))
+        keys.add((workshop_id, DIRTY_ROLE, role_id))
+    if not keys:
+        return
+    statement = _dialect(db).insert(models.ValidationDirtyKey.__table__).on_conflict_do_nothing()
+    db.execute(statement, [{"workshop_id": w, "kind": kind, "key_id": key} for w, kind, key in keys])
+
+
+def _mark_activities_dirty(db: Session, activity_ids: Collection[int]):
+    """Record the activities as dirty in every workshop of their organizations; no commit."""
+    if not activity_ids:
+        return
+    rows = db.execute(
+        select(models.Workshop.id, models.Activity.id)
+        .join(models.Domain, models.Activity.domain_id == models.Domain.id)
+        .join(models.Workshop, models.Workshop.organization_id == models.Domain.organization_id)
+        .where(models.Activity.id.in_(sorted(activity_ids)))
+    ).all()
+    if not rows:
+        return
+    statement = _dialect(db).insert(models.ValidationDirtyKey.__table__).on_conflict_do_nothing()
+    db.execute(statement, [{"workshop_id": w, "kind": DIRTY_ACTIVITY, "key_id": a} for w, a in rows])
+
+
+def claim_dirty_keys(db: Session, workshop_id: int) -> Tuple[Set[int], Set[int]]:
+    """Return and clear the workshop's dirty (activity_ids, role_ids)."""
+    rows = (
+        db.query(models.ValidationDirtyKey.id, models.ValidationDirtyKey.kind, models.ValidationDirtyKey.key_id)
+        .filter(models.ValidationDirtyKey.workshop_id == workshop_id)
+        .all()
+    )
+    activity_ids = {key_id for _, kind, key_id in rows if kind == DIRTY_ACTIVITY}
+    role_ids = {key_id for _, kind, key_id in rows if kind == DIRTY_ROLE}
+    if rows:
+        db.execute(delete(models.ValidationDirtyKey).where(models.ValidationDirtyKey.id.in_([row[0] for row in rows])))
+        db.commit()
+    return activity_ids, role_ids
+
+
+def get_validation_state(db: Session, workshop_id: int) -> Optional[models.ValidationState]:
+    return db.get(models.ValidationState, workshop_id)
+
+
+def set_validation_state(db: Session, workshop_id: int, overload_threshold: int):
+    db.merge(models.ValidationState(workshop_id=workshop_id, overload_threshold=overload_threshold))
+    db.commit()
+
+
+def reset_validation_state(db: Session, workshop_id: Optional[int] = None):
+    """Force the next validation (of one workshop, or all of them) to be a full run."""
+    query = db.query(models.ValidationState)
+    if workshop_id is not None:
+        query = query.filter(models.ValidationState.workshop_id == workshop_id)
+    query.delete()
+    db.commit()
+
+
+ROLE_LOAD_COLUMNS = {"R": "count_r", "A": "count_a", "C": "count_c", "I": "count_i", "None": "count_none"}
+
+
+def _load_bucket(value: Optional[str]) -> Optional[str]:
+    return ROLE_LOAD_COLUMNS.get(value or "None")
+
+
+def rebuild_role_load_summary(db: Session, workshop_id: int):
+    """Recompute a workshop's role load summary with one GROUP BY aggregate; no commit."""
+    cell = models.WorkshopRACI
+    summary = models.RoleLoadSummary.__table__
+    counts = [
+        func.sum(case((func.coalesce(cell.value, "") == value, 1), else_=0)).label(column)
+        for value, column in ROLE_LOAD_COLUMNS.items()
+        if value != "None"
+    ]
+    none_count = func.sum(case((func.coalesce(cell.value, "").in_(["", "None"]), 1), else_=0)).label("count_none")
+    aggregate = (
+        select(cell.role_id, *counts, none_count, func.max(cell.id).label("last_cell_id"))
+        .where(cell.workshop_id == workshop_id)
+        .group_by(cell.role_id)
+        .subquery()
+    )
+    last_cell = aliased(cell)
+    rows = select(
+        literal(workshop_id),
+        aggregate.c.role_id,
+        *[aggregate.c[column] for column in ROLE_LOAD_COLUMNS.values()],
+        last_cell.activity_id,
+    ).join(last_cell, last_cell.id == aggregate.c.last_cell_id)
+    db.execute(delete(summary).where(summary.c.workshop_id == workshop_id))
+    db.execute(
+        insert(summary).from_select(
+            ["workshop_id", "role_id", *ROLE_LOAD_COLUMNS.values(), "last_activity_id"],
+            rows,
+        )
+    )
+
+
+def refresh_role_load_summary(db: Session, workshop_id: int):
+    rebuild_role_load_summary(db, workshop_id)
+    db.commit()
+
+
+def _ensure_role_load_summary(db: Session, workshop_id: int):
+    """Backfill the summary for workshops whose cells predate it."""
+    summary = models.RoleLoadSummary
+    if db.query(exists().where(summary.workshop_id == workshop_id)).scalar():
+        return
+    if db.query(exists().where(models.WorkshopRACI.workshop_id == workshop_id)).scalar():
+        rebuild_role_load_summary(db, workshop_id)
+
+
+def _apply_role_load_changes(db: Session, workshop_id: int, changes: Iterable[Tuple[int, int, Optional[str], Optional[str], bool]]):
+    """Fold (activity_id, role_id, old_value, new_value, created) cell changes into the summary; no commit.
+
+    Call ``_ensure_role_load_summary`` before writing the cells themselves.
+    """
+    deltas: Dict[int, Counter] = defaultdict(Counter)
+    last_activity: Dict[int, int] = {}
+    for activity_id, role_id, old_value, new_value, created in changes:
+        if not created:
+            deltas[role_id][_load_bucket(old_value)] -= 1
+        deltas[role_id][_load_bucket(new_value)] += 1
+        if created:
+            last_activity[role_id] = activity_id
+    if not deltas:
+        return
+    summary = models.RoleLoadSummary.__table__
+    statement = _dialect(db).insert(summary)
+    set_ = {column: summary.c[column] + statement.excluded[column] for column in ROLE_LOAD_COLUMNS.values()}
+    set_["last_activity_id"] = func.coalesce(statement.excluded.last_activity_id, summary.c.last_activity_id)
+    statement = statement.on_conflict_do_update(index_elements=[summary.c.workshop_id, summary.c.role_id], set_=set_)
+    rows = []
+    for role_id, delta in deltas.items():
+        row = {"workshop_id": workshop_id, "role_id": role_id, "last_activity_id": last_activity.get(role_id)}
+        row.update({column: delta.get(column, 0) for column in ROLE_LOAD_COLUMNS.values()})
+        rows.append(row)
+    db.execute(statement, rows)
+
+
+def list_role_load(db: Session, workshop_id: int, role_ids: Optional[Collection[int]] = None) -> List[models.RoleLoadSummary]:
+    _ensure_role_load_summary(db, workshop_id)
+    query = db.query(models.RoleLoadSummary).filter(models.RoleLoadSummary.workshop_id == workshop_id)
+    if role_ids is not None:
+        query = query.filter(models.RoleLoadSummary.role_id.in_(role_ids))
+    return query.order_by(models.RoleLoadSummary.role_id).all()
+
+
 def upsert_workshop_raci(db: Session, data: dict) -> models.WorkshopRACI:
     existing = (
         db.query(models.WorkshopRACI)
@@ -103,56 +449,243 @@ def upsert_workshop_raci(db: Session, data: dict) -> models.WorkshopRACI:
         )
         .first()
     )
+    _mark_dirty(db, [(data["workshop_id"], data["activity_id"], data["role_id"])])
+    _bump_revisions(db, [data["workshop_id"]])
+    _ensure_role_load_summary(db, data["workshop_id"])
+    _apply_role_load_changes(
+        db,
+        data["workshop_id"],
+        [(data["activity_id"], data["role_id"], existing.value if existing else None, data.get("value"), existing is None)],
+    )
     if existing:
         for key, value in data.items():
             setattr(existing, key, value)
+        _log_changes(db, CHANGE_RACI, [(data["workshop_id"], existing.id)])
         db.commit()
+        _publish_cells([data])
         db.refresh(existing)
         return existing
     raci = models.WorkshopRACI(**data)
     db.add(raci)
+    db.flush()
+    _log_changes(db, CHANGE_RACI, [(data["workshop_id"], raci.id)])
     db.commit()
+    _publish_cells([data])
     db.refresh(raci)
     return raci
 
 
+def bulk_upsert_workshop_raci(db: Session, rows: List[dict]) -> List[dict]:
+    """Apply many cell writes with one native ``INSERT ... ON CONFLICT`` statement and a single commit.
+
+    Later rows win when the same (workshop, activity, role) cell appears more than once.
+    """
+    cells = {}
+    for row in rows:
+        cells[(row["workshop_id"], row["activity_id"], row["role_id"])] = {"source": "workshop", **row}
+    if not cells:
+        return []
+    for workshop_id in {key[0] for key in cells}:
+        _ensure_role_load_summary(db, workshop_id)
+    previous = _load_cell_values(db, cells.keys())
+    table = models.WorkshopRACI.__table__
+    statement = _dialect(db).insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.workshop_id, table.c.activity_id, table.c.role_id],
+        set_={"value": statement.excluded.value, "source": statement.excluded.source},
+    ).returning(*table.c)
+    # RETURNING rows of a batched insert come back in no set order, so match them to the input by key
+    returned = {(row.workshop_id, row.activity_id, row.role_id): row for row in db.execute(statement, list(cells.values()))}
+    result = [returned[key] for key in cells]
+    _mark_dirty(db, cells.keys())
+    _bump_revisions(db, (key[0] for key in cells))
+    _log_changes(db, CHANGE_RACI, [(row.workshop_id, row.id) for row in result])
+    changes: Dict[int, list] = defaultdict(list)
+    for row in result:
+        key = (row.workshop_id, row.activity_id, row.role_id)
+        changes[row.workshop_id].append((row.activity_id, row.role_id, previous.get(key), row.value, key not in previous))
+    for workshop_id, workshop_changes in changes.items():
+        _apply_role_load_changes(db, workshop_id, workshop_changes)
+    db.commit()
+    cells = [dict(row._mapping) for row in result]
+    _publish_cells(cells)
+    return cells
+
+
+def _load_cell_values(db: Session, keys: Collection[Tuple[int, int, int]], chunk_size: int = 500) -> Dict[Tuple[int, int, int], Optional[str]]:
+    """Current values of existing cells among ``keys``, read through the (workshop, activity) index prefix."""
+    cell = models.WorkshopRACI
+    activities: Dict[int, Set[int]] = defaultdict(set)
+    for workshop_id, activity_id, _ in keys:
+        activities[workshop_id].add(activity_id)
+    wanted = set(keys)
+    values = {}
+    for workshop_id, activity_ids in activities.items():
+        activity_ids = sorted(activity_ids)
+        for start in range(0, len(activity_ids), chunk_size):
+            rows = db.execute(
+                select(cell.activity_id, cell.role_id, cell.value).where(
+                    cell.workshop_id == workshop_id, cell.activity_id.in_(activity_ids[start : start + chunk_size])
+                )
+            )
+            for activity_id, role_id, value in rows:
+                key = (workshop_id, activity_id, role_id)
+                if key in wanted:
+                    values[key] = value
+    return values
+
+
 def list_workshop_raci(db: Session, workshop_id: int) -> List[models.WorkshopRACI]:
-    return db.query(models.WorkshopRACI).filter(models.WorkshopRACI.workshop_id == workshop_id).all()
+    return (
+        db.query(models.WorkshopRACI)
+        .filter(models.WorkshopRACI.workshop_id == workshop_id)
+        .order_by(models.WorkshopRACI.id)
+        .all()
+    )
 
 
 def add_issue(db: Session, data: dict) -> models.Issue:
     issue = models.Issue(**data)
     db.add(issue)
+    db.flush()
+    _bump_revisions(db, [data["workshop_id"]])
+    _log_changes(db, CHANGE_ISSUE, [(data["workshop_id"], issue.id)])
     db.commit()
     db.refresh(issue)
     return issue
 
 
 def list_issues(db: Session, workshop_id: int) -> List[models.Issue]:
-    return db.query(models.Issue).filter(models.Issue.workshop_id == workshop_id).all()
+    return db.query(models.Issue).filter(models.Issue.workshop_id == workshop_id).order_by(models.Issue.id).all()
+
+
+def count_issues(db: Session, workshop_id: int) -> List[Tuple[str, Optional[str], int]]:
+    """(type, severity, count) of the workshop's issues."""
+    query = (
+        select(models.Issue.type, models.Issue.severity, func.count())
+        .where(models.Issue.workshop_id == workshop_id)
+        .group_by(models.Issue.type, models.Issue.severity)
+    )
+    return [tuple(row) for row in db.execute(query)]
+
+
+def _delete_issues_where(db: Session, workshop_id: int, *criteria) -> List[int]:
+    """Delete the workshop's issues matching ``criteria`` and log them to the change feed; no commit."""
+    table = models.Issue.__table__
+    ids = list(db.scalars(delete(table).where(table.c.workshop_id == workshop_id, *criteria).returning(table.c.id)))
+    _log_changes(db, CHANGE_ISSUE, [(workshop_id, issue_id) for issue_id in ids])
+    return ids
+
+
+def _insert_issues(db: Session, workshop_id: int, payloads: List[dict]) -> List[int]:
+    """Bulk insert issues, log them to the change feed and return their ids; no commit."""
+    if not payloads:
+        return []
+    table = models.Issue.__table__
+    # without sort_by_parameter_order SQLite can batch the RETURNING insert instead of running it row by row
+    ids = list(db.scalars(insert(table).returning(table.c.id), payloads))
+    _log_changes(db, CHANGE_ISSUE, [(workshop_id, issue_id) for issue_id in ids])
+    return ids
 
 
 def delete_issues(db: Session, workshop_id: int):
-    db.query(models.Issue).filter(models.Issue.workshop_id == workshop_id).delete()
+    _delete_issues_where(db, workshop_id)
+    db.query(models.ValidationState).filter(models.ValidationState.workshop_id == workshop_id).delete()
+    _bump_revisions(db, [workshop_id])
     db.commit()
 
 
+def replace_issues(db: Session, workshop_id: int, payloads: List[dict]) -> List[models.Issue]:
+    """Swap a workshop's issues for ``payloads`` in one transaction with a single bulk insert."""
+    _delete_issues_where(db, workshop_id)
+    _insert_issues(db, workshop_id, payloads)
+    _bump_revisions(db, [workshop_id])
+    db.commit()
+    return db.query(models.Issue).filter(models.Issue.workshop_id == workshop_id).order_by(models.Issue.id).all()
+
+
+def replace_issues_for_keys(
+    db: Session,
+    workshop_id: int,
+    activity_ids: Collection[int],
+    role_ids: Collection[int],
+    payloads: List[dict],
+    role_issue_types: Collection[str],
+) -> List[models.Issue]:
+    """Swap only the issues owned by the given activities (activity rules) and roles (role rules).
+
+    ``role_issue_types`` are the issue types role rules report; every other type belongs to an activity.
+    """
+    issue = models.Issue
+    if activity_ids:
+        _delete_issues_where(db, workshop_id, issue.activity_id.in_(activity_ids), issue.type.not_in(role_issue_types))
+    if role_ids:
+        _delete_issues_where(db, workshop_id, issue.role_id.in_(role_ids), issue.type.in_(role_issue_types))
+    ids = _insert_issues(db, workshop_id, payloads)
+    _bump_revisions(db, [workshop_id])
+    db.commit()
+    if not ids:
+        return []
+    return db.query(issue).filter(issue.id.in_(ids)).order_by(issue.id).all()
+
+
 def add_action_item(db: Session, data: dict) -> models.ActionItem:
     action = models.ActionItem(**data)
     db.add(action)
+    db.flush()
+    _bump_revisions(db, [data["workshop_id"]])
+    _log_changes(db, CHANGE_ACTION, [(data["workshop_id"], action.id)])
     db.commit()
     db.refresh(action)
     return action
 
 
 def list_actions(db: Session, workshop_id: int) -> List[models.ActionItem]:
-    return db.query(models.ActionItem).filter(models.ActionItem.workshop_id == workshop_id).all()
+    return db.query(models.ActionItem).filter(models.ActionItem.workshop_id == workshop_id).order_by(models.ActionItem.id).all()
 
 
 def find_action_for_issue(db: Session, issue_id: int) -> Optional[models.ActionItem]:
     return db.query(models.ActionItem).filter(models.ActionItem.issue_id == issue_id).first()
 
 
+def add_actions_for_unactioned_issues(db: Session, workshop_id: int) -> int:
+    """Insert a planned action for every workshop issue without one, as a single INSERT ... SELECT.
+
+    Rows that lose a race with a concurrent call hit ux_actions_issue and are skipped.
+    """
+    issue, action = models.Issue, models.ActionItem
+    summary = literal("Resolve ") + issue.type + literal(" for activity ") + cast(issue.activity_id, String)
+    unactioned = (
+        select(literal(workshop_id), issue.id, summary, literal("planned"))
+        .where(issue.workshop_id == workshop_id, ~exists().where(action.issue_id == issue.id))
+        .order_by(issue.id)
+    )
+    statement = (
+        _dialect(db)
+        .insert(action.__table__)
+        .from_select(["workshop_id", "issue_id", "summary", "status"], unactioned)
+        .on_conflict_do_nothing(index_elements=["issue_id"])
+        .returning(action.__table__.c.id)
+    )
+    created = list(db.scalars(statement))
+    if created:
+        _bump_revisions(db, [workshop_id])
+        _log_changes(db, CHANGE_ACTION, [(workshop_id, action_id) for action_id in created])
+    db.commit()
+    return len(created)
+
+
+def list_issue_actions(db: Session, workshop_id: int) -> List[models.ActionItem]:
+    """Actions attached to the workshop's issues, in issue order."""
+    return (
+        db.query(models.ActionItem)
+        .join(models.Issue, models.ActionItem.issue_id == models.Issue.id)
+        .filter(models.Issue.workshop_id == workshop_id)
+        .order_by(models.Issue.id)
+        .all()
+    )
+
+
 def get_activity_assignments(db: Session, workshop_id: int, activity_id: int) -> List[models.WorkshopRACI]:
     return (
         db.query(models.WorkshopRACI)
@@ -181,112 +714,108 @@ def get_activities_for_workshop(db: Session, workshop_id: int) -> List[models.Ac
 
 def load_recommended_for_activity(db: Session, activity_id: int) -> List[models.RecommendedRACI]:
     return db.query(models.RecommendedRACI).filter(models.RecommendedRACI.activity_id == activity_id).all()
-from . import models
-from .database import db_instance
-
-
-def _store(obj, collection: dict):
-    collection[obj.id] = obj
-    return obj
-
-
-def create_organization(data: dict) -> models.Organization:
-    ident = db_instance._next_id()
-    org = models.Organization(id=ident, **data)
-    return _store(org, db_instance.organizations)
-
-
-def list_organizations() -> List[models.Organization]:
-    return list(db_instance.organizations.values())
-
-
-def create_workshop(data: dict) -> models.Workshop:
-    ident = db_instance._next_id()
-    workshop = models.Workshop(id=ident, **data)
-    return _store(workshop, db_instance.workshops)
-
-
-def create_domain(data: dict) -> models.Domain:
-    ident = db_instance._next_id()
-    domain = models.Domain(id=ident, **data)
-    return _store(domain, db_instance.domains)
-
-
-def create_role(data: dict) -> models.Role:
-    ident = db_instance._next_id()
-    role = models.Role(id=ident, **data)
-    return _store(role, db_instance.roles)
-
-
-def create_activity(data: dict) -> models.Activity:
-    ident = db_instance._next_id()
-    activity = models.Activity(id=ident, **data)
-    return _store(activity, db_instance.activities)
-
 
-def set_recommended_raci(entries: Iterable[dict]) -> List[models.RecommendedRACI]:
-    created = []
-    for entry in entries:
-        ident = db_instance._next_id()
-        raci = models.RecommendedRACI(id=ident, **entry)
-        created.append(_store(raci, db_instance.recommended_raci))
-    return created
-
-
-def upsert_workshop_raci(data: dict) -> models.WorkshopRACI:
-    # prevent duplicates
-    for raci in db_instance.workshop_raci.values():
-        if raci.workshop_id == data["workshop_id"] and raci.activity_id == data["activity_id"] and raci.role_id == data["role_id"]:
-            raci.value = data.get("value")
-            raci.source = data.get("source", raci.source)
-            return raci
-    ident = db_instance._next_id()
-    raci = models.WorkshopRACI(id=ident, **data)
-    return _store(raci, db_instance.workshop_raci)
-
-
-def list_workshop_raci(workshop_id: int) -> List[models.WorkshopRACI]:
-    return [r for r in db_instance.workshop_raci.values() if r.workshop_id == workshop_id]
 
-
-def add_issue(data: dict) -> models.Issue:
-    ident = db_instance._next_id()
-    issue = models.Issue(id=ident, **data)
-    return _store(issue, db_instance.issues)
+def list_recommended_for_workshop(db: Session, workshop_id: int) -> List[models.RecommendedRACI]:
+    workshop = db.query(models.Workshop).filter(models.Workshop.id == workshop_id).first()
+    if not workshop:
+        return []
+    return (
+        db.query(models.RecommendedRACI)
+        .join(models.Activity, models.RecommendedRACI.activity_id == models.Activity.id)
+        .join(models.Domain, models.Activity.domain_id == models.Domain.id)
+        .filter(models.Domain.organization_id == workshop.organization_id)
+        .order_by(models.RecommendedRACI.id)
+        .all()
+    )
 
 
-def list_issues(workshop_id: int) -> List[models.Issue]:
-    return [i for i in db_instance.issues.values() if i.workshop_id == workshop_id]
+def iter_raci_matrix(db: Session, workshop_id: int, batch_size: int = 500) -> Iterator[Tuple[int, str, Optional[int], Optional[str]]]:
+    """Stream (activity_id, activity_name, role_id, value) rows ordered by activity, one server-side cursor."""
+    workshop = db.query(models.Workshop).filter(models.Workshop.id == workshop_id).first()
+    if not workshop:
+        return
+    statement = (
+        select(models.Activity.id, models.Activity.name, models.WorkshopRACI.role_id, models.WorkshopRACI.value)
+        .join(models.Domain, models.Activity.domain_id == models.Domain.id)
+        .outerjoin(
+            models.WorkshopRACI,
+            and_(models.WorkshopRACI.activity_id == models.Activity.id, models.WorkshopRACI.workshop_id == workshop_id),
+        )
+        .where(models.Domain.organization_id == workshop.organization_id)
+        .order_by(models.Activity.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for row in db.execute(statement):
+        yield tuple(row)
 
 
-def add_action_item(data: dict) -> models.ActionItem:
-    ident = db_instance._next_id()
-    action = models.ActionItem(id=ident, **data)
-    return _store(action, db_instance.actions)
+def iter_workshop_cells(db: Session, workshop_id: int, batch_size: int = 5000) -> Iterator[Tuple[int, int, Optional[str]]]:
+    """Stream (activity_id, role_id, value) for every cell of the workshop as plain tuples."""
+    cell = models.WorkshopRACI
+    statement = select(cell.activity_id, cell.role_id, cell.value).where(cell.workshop_id == workshop_id).execution_options(yield_per=batch_size)
+    for row in db.execute(statement):
+        yield tuple(row)
 
 
-def list_actions(workshop_id: int) -> List[models.ActionItem]:
-    return [a for a in db_instance.actions.values() if a.workshop_id == workshop_id]
+def iter_issues(db: Session, workshop_id: int, batch_size: int = 500) -> Iterator[models.Issue]:
+    query = db.query(models.Issue).filter(models.Issue.workshop_id == workshop_id).order_by(models.Issue.id)
+    yield from query.yield_per(batch_size)
 
 
-def get_activity_assignments(workshop_id: int, activity_id: int) -> List[models.WorkshopRACI]:
-    return [a for a in db_instance.workshop_raci.values() if a.workshop_id == workshop_id and a.activity_id == activity_id]
+def iter_actions(db: Session, workshop_id: int, batch_size: int = 500) -> Iterator[models.ActionItem]:
+    query = db.query(models.ActionItem).filter(models.ActionItem.workshop_id == workshop_id).order_by(models.ActionItem.id)
+    yield from query.yield_per(batch_size)
 
 
-def get_roles_for_workshop(workshop_id: int) -> List[models.Role]:
-    workshop = db_instance.workshops.get(workshop_id)
-    if not workshop:
+def get_activities_by_ids(db: Session, workshop_id: int, activity_ids: Collection[int]) -> List[models.Activity]:
+    """Activities among ``activity_ids`` that belong to the workshop's organization."""
+    workshop = db.query(models.Workshop).filter(models.Workshop.id == workshop_id).first()
+    if not workshop or not activity_ids:
         return []
-    return [r for r in db_instance.roles.values() if r.organization_id == workshop.organization_id]
+    return (
+        db.query(models.Activity)
+        .join(models.Domain, models.Activity.domain_id == models.Domain.id)
+        .filter(models.Domain.organization_id == workshop.organization_id, models.Activity.id.in_(activity_ids))
+        .order_by(models.Activity.id)
+        .all()
+    )
 
 
-def get_activities_for_workshop(workshop_id: int) -> List[models.Activity]:
-    workshop = db_instance.workshops.get(workshop_id)
-    if not workshop:
+def list_workshop_raci_for_keys(db: Session, workshop_id: int, activity_ids: Collection[int] = (), role_ids: Collection[int] = ()):
+    """(activity_id, role_id, value) rows for workshop cells in any of the given activities or roles."""
+    conditions = []
+    if activity_ids:
+        conditions.append(models.WorkshopRACI.activity_id.in_(activity_ids))
+    if role_ids:
+        conditions.append(models.WorkshopRACI.role_id.in_(role_ids))
+    if not conditions:
         return []
-    domain_ids = [d.id for d in db_instance.domains.values() if d.organization_id == workshop.organization_id]
-    return [a for a in db_instance.activities.values() if a.domain_id in domain_ids]
+    return (
+        db.query(models.WorkshopRACI.activity_id, models.WorkshopRACI.role_id, models.WorkshopRACI.value)
+        .filter(models.WorkshopRACI.workshop_id == workshop_id, or_(*conditions))
+        .order_by(models.WorkshopRACI.id)
+        .all()
+    )
 
 
-def load_recommended_for_activity(activity_id: int) -> List[models.RecommendedRACI]:
-    return [r for r in db_instance.recommended_raci.values() if r.activity_id == activity_id]
+def list_recommended_cells(
+    db: Session, workshop_id: int, activity_ids: Optional[Collection[int]] = None
+) -> List[Tuple[int, int, Optional[str]]]:
+    """(activity_id, role_id, value) recommendations for the workshop's organization, or only ``activity_ids``."""
+    rec = models.RecommendedRACI
+    statement = select(rec.activity_id, rec.role_id, rec.value).order_by(rec.id)
+    if activity_ids is not None:
+        if not activity_ids:
+            return []
+        statement = statement.where(rec.activity_id.in_(activity_ids))
+    else:
+        workshop = db.get(models.Workshop, workshop_id)
+        if not workshop:
+            return []
+        statement = (
+            statement.join(models.Activity, rec.activity_id == models.Activity.id)
+            .join(models.Domain, models.Activity.domain_id == models.Domain.id)
+            .where(models.Domain.organization_id == workshop.organization_id)
+        )
+    return [tuple(row) for row in db.execute(statement)]
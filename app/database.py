@@ -3,18 +3,55 @@ from contextlib import contextmanager
 from typing import Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from common.sqlite import apply_sqlite_profile
 
 DATABASE_URL = os.getenv("RACI_DATABASE_URL", "sqlite:///./raci.db")
+# "production" (default) or "default" for SQLite's stock settings
+SQLITE_PROFILE = os.getenv("RACI_SQLITE_PROFILE", "production")
+# serve GET endpoints from a separate pool of read-only connections
+READ_ONLY_POOL = os.getenv("RACI_READ_ONLY_POOL", "").lower() in {"1", "true", "yes"}
+
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_memory(url: str) -> bool:
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def _read_only_url(url: str) -> str:
+    path = os.path.abspath(make_url(url).database)
+    return f"sqlite:///file:{path}?mode=ro&uri=true"
+
+
+connect_args = {"check_same_thread": False} if _is_sqlite(DATABASE_URL) else {}
+# one shared connection, so request threads all see the same in-memory database
+poolclass = StaticPool if _is_sqlite(DATABASE_URL) and _is_memory(DATABASE_URL) else None
+engine = create_engine(DATABASE_URL, connect_args=connect_args, poolclass=poolclass)
+if _is_sqlite(DATABASE_URL):
+    apply_sqlite_profile(engine, SQLITE_PROFILE)
+
+read_engine = engine
+if READ_ONLY_POOL and _is_sqlite(DATABASE_URL) and not _is_memory(DATABASE_URL):
+    read_engine = create_engine(_read_only_url(DATABASE_URL), connect_args=connect_args)
+    apply_sqlite_profile(read_engine, SQLITE_PROFILE, read_only=True)
 
-connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 
 def init_db():
+    from .migrations import upgrade
+
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add columns and indexes introduced since
+    upgrade(engine)
 
 
 @contextmanager
@@ -26,29 +63,21 @@ def get_session() -> Generator:
         session.close()
 
 
+@contextmanager
+def get_read_session() -> Generator:
+    session = ReadSessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
 def get_db() -> Generator:
     with get_session() as session:
         yield session
-class InMemoryDB:
-    def __init__(self):
-        self.reset()
-
-    def reset(self):
-        self.organizations = {}
-        self.workshops = {}
-        self.domains = {}
-        self.roles = {}
-        self.activities = {}
-        self.recommended_raci = {}
-        self.workshop_raci = {}
-        self.issues = {}
-        self.actions = {}
-        self._id_counter = 1
-
-    def _next_id(self):
-        ident = self._id_counter
-        self._id_counter += 1
-        return ident
-
-
-db_instance = InMemoryDB()
+
+
+def get_read_db() -> Generator:
+    """Session for handlers that never write; read-only connections when RACI_READ_ONLY_POOL is set."""
+    with get_read_session() as session:
+        yield session
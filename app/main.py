@@ -1,17 +1,26 @@
+import asyncio
 import csv
 import io
 import json
-from typing import List
+import time
+from itertools import groupby
+from operator import itemgetter
+from typing import Callable, Iterable, Iterator, List, Optional
 
 from pathlib import Path
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, WebSocket
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, PlainTextResponse, JSONResponse
-from fastapi.responses import HTMLResponse, PlainTextResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, StreamingResponse
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
 
-from . import crud, schemas, services, models
-from .database import get_db, init_db
+from backend.services.export_cache import ExportCache
+
+from . import crud, portfolio, schemas, services, models
+from .broadcast import hub
+from .database import get_db, get_read_db, get_read_session, init_db
 from .schemas import (
     ActionItem,
     ActionItemCreate,
@@ -23,7 +32,6 @@ from .schemas import (
     ImportPayload,
     ImportRecommendedRACICreate,
     ImportRole,
-    ImportPayload,
     Organization,
     OrganizationCreate,
     RecommendedRACI,
@@ -32,32 +40,45 @@ from .schemas import (
     Workshop,
     WorkshopCreate,
     WorkshopRACI,
+    WorkshopRACIBulkUpsert,
     WorkshopRACICreate,
 )
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 SAMPLE_TEMPLATE = BASE_DIR / "examples" / "seattle_city_light_import.json"
-from fastapi import Depends, FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-
-from . import crud, services
-from .database import db_instance
+CSV_CHUNK_ROWS = 500
+CSV_MEDIA_TYPE = "text/plain; charset=utf-8"
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+# change feed: how often waiting clients re-check the log, and the longest long-poll
+CHANGE_POLL_SECONDS = 0.5
+MAX_CHANGE_WAIT_SECONDS = 30
+SSE_KEEPALIVE_SECONDS = 15
+EXPORT_DIR = BASE_DIR / "data" / "exports"
+
+export_cache = ExportCache(EXPORT_DIR)
 
 app = FastAPI(title="OT RACI Workshop App")
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=["http://localhost:8000", "http://127.0.0.1:8000"],  # TODO: Add production frontend URL
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    allow_origins=["http://localhost:8000", "http://127.0.0.1:8000"], # TODO: Add production frontend URL
 )
 
 
 @app.on_event("startup")
 def on_startup():
     init_db()
+    crud.CELL_LISTENERS.append(hub.publish)
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    if hub.publish in crud.CELL_LISTENERS:
+        crud.CELL_LISTENERS.remove(hub.publish)
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -74,14 +95,114 @@ def api_health():
     return {"message": "OT RACI Workshop API ready"}
 
 
+def _opaque_tag(etag: str) -> str:
+    # If-None-Match uses weak comparison, so W/"x" and "x" match
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {_opaque_tag(tag.strip()) for tag in if_none_match.split(",")}
+    return "*" in tags or _opaque_tag(etag) in tags
+
+
+def _not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Tag ``response`` with ``etag``, or return a bodiless 304 if the client already holds that version.
+
+    Called before the list query runs, so a 304 costs one version lookup.
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+
+def _table_etag(db, model) -> str:
+    return f'W/"{model.__tablename__}-v{crud.get_table_version(db, model)}"'
+
+
+def _workshop_etag(db, workshop_id: int, resource: str) -> Optional[str]:
+    revision = crud.get_workshop_revision(db, workshop_id)
+    return None if revision is None else f'W/"workshop-{workshop_id}-{resource}-r{revision}"'
+
+
+class PageParams:
+    """``limit``, ``cursor`` (from the previous page's X-Next-Cursor header) and comma-separated ``fields``."""
+
+    def __init__(
+        self, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None, fields: Optional[str] = None
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = [name.strip() for name in fields.split(",") if name.strip()] if fields else None
+
+
+def _equal(model, **values) -> list:
+    """Equality filters for the given query parameters that were supplied."""
+    return [getattr(model, name) == value for name, value in values.items() if value is not None]
+
+
+def _list_page(db, response: Response, page: PageParams, model, schema, criteria: list, keys=None):
+    """One keyset page of ``model``; the next page's cursor goes in the X-Next-Cursor header.
+
+    Sparse ``fields`` bypass the response model and return only the requested
+    columns plus the sort keys.
+    """
+    if page.fields:
+        unknown = sorted(set(page.fields) - set(schema.__fields__))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    try:
+        result = crud.list_page(db, model, criteria, limit=page.limit, cursor=page.cursor, fields=page.fields, keys=keys)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if result.next_cursor is not None:
+        response.headers["X-Next-Cursor"] = result.next_cursor
+    if not page.fields:
+        return result.items
+    headers = {name: response.headers[name] for name in ("etag", "cache-control", "x-next-cursor") if name in response.headers}
+    return JSONResponse(jsonable_encoder(result.items), headers=headers)
+
+
 @app.post("/organizations", response_model=Organization)
 def create_organization(payload: OrganizationCreate, db=Depends(get_db)):
     return crud.create_organization(db, payload.dict())
 
 
 @app.get("/organizations", response_model=List[Organization])
-def list_orgs(db=Depends(get_db)):
-    return crud.list_organizations(db)
+def list_orgs(
+    request: Request,
+    response: Response,
+    q: Optional[str] = None,
+    industry: Optional[str] = None,
+    page: PageParams = Depends(),
+    db=Depends(get_read_db),
+):
+    not_modified = _not_modified(request, response, _table_etag(db, models.Organization))
+    if not_modified:
+        return not_modified
+    criteria = _equal(models.Organization, industry=industry)
+    if q:
+        criteria.append(crud.contains_text(models.Organization.name, q))
+    return _list_page(db, response, page, models.Organization, Organization, criteria)
+
+
+@app.post("/organizations/{organization_id}/validate", response_model=schemas.PortfolioRun, status_code=202)
+def validate_organization(organization_id: int, overload_threshold: int = 10, full: bool = False, db=Depends(get_db)):
+    """Validate all of the organization's workshops in the background; poll the returned run for progress."""
+    if db.get(models.Organization, organization_id) is None:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    return portfolio.runner.start(organization_id, overload_threshold, full).to_dict()
+
+
+@app.get("/organizations/{organization_id}/validation-runs/{run_id}", response_model=schemas.PortfolioRun)
+def organization_validation_run(organization_id: int, run_id: str):
+    run = portfolio.runner.get(run_id)
+    if run is None or run.organization_id != organization_id:
+        raise HTTPException(status_code=404, detail="Validation run not found")
+    return run.to_dict()
 
 
 @app.post("/workshops", response_model=Workshop)
@@ -90,8 +211,18 @@ def create_workshop(payload: WorkshopCreate, db=Depends(get_db)):
 
 
 @app.get("/workshops", response_model=List[Workshop])
-def list_workshops(db=Depends(get_db)):
-    return crud.list_workshops(db)
+def list_workshops(
+    response: Response,
+    organization_id: Optional[int] = None,
+    status: Optional[str] = None,
+    q: Optional[str] = None,
+    page: PageParams = Depends(),
+    db=Depends(get_read_db),
+):
+    criteria = _equal(models.Workshop, organization_id=organization_id, status=status)
+    if q:
+        criteria.append(crud.contains_text(models.Workshop.name, q))
+    return _list_page(db, response, page, models.Workshop, Workshop, criteria)
 
 
 @app.post("/domains", response_model=Domain)
@@ -100,8 +231,21 @@ def create_domain(payload: DomainCreate, db=Depends(get_db)):
 
 
 @app.get("/domains", response_model=List[Domain])
-def list_domains(organization_id: int = None, db=Depends(get_db)):
-    return crud.list_domains(db, organization_id=organization_id)
+def list_domains(
+    request: Request,
+    response: Response,
+    organization_id: Optional[int] = None,
+    q: Optional[str] = None,
+    page: PageParams = Depends(),
+    db=Depends(get_read_db),
+):
+    not_modified = _not_modified(request, response, _table_etag(db, models.Domain))
+    if not_modified:
+        return not_modified
+    criteria = _equal(models.Domain, organization_id=organization_id)
+    if q:
+        criteria.append(crud.contains_text(models.Domain.name, q))
+    return _list_page(db, response, page, models.Domain, Domain, criteria)
 
 
 @app.post("/roles", response_model=schemas.Role)
@@ -110,8 +254,22 @@ def create_role(payload: schemas.RoleCreate, db=Depends(get_db)):
 
 
 @app.get("/roles", response_model=List[schemas.Role])
-def list_roles(organization_id: int = None, db=Depends(get_db)):
-    return crud.list_roles(db, organization_id=organization_id)
+def list_roles(
+    request: Request,
+    response: Response,
+    organization_id: Optional[int] = None,
+    category: Optional[str] = None,
+    q: Optional[str] = None,
+    page: PageParams = Depends(),
+    db=Depends(get_read_db),
+):
+    not_modified = _not_modified(request, response, _table_etag(db, models.Role))
+    if not_modified:
+        return not_modified
+    criteria = _equal(models.Role, organization_id=organization_id, category=category)
+    if q:
+        criteria.append(crud.contains_text(models.Role.name, q))
+    return _list_page(db, response, page, models.Role, schemas.Role, criteria)
 
 
 @app.post("/activities", response_model=Activity)
@@ -120,8 +278,26 @@ def create_activity(payload: ActivityCreate, db=Depends(get_db)):
 
 
 @app.get("/activities", response_model=List[Activity])
-def list_activities(domain_id: int = None, db=Depends(get_db)):
-    return crud.list_activities(db, domain_id=domain_id)
+def list_activities(
+    request: Request,
+    response: Response,
+    domain_id: Optional[int] = None,
+    organization_id: Optional[int] = None,
+    criticality: Optional[str] = None,
+    q: Optional[str] = None,
+    page: PageParams = Depends(),
+    db=Depends(get_read_db),
+):
+    not_modified = _not_modified(request, response, _table_etag(db, models.Activity))
+    if not_modified:
+        return not_modified
+    criteria = _equal(models.Activity, domain_id=domain_id, criticality=criticality)
+    if organization_id is not None:
+        domain_ids = select(models.Domain.id).where(models.Domain.organization_id == organization_id)
+        criteria.append(models.Activity.domain_id.in_(domain_ids))
+    if q:
+        criteria.append(crud.contains_text(models.Activity.name, q))
+    return _list_page(db, response, page, models.Activity, Activity, criteria)
 
 
 @app.post("/recommended", response_model=List[RecommendedRACI])
@@ -130,8 +306,16 @@ def upload_recommended(payload: List[RecommendedRACICreate], db=Depends(get_db))
 
 
 @app.get("/recommended", response_model=List[RecommendedRACI])
-def list_recommended(activity_id: int = None, db=Depends(get_db)):
-    return crud.list_recommended(db, activity_id=activity_id)
+def list_recommended(
+    response: Response,
+    activity_id: Optional[int] = None,
+    role_id: Optional[int] = None,
+    value: Optional[str] = None,
+    page: PageParams = Depends(),
+    db=Depends(get_read_db),
+):
+    criteria = _equal(models.RecommendedRACI, activity_id=activity_id, role_id=role_id, value=value)
+    return _list_page(db, response, page, models.RecommendedRACI, RecommendedRACI, criteria)
 
 
 @app.post("/workshop-raci", response_model=WorkshopRACI)
@@ -139,9 +323,32 @@ def upsert_workshop_raci(payload: WorkshopRACICreate, db=Depends(get_db)):
     return crud.upsert_workshop_raci(db, payload.dict())
 
 
+@app.post("/workshop-raci/bulk", response_model=List[WorkshopRACI])
+def bulk_upsert_workshop_raci(payload: WorkshopRACIBulkUpsert, db=Depends(get_db)):
+    if not db.query(models.Workshop).filter(models.Workshop.id == payload.workshop_id).first():
+        raise HTTPException(status_code=404, detail="Workshop not found")
+    return crud.bulk_upsert_workshop_raci(db, payload.cell_rows())
+
+
 @app.get("/workshops/{workshop_id}/raci", response_model=List[WorkshopRACI])
-def list_workshop_assignments(workshop_id: int, db=Depends(get_db)):
-    return crud.list_workshop_raci(db, workshop_id)
+def list_workshop_assignments(
+    workshop_id: int,
+    request: Request,
+    response: Response,
+    activity_id: Optional[int] = None,
+    role_id: Optional[int] = None,
+    value: Optional[str] = None,
+    page: PageParams = Depends(),
+    db=Depends(get_read_db),
+):
+    etag = _workshop_etag(db, workshop_id, "raci")
+    not_modified = etag and _not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
+    cell = models.WorkshopRACI
+    criteria = _equal(cell, workshop_id=workshop_id, activity_id=activity_id, role_id=role_id, value=value)
+    # page in (activity, role) order so every page is a range scan of ux_workshop_raci_cell
+    return _list_page(db, response, page, cell, WorkshopRACI, criteria, keys=[cell.activity_id, cell.role_id])
 
 
 @app.post("/issues", response_model=schemas.Issue)
@@ -150,7 +357,11 @@ def create_issue(payload: schemas.IssueCreate, db=Depends(get_db)):
 
 
 @app.get("/workshops/{workshop_id}/issues", response_model=List[schemas.Issue])
-def list_workshop_issues(workshop_id: int, db=Depends(get_db)):
+def list_workshop_issues(workshop_id: int, request: Request, response: Response, db=Depends(get_read_db)):
+    etag = _workshop_etag(db, workshop_id, "issues")
+    not_modified = etag and _not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
     return crud.list_issues(db, workshop_id)
 
 
@@ -160,15 +371,39 @@ def create_action(payload: ActionItemCreate, db=Depends(get_db)):
 
 
 @app.get("/workshops/{workshop_id}/actions", response_model=List[ActionItem])
-def list_workshop_actions(workshop_id: int, db=Depends(get_db)):
+def list_workshop_actions(workshop_id: int, request: Request, response: Response, db=Depends(get_read_db)):
+    etag = _workshop_etag(db, workshop_id, "actions")
+    not_modified = etag and _not_modified(request, response, etag)
+    if not_modified:
+        return not_modified
     return crud.list_actions(db, workshop_id)
 
 
 @app.post("/workshops/{workshop_id}/validate", response_model=ValidationResult)
-def validate_workshop(workshop_id: int, overload_threshold: int = 10, db=Depends(get_db)):
+def validate_workshop(workshop_id: int, overload_threshold: int = 10, full: bool = False, db=Depends(get_db)):
     if not db.query(models.Workshop).filter(models.Workshop.id == workshop_id).first():
         raise HTTPException(status_code=404, detail="Workshop not found")
-    return services.validate_workshop(db, workshop_id, overload_threshold)
+    return services.validate_workshop(db, workshop_id, overload_threshold, full=full)
+
+
+@app.get("/validation/rules", response_model=List[schemas.RuleStats])
+def validation_rules():
+    """Call, finding and time counters of every validation rule that has run in this process."""
+    return services.rule_registry.stats()
+
+
+@app.get("/workshops/{workshop_id}/role-load", response_model=schemas.ValidationStats)
+def workshop_role_load(workshop_id: int, db=Depends(get_db)):
+    """Per-role R/A/C/I counts for heatmaps, read from the maintained summary table."""
+    return services.role_load_stats(db, workshop_id)
+
+
+@app.get("/workshops/{workshop_id}/deviations", response_model=schemas.DeviationReport)
+def workshop_deviations(workshop_id: int, db=Depends(get_read_db)):
+    """Cells that differ from the recommended RACI and the deviation rate of each domain."""
+    if not db.query(models.Workshop).filter(models.Workshop.id == workshop_id).first():
+        raise HTTPException(status_code=404, detail="Workshop not found")
+    return services.deviation_report(db, workshop_id)
 
 
 @app.post("/workshops/{workshop_id}/actions/from-issues", response_model=List[ActionItem])
@@ -178,60 +413,98 @@ def build_actions_from_issues(workshop_id: int, db=Depends(get_db)):
     return services.generate_actions_from_issues(db, workshop_id)
 
 
-@app.post("/import", response_model=schemas.Organization)
-def import_template(payload: ImportPayload, db=Depends(get_db)):
-    def _to_dict(item):
-        return item.dict() if hasattr(item, "dict") else dict(item)
-
-    organization = crud.create_organization(db, _to_dict(payload.organization))
-    domain_map = {}
-    role_map = {}
-    activity_map = {}
-
-    for d in payload.domains:
-        domain_data = _to_dict(d)
-        domain = crud.create_domain(db, {**domain_data, "organization_id": organization.id})
-        domain_map[domain.name] = domain
-
-    for r in payload.roles:
-        role_data = _to_dict(r)
-        role = crud.create_role(db, {**role_data, "organization_id": organization.id})
-        role_map[role.name] = role
-
-    for activity in payload.activities:
-        act_data = _to_dict(activity)
-        domain = domain_map.get(act_data.get("domain") or getattr(activity, "domain", None))
-        if not domain:
-            name = act_data.get("name") or getattr(activity, "name", "")
-            missing_domain = act_data.get("domain") or getattr(activity, "domain", "")
-            raise HTTPException(status_code=400, detail=f"Domain '{missing_domain}' missing for activity '{name}'")
-        created = crud.create_activity(
-            db,
-            {
-                "name": act_data.get("name") or getattr(activity, "name", ""),
-                "description": act_data.get("description") or getattr(activity, "description", None),
-                "code": act_data.get("code") or getattr(activity, "code", None),
-                "criticality": act_data.get("criticality") or getattr(activity, "criticality", None),
-                "framework_refs": act_data.get("framework_refs") or getattr(activity, "framework_refs", None),
-                "domain_id": domain.id,
-            },
-        )
-        activity_map[created.name] = created
-
-    if payload.recommended:
-        rec_payloads = []
-        for rec in payload.recommended:
-            rec_data = _to_dict(rec)
-            activity = activity_map.get(rec_data.get("activity_name") or getattr(rec, "activity_name", None))
-            role = role_map.get(rec_data.get("role_name") or getattr(rec, "role_name", None))
-            if not activity or not role:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Invalid recommendation reference {rec_data.get('activity_name')}/{rec_data.get('role_name')}",
-                )
-            rec_payloads.append({"activity_id": activity.id, "role_id": role.id, "value": rec_data.get("value") or getattr(rec, "value", None)})
-        crud.set_recommended_raci(db, rec_payloads)
+def _read_change_feed(workshop_id: int, since: Optional[int], limit: int) -> dict:
+    with get_read_session() as db:
+        return services.change_feed(db, workshop_id, since, limit)
 
+
+def _workshop_exists(workshop_id: int) -> bool:
+    with get_read_session() as db:
+        return crud.get_workshop_revision(db, workshop_id) is not None
+
+
+@app.get("/workshops/{workshop_id}/changes", response_model=schemas.ChangeFeed)
+async def workshop_changes(
+    workshop_id: int,
+    since: Optional[int] = Query(None, ge=0),
+    limit: int = Query(1000, ge=1, le=MAX_PAGE_SIZE),
+    wait: float = Query(0, ge=0, le=MAX_CHANGE_WAIT_SECONDS),
+):
+    """Cell, issue and action changes after ``since``; pass the returned ``last_seq`` as the next ``since``.
+
+    With ``wait``, the request is held open (long-poll) until a change arrives
+    or ``wait`` seconds pass. The wait is spent in ``asyncio.sleep``, so idle
+    pollers hold no worker thread or connection.
+    """
+    if not await run_in_threadpool(_workshop_exists, workshop_id):
+        raise HTTPException(status_code=404, detail="Workshop not found")
+    feed = await run_in_threadpool(_read_change_feed, workshop_id, since, limit)
+    deadline = time.monotonic() + wait
+    while since is not None and not feed["changes"] and time.monotonic() < deadline:
+        await asyncio.sleep(min(CHANGE_POLL_SECONDS, deadline - time.monotonic()))
+        feed = await run_in_threadpool(_read_change_feed, workshop_id, since, limit)
+    return feed
+
+
+async def _change_events(request: Request, workshop_id: int, since: Optional[int]):
+    if since is None:
+        since = (await run_in_threadpool(_read_change_feed, workshop_id, None, 1))["last_seq"]
+    idle = 0.0
+    while not await request.is_disconnected():
+        feed = await run_in_threadpool(_read_change_feed, workshop_id, since, DEFAULT_PAGE_SIZE)
+        for change in feed["changes"]:
+            yield f"id: {change['seq']}\nevent: change\ndata: {json.dumps(jsonable_encoder(change))}\n\n"
+        since = feed["last_seq"]
+        if feed["has_more"]:
+            continue
+        if feed["changes"]:
+            idle = 0.0
+        elif idle >= SSE_KEEPALIVE_SECONDS:
+            yield ": keep-alive\n\n"
+            idle = 0.0
+        await asyncio.sleep(CHANGE_POLL_SECONDS)
+        idle += CHANGE_POLL_SECONDS
+
+
+@app.get("/workshops/{workshop_id}/changes/stream")
+async def stream_workshop_changes(workshop_id: int, request: Request, since: Optional[int] = Query(None, ge=0)):
+    """Server-Sent Events: one ``change`` event per change, with its seq as the event id.
+
+    A reconnecting ``EventSource`` sends Last-Event-ID and resumes after it;
+    without ``since`` the stream starts at the current end of the log.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+    if not await run_in_threadpool(_workshop_exists, workshop_id):
+        raise HTTPException(status_code=404, detail="Workshop not found")
+    return StreamingResponse(
+        _change_events(request, workshop_id, since), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+
+@app.websocket("/workshops/{workshop_id}/ws")
+async def workshop_socket(websocket: WebSocket, workshop_id: int):
+    """Live cell edits: ``{"type": "cells", "cells": [...]}`` batches, or ``{"type": "resync"}`` after falling behind.
+
+    The first message carries the change feed's ``last_seq`` so a client can
+    fill any gap through ``/workshops/{id}/changes`` after a reconnect.
+    """
+    if not await run_in_threadpool(_workshop_exists, workshop_id):
+        await websocket.close(code=1008)
+        return
+    await websocket.accept()
+    head = await run_in_threadpool(_read_change_feed, workshop_id, None, 1)
+    await hub.serve(websocket, workshop_id, hello={"type": "hello", "workshop_id": workshop_id, "last_seq": head["last_seq"]})
+
+
+@app.post("/import", response_model=schemas.Organization)
+def import_template(payload: ImportPayload, response: Response, db=Depends(get_db)):
+    try:
+        organization, timings = services.import_payload(db, payload)
+    except services.ImportValidationError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    response.headers["Server-Timing"] = ", ".join(f"{stage};dur={ms}" for stage, ms in timings.items())
     return organization
 
 
@@ -246,55 +519,47 @@ def get_example_template():
     raise HTTPException(status_code=404, detail="Sample template not found")
 
 
-    organization = crud.create_organization(db, payload.organization.dict())
-    for d in payload.domains:
-        crud.create_domain(db, {**d.dict(), "organization_id": organization.id})
-    for r in payload.roles:
-        crud.create_role(db, {**r.dict(), "organization_id": organization.id})
-    for activity in payload.activities:
-        crud.create_activity(db, activity.dict())
-    if payload.recommended:
-        crud.set_recommended_raci(db, [rec.dict() for rec in payload.recommended])
-    return organization
-
-
-@app.get("/workshops/{workshop_id}/export/raci", response_class=PlainTextResponse)
-def export_raci_matrix(workshop_id: int, db=Depends(get_db)):
-    roles = crud.get_roles_for_workshop(db, workshop_id)
-    activities = crud.get_activities_for_workshop(db, workshop_id)
-    assignments = crud.list_workshop_raci(db, workshop_id)
-    assignment_map = {(a.activity_id, a.role_id): a.value or "" for a in assignments}
+def _stream_csv(header: List[str], rows: Iterable[list]) -> Iterator[str]:
+    """Yield CSV text in chunks of ``CSV_CHUNK_ROWS`` rows so exports never hold the whole file."""
     buffer = io.StringIO()
     writer = csv.writer(buffer)
-    header = ["Activity"] + [role.name for role in roles]
     writer.writerow(header)
-    for activity in activities:
-        row = [activity.name]
-        for role in roles:
-            row.append(assignment_map.get((activity.id, role.id), ""))
+    for index, row in enumerate(rows, start=1):
         writer.writerow(row)
-    return buffer.getvalue()
+        if index % CSV_CHUNK_ROWS == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    yield buffer.getvalue()
 
 
-@app.get("/workshops/{workshop_id}/export/gaps", response_class=PlainTextResponse)
-def export_gap_report(workshop_id: int, db=Depends(get_db)):
-    issues = crud.list_issues(db, workshop_id)
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(["Activity ID", "Role ID", "Type", "Severity", "Notes"])
-    for issue in issues:
-        writer.writerow([issue.activity_id, issue.role_id or "", issue.type, issue.severity or "", issue.notes or ""])
-    return buffer.getvalue()
+def _raci_matrix_csv(workshop_id: int) -> Iterator[str]:
+    with get_read_session() as db:
+        roles = crud.get_roles_for_workshop(db, workshop_id)
 
+        def rows():
+            for activity_id, cells in groupby(crud.iter_raci_matrix(db, workshop_id), key=itemgetter(0)):
+                values = {}
+                name = ""
+                for _, name, role_id, value in cells:
+                    values[role_id] = value or ""
+                yield [name] + [values.get(role.id, "") for role in roles]
 
-@app.get("/workshops/{workshop_id}/export/actions", response_class=PlainTextResponse)
-def export_actions(workshop_id: int, db=Depends(get_db)):
-    actions = crud.list_actions(db, workshop_id)
-    buffer = io.StringIO()
-    writer = csv.writer(buffer)
-    writer.writerow(["Summary", "Owner Role", "Status", "Priority", "Due Date", "Issue ID"])
-    for action in actions:
-        writer.writerow(
+        yield from _stream_csv(["Activity"] + [role.name for role in roles], rows())
+
+
+def _gap_report_csv(workshop_id: int) -> Iterator[str]:
+    with get_read_session() as db:
+        rows = (
+            [issue.activity_id, issue.role_id or "", issue.type, issue.severity or "", issue.notes or ""]
+            for issue in crud.iter_issues(db, workshop_id)
+        )
+        yield from _stream_csv(["Activity ID", "Role ID", "Type", "Severity", "Notes"], rows)
+
+
+def _actions_csv(workshop_id: int) -> Iterator[str]:
+    with get_read_session() as db:
+        rows = (
             [
                 action.summary,
                 action.owner_role_id or "",
@@ -303,98 +568,43 @@ def export_actions(workshop_id: int, db=Depends(get_db)):
                 action.due_date or "",
                 action.issue_id or "",
             ]
+            for action in crud.iter_actions(db, workshop_id)
         )
-    return buffer.getvalue()
-
-
-if __name__ == "__main__":
-    try:
-        import uvicorn
-
-        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
-    except ImportError:  # pragma: no cover - only triggers without uvicorn installed
-        print("Install uvicorn to run the API server: pip install -r requirements.txt")
-def get_db():
-    return db_instance
-
-
-@app.get("/")
-def read_root():
-    return {"message": "OT RACI Workshop API ready"}
-
+        yield from _stream_csv(["Summary", "Owner Role", "Status", "Priority", "Due Date", "Issue ID"], rows)
 
-@app.post("/organizations")
-def create_organization(payload: dict, db=Depends(get_db)):
-    return crud.create_organization(payload)
 
+def _cached_csv(workshop_id: int, export_type: str, render: Callable[[int], Iterator[str]]):
+    """Serve the CSV for the workshop's current revision from the export cache, streaming and storing it on a miss."""
+    with get_read_session() as db:
+        revision = crud.get_workshop_revision(db, workshop_id)
+    if revision is None:
+        return StreamingResponse(render(workshop_id), media_type=CSV_MEDIA_TYPE)
+    cached = export_cache.get(workshop_id, revision, export_type, ".csv")
+    if cached is not None:
+        return FileResponse(cached, media_type=CSV_MEDIA_TYPE)
+    chunks = export_cache.tee(render(workshop_id), workshop_id, revision, export_type, ".csv")
+    return StreamingResponse(chunks, media_type=CSV_MEDIA_TYPE)
 
-@app.get("/organizations")
-def list_orgs(db=Depends(get_db)):
-    return crud.list_organizations()
 
+@app.get("/workshops/{workshop_id}/export/raci", response_class=StreamingResponse)
+def export_raci_matrix(workshop_id: int):
+    return _cached_csv(workshop_id, "raci", _raci_matrix_csv)
 
-@app.post("/workshops")
-def create_workshop(payload: dict, db=Depends(get_db)):
-    return crud.create_workshop(payload)
 
+@app.get("/workshops/{workshop_id}/export/gaps", response_class=StreamingResponse)
+def export_gap_report(workshop_id: int):
+    return _cached_csv(workshop_id, "gaps", _gap_report_csv)
 
-@app.post("/domains")
-def create_domain(payload: dict, db=Depends(get_db)):
-    return crud.create_domain(payload)
 
+@app.get("/workshops/{workshop_id}/export/actions", response_class=StreamingResponse)
+def export_actions(workshop_id: int):
+    return _cached_csv(workshop_id, "actions", _actions_csv)
 
-@app.post("/roles")
-def create_role(payload: dict, db=Depends(get_db)):
-    return crud.create_role(payload)
-
-
-@app.post("/activities")
-def create_activity(payload: dict, db=Depends(get_db)):
-    return crud.create_activity(payload)
-
-
-@app.post("/recommended")
-def upload_recommended(payload: list, db=Depends(get_db)):
-    return crud.set_recommended_raci(payload)
-
-
-@app.post("/workshop-raci")
-def upsert_workshop_raci(payload: dict, db=Depends(get_db)):
-    return crud.upsert_workshop_raci(payload)
-
-
-@app.get("/workshops/{workshop_id}/raci")
-def list_workshop_assignments(workshop_id: int, db=Depends(get_db)):
-    return crud.list_workshop_raci(workshop_id)
-
-
-@app.post("/issues")
-def create_issue(payload: dict, db=Depends(get_db)):
-    return crud.add_issue(payload)
-
-
-@app.get("/workshops/{workshop_id}/issues")
-def list_workshop_issues(workshop_id: int, db=Depends(get_db)):
-    return crud.list_issues(workshop_id)
-
-
-@app.post("/actions")
-def create_action(payload: dict, db=Depends(get_db)):
-    return crud.add_action_item(payload)
-
-
-@app.get("/workshops/{workshop_id}/actions")
-def list_workshop_actions(workshop_id: int, db=Depends(get_db)):
-    return crud.list_actions(workshop_id)
-
-
-@app.post("/workshops/{workshop_id}/validate")
-def validate_workshop(workshop_id: int, db=Depends(get_db)):
-    if workshop_id not in db.workshops:
-        raise HTTPException(status_code=404, detail="Workshop not found")
-    return services.validate_workshop(workshop_id)
 
+if __name__ == "__main__":
+    try:
+        import uvicorn
 
-@app.post("/workshops/{workshop_id}/actions/from-issues")
-def build_actions_from_issues(workshop_id: int, db=Depends(get_db)):
-    return services.generate_actions_from_issues(workshop_id)
+        uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    except ImportError:  # pragma: no cover - only triggers without uvicorn installed
+        print("Install uvicorn to run the API server: pip install -r requirements.txt")
@@ -0,0 +1,227 @@
+"""Dense in-memory RACI matrix for whole-workshop analysis.
+
+A workshop's cells are held as one ``bytearray`` of small integer codes laid out
+row-major (one row per activity, one column per role), with id <-> index maps
+for both axes. A 10,000 x 200 workshop takes 2 MB instead of a list of two
+million ORM objects, and counting works on whole rows or columns at C speed
+through ``bytes.count`` on slices, so per-activity counts, per-role loads and
+diffs stay in the milliseconds.
+
+The stdlib ``bytearray`` is used instead of NumPy so the engine adds no
+dependency; the layout is the same contiguous uint8 buffer NumPy would use.
+"""
+from itertools import compress
+from operator import ne
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from . import crud
+
+# code 0 is a blank cell (no row, or a row with value None)
+RACI_CODES: Dict[Optional[str], int] = {None: 0, "R": 1, "A": 2, "C": 3, "I": 4}
+CODE_VALUES: Tuple[Optional[str], ...] = (None, "R", "A", "C", "I")
+BLANK = 0
+
+Cell = Tuple[int, int, Optional[str]]
+Deviation = Tuple[int, int, Optional[str], Optional[str]]
+
+
+def encode(value: Optional[str]) -> int:
+    code = RACI_CODES.get(value)
+    if code is not None:
+        return code
+    normalized = value.strip().upper()
+    # the API stores blanks as None, "" or the string "None"
+    if normalized in ("", "NONE"):
+        return BLANK
+    try:
+        return RACI_CODES[normalized]
+    except KeyError:
+        raise ValueError(f"Invalid RACI value {value!r}; expected one of R, A, C, I or blank")
+
+
+class RaciMatrix:
+    """Activities x roles grid of RACI codes with vectorized counting."""
+
+    __slots__ = ("activity_ids", "role_ids", "activity_index", "role_index", "codes")
+
+    def __init__(self, activity_ids: Sequence[int], role_ids: Sequence[int], codes: Optional[bytearray] = None):
+        self.activity_ids: List[int] = list(activity_ids)
+        self.role_ids: List[int] = list(role_ids)
+        self.activity_index: Dict[int, int] = {activity_id: i for i, activity_id in enumerate(self.activity_ids)}
+        self.role_index: Dict[int, int] = {role_id: j for j, role_id in enumerate(self.role_ids)}
+        if len(self.activity_index) != len(self.activity_ids) or len(self.role_index) != len(self.role_ids):
+            raise ValueError("Activity and role ids must be unique")
+        size = len(self.activity_ids) * len(self.role_ids)
+        if codes is None:
+            codes = bytearray(size)
+        elif len(codes) != size:
+            raise ValueError(f"Expected {size} codes, got {len(codes)}")
+        self.codes = codes
+
+    @classmethod
+    def from_cells(cls, cells: Iterable[Cell], activity_ids: Sequence[int] = (), role_ids: Sequence[int] = ()) -> "RaciMatrix":
+        """Build from (activity_id, role_id, value) triples.
+
+        ``activity_ids`` and ``role_ids`` fix the axis order; ids that only appear
+        in ``cells`` are appended in first-seen order.
+        """
+        cells = list(cells)
+        activities = dict.fromkeys(activity_ids)
+        roles = dict.fromkeys(role_ids)
+        for activity_id, role_id, _ in cells:
+            activities.setdefault(activity_id)
+            roles.setdefault(role_id)
+        matrix = cls(list(activities), list(roles))
+        width = len(matrix.role_ids)
+        codes, activity_index, role_index = matrix.codes, matrix.activity_index, matrix.role_index
+        for activity_id, role_id, value in cells:
+            codes[activity_index[activity_id] * width + role_index[role_id]] = encode(value)
+        return matrix
+
+    @classmethod
+    def from_workshop(cls, db: Session, workshop_id: int) -> "RaciMatrix":
+        """Every activity and role of the workshop's organization, filled from its cells in one scan."""
+        activity_ids = sorted(activity.id for activity in crud.get_activities_for_workshop(db, workshop_id))
+        role_ids = [role.id for role in crud.get_roles_for_workshop(db, workshop_id)]
+        return cls.from_cells(crud.iter_workshop_cells(db, workshop_id), activity_ids, role_ids)
+
+    @property
+    def shape(self) -> Tuple[int, int]:
+        return len(self.activity_ids), len(self.role_ids)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.codes)
+
+    def copy(self) -> "RaciMatrix":
+        return RaciMatrix(self.activity_ids, self.role_ids, bytearray(self.codes))
+
+    def _offset(self, activity_id: int, role_id: int) -> int:
+        return self.activity_index[activity_id] * len(self.role_ids) + self.role_index[role_id]
+
+    def get(self, activity_id: int, role_id: int) -> Optional[str]:
+        return CODE_VALUES[self.codes[self._offset(activity_id, role_id)]]
+
+    def set(self, activity_id: int, role_id: int, value: Optional[str]):
+        self.codes[self._offset(activity_id, role_id)] = encode(value)
+
+    def row(self, activity_id: int) -> bytes:
+        width = len(self.role_ids)
+        start = self.activity_index[activity_id] * width
+        return bytes(self.codes[start : start + width])
+
+    def column(self, role_id: int) -> bytes:
+        return bytes(self.codes[self.role_index[role_id] :: len(self.role_ids)])
+
+    def row_values(self, activity_id: int) -> Dict[int, str]:
+        """Non-blank cells of one activity keyed by role id."""
+        return {role_id: CODE_VALUES[code] for role_id, code in zip(self.role_ids, self.row(activity_id)) if code}
+
+    def cells(self) -> Iterator[Cell]:
+        """Non-blank (activity_id, role_id, value) triples in row-major order."""
+        width = len(self.role_ids)
+        for i, activity_id in enumerate(self.activity_ids):
+            row = self.codes[i * width : (i + 1) * width]
+            if row.count(BLANK) == width:
+                continue
+            for role_id, code in zip(self.role_ids, row):
+                if code:
+                    yield activity_id, role_id, CODE_VALUES[code]
+
+    def activity_counts(self) -> Dict[int, Dict[Optional[str], int]]:
+        """Per-activity number of R, A, C, I and blank cells."""
+        width, codes = len(self.role_ids), self.codes
+        counts = {}
+        for i, activity_id in enumerate(self.activity_ids):
+            start = i * width
+            counts[activity_id] = {value: codes.count(code, start, start + width) for code, value in enumerate(CODE_VALUES)}
+        return counts
+
+    def count_per_activity(self, value: Optional[str]) -> List[int]:
+        """How many roles hold ``value`` in each activity, aligned with ``activity_ids``."""
+        code, width = encode(value), len(self.role_ids)
+        if not width:
+            return [0] * len(self.activity_ids)
+        codes = self.codes
+        return [codes.count(code, start, start + width) for start in range(0, len(codes), width)]
+
+    def counts_per_activity(self) -> Iterator[Tuple[int, Dict[str, int]]]:
+        """(activity_id, {"R": n, "A": n, "C": n, "I": n}) for every activity, one row slice at a time."""
+        width, codes = len(self.role_ids), self.codes
+        letters = [(value, code) for code, value in enumerate(CODE_VALUES) if code != BLANK]
+        for index, activity_id in enumerate(self.activity_ids):
+            start = index * width
+            yield activity_id, {value: codes.count(code, start, start + width) for value, code in letters}
+
+    def role_loads(self) -> Dict[int, Dict[Optional[str], int]]:
+        """Per-role number of R, A, C, I and blank cells across all activities."""
+        loads = {}
+        for role_id in self.role_ids:
+            column = self.column(role_id)
+            loads[role_id] = {value: column.count(code) for code, value in enumerate(CODE_VALUES)}
+        return loads
+
+    def reindex(self, activity_ids: Sequence[int], role_ids: Sequence[int]) -> "RaciMatrix":
+        """Same cells on different axes; cells outside the new axes are dropped, new ones are blank."""
+        if list(activity_ids) == self.activity_ids and list(role_ids) == self.role_ids:
+            return self.copy()
+        target = RaciMatrix(activity_ids, role_ids)
+        columns = [(j, self.role_index[role_id]) for j, role_id in enumerate(target.role_ids) if role_id in self.role_index]
+        source_width, target_width = len(self.role_ids), len(target.role_ids)
+        for i, activity_id in enumerate(target.activity_ids):
+            source_row = self.activity_index.get(activity_id)
+            if source_row is None:
+                continue
+            base, target_base = source_row * source_width, i * target_width
+            for j, source_column in columns:
+                target.codes[target_base + j] = self.codes[base + source_column]
+        return target
+
+    def diff(self, other: "RaciMatrix") -> List[Tuple[int, int, Optional[str], Optional[str]]]:
+        """(activity_id, role_id, this value, other value) for every cell that differs.
+
+        ``other`` is aligned to this matrix's axes first; whole rows are compared
+        as bytes and only differing rows are walked cell by cell.
+        """
+        if other.activity_ids != self.activity_ids or other.role_ids != self.role_ids:
+            other = other.reindex(self.activity_ids, self.role_ids)
+        width = len(self.role_ids)
+        changes = []
+        mine, theirs = self.codes, other.codes
+        for i, activity_id in enumerate(self.activity_ids):
+            start, end = i * width, (i + 1) * width
+            if mine[start:end] == theirs[start:end]:
+                continue
+            for j in range(width):
+                if mine[start + j] != theirs[start + j]:
+                    changes.append((activity_id, self.role_ids[j], CODE_VALUES[mine[start + j]], CODE_VALUES[theirs[start + j]]))
+        return changes
+
+
+def compare_cells(matrix: RaciMatrix, cells: Sequence[Cell]) -> List[Deviation]:
+    """(activity_id, role_id, expected, actual) for every cell in ``cells`` that ``matrix`` disagrees with.
+
+    ``cells`` is typically the recommended RACI rows. All cells are resolved to
+    buffer offsets, the actual codes are gathered in one pass and compared with
+    the expected codes as two byte strings, so no per-activity maps are built.
+    Cells outside the matrix axes compare against blank. Input order is kept.
+    """
+    if not cells:
+        return []
+    width, activity_index, role_index = len(matrix.role_ids), matrix.activity_index, matrix.role_index
+    padded = matrix.codes + b"\0"
+    outside = len(matrix.codes)
+    offsets = [
+        activity_index[activity_id] * width + role_index[role_id] if activity_id in activity_index and role_id in role_index else outside
+        for activity_id, role_id, _ in cells
+    ]
+    actual = bytes(map(padded.__getitem__, offsets))
+    expected = bytes(encode(value) for _, _, value in cells)
+    if actual == expected:
+        return []
+    return [
+        (cells[k][0], cells[k][1], CODE_VALUES[expected[k]], CODE_VALUES[actual[k]])
+        for k in compress(range(len(cells)), map(ne, expected, actual))
+    ]
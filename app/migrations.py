@@ -0,0 +1,59 @@
+"""Bring an existing raci.db up to the current column and index layout.
+
+``Base.metadata.create_all`` only creates missing tables, so a database file
+created before a column or index was added to ``app.models`` never gets it.
+``upgrade`` adds whatever columns and indexes are missing and refreshes SQLite's
+planner statistics.
+It runs from ``init_db`` on every startup and can also be run by hand:
+
+    python -m app.migrations
+"""
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from common import schema
+
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+from .database import Base, engine as default_engine
+
+
+def _dedupe_workshop_cells(conn):
+    # older files may hold several rows per cell; keep the most recent so the unique index can be built
+    conn.execute(
+        text(
+            "DELETE FROM workshop_raci WHERE id NOT IN "
+            "(SELECT max(id) FROM workshop_raci GROUP BY workshop_id, activity_id, role_id)"
+        )
+    )
+
+
+def _detach_duplicate_issue_actions(conn):
+    # keep the oldest action linked to each issue; later duplicates stay as manual actions
+    conn.execute(
+        text(
+            "UPDATE actions SET issue_id = NULL WHERE issue_id IS NOT NULL AND id NOT IN "
+            "(SELECT min(id) FROM actions WHERE issue_id IS NOT NULL GROUP BY issue_id)"
+        )
+    )
+
+
+# data fixes that must run before a unique index can be built on an older file
+PREPARE_UNIQUE = {
+    "ux_workshop_raci_cell": _dedupe_workshop_cells,
+    "ux_actions_issue": _detach_duplicate_issue_actions,
+}
+# indexes superseded by a later one and dropped when found
+OBSOLETE_INDEXES = {"ix_actions_issue_id"}
+
+
+def upgrade(engine: Engine = default_engine) -> List[str]:
+    """Add missing columns and indexes and return their names."""
+    return schema.upgrade(engine, Base.metadata, PREPARE_UNIQUE, OBSOLETE_INDEXES, analyze=True)
+
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=default_engine)
+    created = upgrade()
+    print(f"Created {len(created)} column(s)/index(es): {', '.join(created)}" if created else "Schema already up to date")
@@ -1,6 +1,6 @@
 from datetime import date
 
-from sqlalchemy import Column, Date, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, Date, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -23,11 +23,13 @@ class Workshop(Base):
     __tablename__ = "workshops"
 
     id = Column(Integer, primary_key=True, index=True)
-    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     date = Column(Date, nullable=True)
     description = Column(Text, nullable=True)
     status = Column(String, default="planned")
+    # bumped by every crud write that changes what an export shows; keys the export cache
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
 
     organization = relationship("Organization", back_populates="workshops")
     raci_assignments = relationship("WorkshopRACI", back_populates="workshop", cascade="all, delete")
@@ -39,7 +41,7 @@ class Domain(Base):
     __tablename__ = "domains"
 
     id = Column(Integer, primary_key=True, index=True)
-    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=True)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=True, index=True)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
 
@@ -51,7 +53,7 @@ class Role(Base):
     __tablename__ = "roles"
 
     id = Column(Integer, primary_key=True, index=True)
-    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False)
+    organization_id = Column(Integer, ForeignKey("organizations.id"), nullable=False, index=True)
     name = Column(String, nullable=False)
     category = Column(String, nullable=True)
     description = Column(Text, nullable=True)
@@ -66,7 +68,7 @@ class Activity(Base):
     __tablename__ = "activities"
 
     id = Column(Integer, primary_key=True, index=True)
-    domain_id = Column(Integer, ForeignKey("domains.id"), nullable=False)
+    domain_id = Column(Integer, ForeignKey("domains.id"), nullable=False, index=True)
     code = Column(String, nullable=True)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
@@ -81,6 +83,7 @@ class Activity(Base):
 
 class RecommendedRACI(Base):
     __tablename__ = "recommended_raci"
+    __table_args__ = (Index("ix_recommended_raci_activity_role", "activity_id", "role_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     activity_id = Column(Integer, ForeignKey("activities.id"), nullable=False)
@@ -93,6 +96,11 @@ class RecommendedRACI(Base):
 
 class WorkshopRACI(Base):
     __tablename__ = "workshop_raci"
+    # the unique cell index also serves (workshop_id) and (workshop_id, activity_id) lookups
+    __table_args__ = (
+        Index("ux_workshop_raci_cell", "workshop_id", "activity_id", "role_id", unique=True),
+        Index("ix_workshop_raci_role", "workshop_id", "role_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     workshop_id = Column(Integer, ForeignKey("workshops.id"), nullable=False)
@@ -108,6 +116,10 @@ class WorkshopRACI(Base):
 
 class Issue(Base):
     __tablename__ = "issues"
+    __table_args__ = (
+        Index("ix_issues_workshop_activity", "workshop_id", "activity_id"),
+        Index("ix_issues_workshop_role", "workshop_id", "role_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     workshop_id = Column(Integer, ForeignKey("workshops.id"), nullable=False)
@@ -120,15 +132,16 @@ class Issue(Base):
     workshop = relationship("Workshop", back_populates="issues")
     activity = relationship("Activity", back_populates="issues")
     role = relationship("Role")
-    role = relationship("Role", back_populates="issues")
     actions = relationship("ActionItem", back_populates="issue")
 
 
 class ActionItem(Base):
     __tablename__ = "actions"
+    # at most one action per issue; NULL issue_id (manual actions) is not constrained
+    __table_args__ = (Index("ux_actions_issue", "issue_id", unique=True),)
 
     id = Column(Integer, primary_key=True, index=True)
-    workshop_id = Column(Integer, ForeignKey("workshops.id"), nullable=False)
+    workshop_id = Column(Integer, ForeignKey("workshops.id"), nullable=False, index=True)
     issue_id = Column(Integer, ForeignKey("issues.id"), nullable=True)
     summary = Column(String, nullable=False)
     owner_role_id = Column(Integer, ForeignKey("roles.id"), nullable=True)
@@ -140,3 +153,63 @@ class ActionItem(Base):
     workshop = relationship("Workshop", back_populates="actions")
     issue = relationship("Issue", back_populates="actions")
     owner_role = relationship("Role", back_populates="owned_actions")
+
+
+class ValidationState(Base):
+    """Marks a workshop whose issues reflect a full validation run at ``overload_threshold``."""
+
+    __tablename__ = "validation_state"
+
+    workshop_id = Column(Integer, ForeignKey("workshops.id"), primary_key=True)
+    overload_threshold = Column(Integer, nullable=False)
+
+
+class ValidationDirtyKey(Base):
+    """An activity or role whose issues are stale because a cell changed since the last validation."""
+
+    __tablename__ = "validation_dirty"
+    __table_args__ = (Index("ux_validation_dirty_key", "workshop_id", "kind", "key_id", unique=True),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    workshop_id = Column(Integer, ForeignKey("workshops.id"), nullable=False)
+    kind = Column(String, nullable=False)
+    key_id = Column(Integer, nullable=False)
+
+
+class RoleLoadSummary(Base):
+    """Per-workshop, per-role RACI counts kept current on every cell write."""
+
+    __tablename__ = "role_load_summary"
+
+    workshop_id = Column(Integer, ForeignKey("workshops.id"), primary_key=True)
+    role_id = Column(Integer, ForeignKey("roles.id"), primary_key=True)
+    count_r = Column(Integer, nullable=False, default=0)
+    count_a = Column(Integer, nullable=False, default=0)
+    count_c = Column(Integer, nullable=False, default=0)
+    count_i = Column(Integer, nullable=False, default=0)
+    count_none = Column(Integer, nullable=False, default=0)
+    # activity of the role's most recently created cell
+    last_activity_id = Column(Integer, ForeignKey("activities.id"), nullable=True)
+
+
+class TableVersion(Base):
+    """Write counter of a table whose GET list endpoint derives its ETag from it."""
+
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class WorkshopChange(Base):
+    """One write to a workshop cell, issue or action; ``seq`` orders the workshop's change feed."""
+
+    __tablename__ = "workshop_changes"
+    # AUTOINCREMENT so a sequence number is never reused once the log is trimmed
+    __table_args__ = (Index("ix_workshop_changes_workshop_seq", "workshop_id", "seq"), {"sqlite_autoincrement": True})
+
+    seq = Column(Integer, primary_key=True)
+    workshop_id = Column(Integer, ForeignKey("workshops.id"), nullable=False)
+    # "raci", "issue" or "action"
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
@@ -0,0 +1,244 @@
+"""Validate every workshop of an organization in parallel and roll the results up.
+
+Workshops are spread over a pool of spawned processes, one task per workshop,
+and each worker validates with its own session on the ``app.database`` engine,
+so the rule evaluation of different workshops runs on separate cores. Workers return
+only compact counts (issues by type and severity, per-role R/A load) and the
+parent merges them into one organization-level rollup. Issue writes still go
+through the database's single writer; SQLite's busy timeout queues them.
+
+Run from the shell with ``python -m app.portfolio <organization_id>``, or
+through ``POST /organizations/{id}/validate``, which starts a ``PortfolioRun``
+in the background and reports its progress.
+"""
+import os
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional
+
+from . import crud, database, services
+
+MAX_WORKERS = int(os.getenv("RACI_PORTFOLIO_WORKERS", "0")) or (os.cpu_count() or 1)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+Progress = Callable[[int, int], None]
+
+
+def validate_for_portfolio(workshop_id: int, overload_threshold: int = 10, full: bool = False) -> Dict:
+    """Validate one workshop in its own session and return the counts the rollup needs."""
+    with database.get_session() as db:
+        result = services.validate_workshop(db, workshop_id, overload_threshold, full=full)
+        issues = crud.count_issues(db, workshop_id)
+    return {"workshop_id": workshop_id, "issues": issues, "roles": result["stats"]["roles"]}
+
+
+def rollup(organization_id: int, results: List[Dict], errors: Dict[int, str], overload_threshold: int = 10) -> Dict:
+    """Merge per-workshop results into issue totals and cross-workshop role load."""
+    by_type: Counter = Counter()
+    by_severity: Counter = Counter()
+    per_workshop = []
+    loads: Dict[int, Counter] = defaultdict(Counter)
+    for result in sorted(results, key=lambda result: result["workshop_id"]):
+        total = 0
+        for issue_type, severity, count in result["issues"]:
+            by_type[issue_type] += count
+            by_severity[severity or "Unspecified"] += count
+            total += count
+        per_workshop.append({"workshop_id": result["workshop_id"], "issues": total})
+        for role_id, counts in result["roles"].items():
+            load = loads[int(role_id)]
+            responsible, accountable = counts.get("R", 0), counts.get("A", 0)
+            load["R"] += responsible
+            load["A"] += accountable
+            load["workshops"] += 1
+            if responsible + accountable > overload_threshold:
+                load["overloaded_workshops"] += 1
+    role_load = [
+        {
+            "role_id": role_id,
+            "responsible": load["R"],
+            "accountable": load["A"],
+            "total": load["R"] + load["A"],
+            "workshops": load["workshops"],
+            "overloaded_workshops": load["overloaded_workshops"],
+        }
+        for role_id, load in loads.items()
+    ]
+    role_load.sort(key=lambda row: (-row["overloaded_workshops"], -row["total"], row["role_id"]))
+    return {
+        "organization_id": organization_id,
+        "workshops": len(results) + len(errors),
+        "validated": len(results),
+        "errors": [{"workshop_id": workshop_id, "error": error} for workshop_id, error in sorted(errors.items())],
+        "issues": sum(by_type.values()),
+        "issues_by_type": dict(by_type.most_common()),
+        "issues_by_severity": dict(by_severity.most_common()),
+        "per_workshop": per_workshop,
+        "role_load": role_load,
+        "overloaded_roles": [row["role_id"] for row in role_load if row["overloaded_workshops"]],
+    }
+
+
+def validate_portfolio(
+    organization_id: int,
+    overload_threshold: int = 10,
+    full: bool = False,
+    workers: Optional[int] = None,
+    progress: Optional[Progress] = None,
+    executor_factory: Optional[Callable[[int], Executor]] = None,
+) -> Dict:
+    """Validate all of the organization's workshops and return the rollup.
+
+    With one worker (or one workshop, or an in-memory database) everything runs
+    in this process; otherwise the workshops are split across ``workers``
+    processes. ``progress`` is called
+    with (completed, total) after each workshop.
+    """
+    started = time.perf_counter()
+    with database.get_session() as db:
+        workshop_ids = crud.list_workshop_ids(db, organization_id)
+    total = len(workshop_ids)
+    workers = max(1, min(workers or MAX_WORKERS, total or 1))
+    if database._is_memory(database.DATABASE_URL):
+        workers = 1  # another process would open an empty database of its own
+    results: List[Dict] = []
+    errors: Dict[int, str] = {}
+    if progress:
+        progress(0, total)
+
+    def record(workshop_id: int, run: Callable[[], Dict]):
+        try:
+            results.append(run())
+        except Exception as exc:  # reported in the rollup; the other workshops still count
+            errors[workshop_id] = f"{type(exc).__name__}: {exc}"
+        if progress:
+            progress(len(results) + len(errors), total)
+
+    if workers == 1 and executor_factory is None:
+        for workshop_id in workshop_ids:
+            record(workshop_id, lambda: validate_for_portfolio(workshop_id, overload_threshold, full))
+    else:
+        # spawn, not fork: this runs in a thread of the server, and a fork could copy a lock another thread holds
+        factory = executor_factory or (lambda count: ProcessPoolExecutor(max_workers=count, mp_context=get_context("spawn")))
+        with factory(workers) as executor:
+            futures = {
+                executor.submit(validate_for_portfolio, workshop_id, overload_threshold, full): workshop_id
+                for workshop_id in workshop_ids
+            }
+            for future in as_completed(futures):
+                record(futures[future], future.result)
+
+    summary = rollup(organization_id, results, errors, overload_threshold)
+    summary["elapsed_ms"] = (time.perf_counter() - started) * 1000
+    return summary
+
+
+@dataclass
+class PortfolioRun:
+    id: str
+    organization_id: int
+    status: str = QUEUED
+    total: int = 0
+    completed: int = 0
+    rollup: Optional[Dict] = None
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "organization_id": self.organization_id,
+            "status": self.status,
+            "total": self.total,
+            "completed": self.completed,
+            "error": self.error,
+            "rollup": self.rollup,
+        }
+
+
+class PortfolioRunner:
+    """Background portfolio runs, one at a time per organization."""
+
+    def __init__(self, workers: Optional[int] = None, max_runs: int = 100):
+        self.workers = workers
+        self._runs: Dict[str, PortfolioRun] = {}
+        self._max_runs = max_runs
+        self._lock = threading.Lock()
+
+    def start(self, organization_id: int, overload_threshold: int = 10, full: bool = False) -> PortfolioRun:
+        """Start validating the organization, or return its run that is still in progress."""
+        with self._lock:
+            for run in self._runs.values():
+                if run.organization_id == organization_id and run.status in (QUEUED, RUNNING):
+                    return run
+            run = PortfolioRun(id=uuid.uuid4().hex, organization_id=organization_id)
+            self._remember(run)
+        thread = threading.Thread(
+            target=self._execute, args=(run, overload_threshold, full), name=f"portfolio-{organization_id}", daemon=True
+        )
+        thread.start()
+        return run
+
+    def get(self, run_id: str) -> Optional[PortfolioRun]:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def _execute(self, run: PortfolioRun, overload_threshold: int, full: bool):
+        def progress(completed: int, total: int):
+            run.status, run.completed, run.total = RUNNING, completed, total
+
+        try:
+            run.rollup = validate_portfolio(run.organization_id, overload_threshold, full, self.workers, progress)
+            run.status = DONE
+        except Exception as exc:  # surfaced to the poller as the run error
+            run.error = f"{type(exc).__name__}: {exc}"
+            run.status = FAILED
+        finally:
+            run.finished_at = time.time()
+
+    def _remember(self, run: PortfolioRun):
+        self._runs[run.id] = run
+        # forget the oldest finished runs
+        for stale_id in [key for key, stale in self._runs.items() if stale.status in (DONE, FAILED)]:
+            if len(self._runs) <= self._max_runs:
+                break
+            del self._runs[stale_id]
+
+
+runner = PortfolioRunner()
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse
+    import json
+    import sys
+
+    parser = argparse.ArgumentParser(description="Validate every workshop of an organization and print the rollup")
+    parser.add_argument("organization_id", type=int)
+    parser.add_argument("--workers", type=int, default=None, help=f"worker processes (default {MAX_WORKERS})")
+    parser.add_argument("--overload-threshold", type=int, default=10)
+    parser.add_argument("--full", action="store_true", help="re-check every activity instead of only changed ones")
+    args = parser.parse_args(argv)
+
+    def progress(completed: int, total: int):
+        print(f"validated {completed}/{total} workshops", file=sys.stderr)
+
+    database.init_db()
+    summary = validate_portfolio(args.organization_id, args.overload_threshold, args.full, args.workers, progress)
+    print(json.dumps(summary, indent=2))
+    if summary["errors"]:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
 from datetime import date
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, validator
 
 RACI_REGEX = "^[RACI]$|^None$|^$"
 
@@ -97,6 +97,7 @@ class WorkshopCreate(BaseModel):
 
 class Workshop(WorkshopCreate):
     id: int
+    revision: int = 0
 
     class Config:
         orm_mode = True
@@ -117,6 +118,45 @@ class WorkshopRACI(WorkshopRACICreate):
         orm_mode = True
 
 
+class WorkshopRACICell(BaseModel):
+    activity_id: int
+    role_id: int
+    value: Optional[str] = Field(None, regex=RACI_REGEX)
+    source: Optional[str] = "workshop"
+
+
+class WorkshopRACIBulkUpsert(BaseModel):
+    """Cell changes for one workshop, as a list of cells and/or a sparse activity -> role -> value matrix."""
+
+    workshop_id: int
+    cells: List[WorkshopRACICell] = []
+    matrix: Dict[int, Dict[int, Optional[str]]] = {}
+    source: Optional[str] = "workshop"
+
+    @validator("matrix")
+    def check_matrix_values(cls, matrix):
+        for row in matrix.values():
+            for value in row.values():
+                if value not in (None, "", "None") and value not in ("R", "A", "C", "I"):
+                    raise ValueError(f"Invalid RACI value {value!r}")
+        return matrix
+
+    def cell_rows(self) -> List[dict]:
+        rows = [{"workshop_id": self.workshop_id, **cell.dict()} for cell in self.cells]
+        for activity_id, row in self.matrix.items():
+            for role_id, value in row.items():
+                rows.append(
+                    {
+                        "workshop_id": self.workshop_id,
+                        "activity_id": activity_id,
+                        "role_id": role_id,
+                        "value": value,
+                        "source": self.source,
+                    }
+                )
+        return rows
+
+
 class IssueCreate(BaseModel):
     workshop_id: int
     activity_id: int
@@ -162,6 +202,93 @@ class ValidationResult(BaseModel):
     stats: ValidationStats
 
 
+class RuleStats(BaseModel):
+    name: str
+    organization_id: Optional[int] = None
+    calls: int
+    findings: int
+    seconds: float
+
+
+class PortfolioRoleLoad(BaseModel):
+    role_id: int
+    responsible: int
+    accountable: int
+    total: int
+    workshops: int
+    overloaded_workshops: int
+
+
+class PortfolioError(BaseModel):
+    workshop_id: int
+    error: str
+
+
+class PortfolioWorkshop(BaseModel):
+    workshop_id: int
+    issues: int
+
+
+class PortfolioRollup(BaseModel):
+    organization_id: int
+    workshops: int
+    validated: int
+    errors: List[PortfolioError] = []
+    issues: int
+    issues_by_type: Dict[str, int]
+    issues_by_severity: Dict[str, int]
+    per_workshop: List[PortfolioWorkshop]
+    role_load: List[PortfolioRoleLoad]
+    overloaded_roles: List[int]
+    elapsed_ms: float
+
+
+class PortfolioRun(BaseModel):
+    id: str
+    organization_id: int
+    status: str
+    total: int
+    completed: int
+    error: Optional[str] = None
+    rollup: Optional[PortfolioRollup] = None
+
+
+class DeviationCell(BaseModel):
+    activity_id: int
+    role_id: int
+    recommended: Optional[str] = None
+    actual: Optional[str] = None
+
+
+class DomainDeviationRate(BaseModel):
+    domain_id: int
+    recommended_cells: int
+    deviations: int
+    deviation_rate: float
+
+
+class DeviationReport(BaseModel):
+    recommended_cells: int
+    deviations: List[DeviationCell]
+    domains: List[DomainDeviationRate]
+
+
+class WorkshopChange(BaseModel):
+    seq: int
+    entity: str
+    id: int
+    # "upsert" carries the entity's current row in ``data``; "delete" has no data
+    op: str
+    data: Optional[dict] = None
+
+
+class ChangeFeed(BaseModel):
+    workshop_id: int
+    changes: List[WorkshopChange]
+    last_seq: int
+    has_more: bool
+
+
 class RACIExportRow(BaseModel):
     activity_id: int
     activity_name: str
@@ -6,7 +6,7 @@ from typing import Optional
 
 from app.database import init_db, SessionLocal
 from app.schemas import ImportPayload
-from app.main import import_template
+from app.services import import_payload
 
 DEFAULT_DATASET = Path(__file__).resolve().parent.parent / "examples" / "seattle_city_light_import.json"
 
@@ -16,8 +16,7 @@ def seed_from_payload(payload_path: Path):
     with SessionLocal() as session:
         data = json.loads(payload_path.read_text())
         payload = ImportPayload(**data)
-        import_template(payload, db=session)
-        session.commit()
+        import_payload(session, payload)
     return payload.organization.name
 
 
@@ -1,168 +1,282 @@
+import time
 from collections import Counter, defaultdict
-from typing import Dict, List
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
 
+from backend.services.rules import ROLE, CompiledRules, Finding, registry as rule_registry
+
 from . import crud, models
+from .matrix import Cell, Deviation, RaciMatrix, compare_cells
 
 RACI_VALUES = {None, "R", "A", "C", "I"}
+# built-in rules a workshop is validated against; organization rules in the registry run as well
+VALIDATION_RULES = ("exactly_one_A", "at_least_one_R", "deviation", "overload")
 
 
-def validate_workshop(db: Session, workshop_id: int, overload_threshold: int = 10):
-    crud.delete_issues(db, workshop_id)
-    issues: List[models.Issue] = []
+def validate_workshop(db: Session, workshop_id: int, overload_threshold: int = 10, full: bool = False):
+    """Validate a workshop, re-checking only activities/roles written since the last run when possible.
+
+    A full run happens when ``full`` is set, the workshop has not been fully validated yet,
+    or the threshold changed. New activities and recommendations are marked dirty like cell
+    writes. Run with ``full`` after changing an organization's rules so every activity is
+    checked against them.
+    """
+    workshop = db.get(models.Workshop, workshop_id)
+    rules = rule_registry.compile(
+        VALIDATION_RULES, workshop.organization_id if workshop else None, overload_threshold=overload_threshold
+    )
+    state = crud.get_validation_state(db, workshop_id)
+    if full or state is None or state.overload_threshold != overload_threshold:
+        return _validate_full(db, rules, workshop_id, overload_threshold)
+    activity_ids, role_ids = crud.claim_dirty_keys(db, workshop_id)
+    try:
+        return _validate_incremental(db, rules, workshop_id, activity_ids, role_ids)
+    except Exception:
+        # the claimed keys are gone, so make the next run rebuild everything
+        db.rollback()
+        crud.reset_validation_state(db, workshop_id)
+        raise
+
+
+def _validate_full(db: Session, rules: CompiledRules, workshop_id: int, overload_threshold: int):
+    crud.reset_validation_state(db, workshop_id)
+    crud.claim_dirty_keys(db, workshop_id)
     activities = crud.get_activities_for_workshop(db, workshop_id)
-    for activity in activities:
-        assignments = crud.get_activity_assignments(db, workshop_id, activity.id)
-        issue_payloads = _identify_activity_issues(db, workshop_id, activity, assignments)
-        for payload in issue_payloads:
-            issues.append(crud.add_issue(db, payload))
-    role_overload = _detect_role_overload(db, workshop_id, overload_threshold)
-    issues.extend(role_overload)
+    cells = list(crud.iter_workshop_cells(db, workshop_id))
+    recommended = crud.list_recommended_cells(db, workshop_id)
+
+    payloads = _activity_issue_payloads(rules, workshop_id, activities, cells, recommended)
+    crud.refresh_role_load_summary(db, workshop_id)
     stats = _build_role_load_stats(db, workshop_id)
+    payloads.extend(_detect_role_overload(rules, workshop_id, stats))
+    issues = crud.replace_issues(db, workshop_id, payloads)
+    crud.set_validation_state(db, workshop_id, overload_threshold)
     return {"created_issues": issues, "stats": stats}
 
 
-def _identify_activity_issues(db: Session, workshop_id: int, activity: models.Activity, assignments: List[models.WorkshopRACI]):
-from . import crud, models
+def _validate_incremental(db: Session, rules: CompiledRules, workshop_id: int, activity_ids, role_ids):
+    issues: List[models.Issue] = []
+    if activity_ids or role_ids:
+        activities = crud.get_activities_by_ids(db, workshop_id, activity_ids)
+        cells = crud.list_workshop_raci_for_keys(db, workshop_id, activity_ids=activity_ids)
+        recommended = crud.list_recommended_cells(db, workshop_id, [activity.id for activity in activities])
 
+        payloads = _activity_issue_payloads(rules, workshop_id, activities, cells, recommended)
+        role_stats = _build_role_load_stats(db, workshop_id, role_ids=role_ids)
+        payloads.extend(_detect_role_overload(rules, workshop_id, role_stats))
+        issues = crud.replace_issues_for_keys(db, workshop_id, activity_ids, role_ids, payloads, rules.kinds(ROLE))
+    return {"created_issues": issues, "stats": _build_role_load_stats(db, workshop_id)}
 
-RACI_VALUES = {None, "R", "A", "C", "I"}
 
+def _activity_issue_payloads(
+    rules: CompiledRules,
+    workshop_id: int,
+    activities: List[models.Activity],
+    cells: Sequence[Cell],
+    recommended: Sequence[Cell],
+) -> List[dict]:
+    """Activity rule payloads from one RaciMatrix of ``cells``: per-row counts and deviations feed one rule pass."""
+    matrix = RaciMatrix.from_cells(cells, [activity.id for activity in activities])
+    deviations: Dict[int, List[Deviation]] = defaultdict(list)
+    for deviation in compare_cells(matrix, recommended):
+        deviations[deviation[0]].append(deviation)
+    wanted = {activity.id for activity in activities}
+    findings = rules.evaluate_activities(
+        (activity_id, counts, deviations.get(activity_id))
+        for activity_id, counts in matrix.counts_per_activity()
+        if activity_id in wanted
+    )
+    return _finding_payloads(workshop_id, findings)
 
-def validate_workshop(workshop_id: int):
-    issues: List[models.Issue] = []
-    activities = crud.get_activities_for_workshop(workshop_id)
-    for activity in activities:
-        assignments = crud.get_activity_assignments(workshop_id, activity.id)
-        issue_payloads = _identify_activity_issues(workshop_id, activity, assignments)
-        for payload in issue_payloads:
-            issue = crud.add_issue(payload)
-            issues.append(issue)
-    stats = _build_role_load_stats(workshop_id)
-    return {"created_issues": issues, "stats": stats}
 
+def _finding_payloads(workshop_id: int, findings: List[Finding]) -> List[dict]:
+    return [
+        {
+            "workshop_id": workshop_id,
+            "activity_id": finding.activity_id,
+            "role_id": finding.role_id,
+            "type": finding.kind,
+            "severity": finding.severity,
+            "notes": finding.notes,
+        }
+        for finding in findings
+    ]
 
-def _identify_activity_issues(workshop_id: int, activity: models.Activity, assignments: List[models.WorkshopRACI]):
-    payloads = []
-    values = defaultdict(list)
-    for assignment in assignments:
-        if assignment.value not in RACI_VALUES:
-            continue
-        values[assignment.value].append(assignment)
-    if len(values.get("A", [])) == 0:
-        payloads.append(
-            {
-                "workshop_id": workshop_id,
-                "activity_id": activity.id,
-                "role_id": None,
-                "type": "missing_A",
-                "severity": "High",
-                "notes": "No accountable role selected",
-            }
-        )
-    if len(values.get("A", [])) > 1:
-        payloads.append(
-            {
-                "workshop_id": workshop_id,
-                "activity_id": activity.id,
-                "role_id": None,
-                "type": "multiple_A",
-                "severity": "High",
-                "notes": "More than one accountable role selected",
-            }
-        )
-    if len(values.get("R", [])) == 0:
-        payloads.append(
+
+def deviation_report(db: Session, workshop_id: int) -> Dict:
+    """Every cell that differs from the recommended RACI, plus per-domain deviation rates."""
+    activities = crud.get_activities_for_workshop(db, workshop_id)
+    matrix = RaciMatrix.from_cells(crud.iter_workshop_cells(db, workshop_id), sorted(activity.id for activity in activities))
+    recommended = crud.list_recommended_cells(db, workshop_id)
+    deviations = compare_cells(matrix, recommended)
+
+    domain_of = {activity.id: activity.domain_id for activity in activities}
+    recommended_per_domain = Counter(domain_of[activity_id] for activity_id, _, _ in recommended)
+    deviations_per_domain = Counter(domain_of[deviation[0]] for deviation in deviations)
+    return {
+        "recommended_cells": len(recommended),
+        "deviations": [
+            {"activity_id": activity_id, "role_id": role_id, "recommended": expected, "actual": actual}
+            for activity_id, role_id, expected, actual in deviations
+        ],
+        "domains": [
             {
-                "workshop_id": workshop_id,
-                "activity_id": activity.id,
-                "role_id": None,
-                "type": "no_R",
-                "severity": "Medium",
-                "notes": "No responsible role selected",
+                "domain_id": domain_id,
+                "recommended_cells": total,
+                "deviations": deviations_per_domain[domain_id],
+                "deviation_rate": deviations_per_domain[domain_id] / total,
             }
-        )
-    payloads.extend(_detect_deviation_from_recommended(db, workshop_id, activity, assignments))
-    return payloads
+            for domain_id, total in sorted(recommended_per_domain.items())
+        ],
+    }
 
 
-def _detect_deviation_from_recommended(db: Session, workshop_id: int, activity: models.Activity, assignments: List[models.WorkshopRACI]):
-    payloads = []
-    recommended = crud.load_recommended_for_activity(db, activity.id)
-    if not recommended:
-        return payloads
-    assignment_map = {(a.role_id, a.activity_id): a.value for a in assignments}
-    for rec in recommended:
-        actual = assignment_map.get((rec.role_id, rec.activity_id))
-        if rec.value != actual:
-            payloads.append(
-                {
-                    "workshop_id": workshop_id,
-                    "activity_id": activity.id,
-                    "role_id": rec.role_id,
-                    "type": "deviation_from_recommended",
-                    "severity": "Low",
-                    "notes": f"Recommended {rec.value or 'None'} differs from actual {actual or 'None'}",
-                }
-            )
-    return payloads
+def _detect_role_overload(rules: CompiledRules, workshop_id: int, stats: Dict) -> List[dict]:
+    role_activity_map = stats["role_activity_map"]
+    findings = rules.evaluate_roles(
+        (int(role_id), counts, role_activity_map.get(int(role_id), 0)) for role_id, counts in stats["roles"].items()
+    )
+    return _finding_payloads(workshop_id, findings)
 
 
-def _detect_role_overload(db: Session, workshop_id: int, threshold: int) -> List[models.Issue]:
+def role_load_stats(db: Session, workshop_id: int) -> Dict:
     stats = _build_role_load_stats(db, workshop_id)
-    issues: List[models.Issue] = []
-    for role_id, counts in stats["roles"].items():
-        total = counts.get("R", 0) + counts.get("A", 0)
-        if total > threshold:
-            payload = {
-                "workshop_id": workshop_id,
-                "activity_id": stats["role_activity_map"].get(int(role_id), 0),
-                "role_id": int(role_id),
-                "type": "role_overload",
-                "severity": "Medium",
-                "notes": f"Role has {total} R/A assignments exceeding threshold {threshold}",
-            }
-            issues.append(crud.add_issue(db, payload))
-    return issues
+    db.commit()  # keep a backfilled summary
+    return stats
 
 
-def _build_role_load_stats(db: Session, workshop_id: int) -> Dict:
-    stats: Dict[int, Counter] = defaultdict(Counter)
+def _build_role_load_stats(db: Session, workshop_id: int, role_ids=None) -> Dict:
+    roles: Dict[str, Dict[str, int]] = {}
     role_activity_map: Dict[int, int] = {}
-    assignments = crud.list_workshop_raci(db, workshop_id)
-    for assignment in assignments:
-        stats[assignment.role_id][assignment.value or "None"] += 1
-        role_activity_map[assignment.role_id] = assignment.activity_id
-    summary = {
-        "roles": {str(role_id): dict(counter) for role_id, counter in stats.items()},
-        "role_activity_map": role_activity_map,
-        "total_assignments": len(assignments),
+    total = 0
+    for row in crud.list_role_load(db, workshop_id, role_ids=role_ids):
+        counts = {value: getattr(row, column) for value, column in crud.ROLE_LOAD_COLUMNS.items() if getattr(row, column)}
+        if not counts:
+            continue
+        roles[str(row.role_id)] = counts
+        role_activity_map[row.role_id] = row.last_activity_id
+        total += sum(counts.values())
+    return {"roles": roles, "role_activity_map": role_activity_map, "total_assignments": total}
+
+
+def change_feed(db: Session, workshop_id: int, since: Optional[int] = None, limit: int = 1000) -> Dict:
+    """Cell, issue and action changes after ``since`` for live clients.
+
+    Without ``since`` only the current ``last_seq`` is returned, which a client
+    takes before its initial full fetch and then polls from.
+    """
+    if since is None:
+        return {"workshop_id": workshop_id, "changes": [], "last_seq": crud.latest_change_seq(db, workshop_id), "has_more": False}
+    changes, last_seq, has_more = crud.list_changes(db, workshop_id, since, limit)
+    return {
+        "workshop_id": workshop_id,
+        "changes": [
+            {
+                "seq": seq,
+                "entity": entity,
+                "id": entity_id,
+                "op": "delete" if row is None else "upsert",
+                "data": None if row is None else {column.key: getattr(row, column.key) for column in row.__table__.columns},
+            }
+            for seq, entity, entity_id, row in changes
+        ],
+        "last_seq": last_seq,
+        "has_more": has_more,
     }
-    return summary
 
 
 def generate_actions_from_issues(db: Session, workshop_id: int) -> List[models.ActionItem]:
-    issues = crud.list_issues(db, workshop_id)
-    actions: List[models.ActionItem] = []
-    for issue in issues:
-        existing = crud.find_action_for_issue(db, issue.id)
-        if existing:
-            actions.append(existing)
-            continue
-        summary = f"Resolve {issue.type} for activity {issue.activity_id}"
-        action = crud.add_action_item(
-            db,
+    """Ensure every issue has an action and return one action per issue, in issue order."""
+    crud.add_actions_for_unactioned_issues(db, workshop_id)
+    return crud.list_issue_actions(db, workshop_id)
+
+
+class ImportValidationError(ValueError):
+    """An import payload references a domain, activity or role it does not define."""
+
+
+def _insert_returning_ids(db: Session, model, rows: List[dict]) -> List[int]:
+    if not rows:
+        return []
+    table = model.__table__
+    return list(db.scalars(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows))
+
+
+def import_payload(db: Session, payload) -> Tuple[models.Organization, Dict[str, float]]:
+    """Import an organization template in one transaction with one multi-row insert per entity type.
+
+    The whole payload is checked before anything is written. Returns the organization and the
+    elapsed milliseconds of each stage.
+    """
+    timings: Dict[str, float] = {}
+    started = time.perf_counter()
+
+    def lap(stage: str):
+        nonlocal started
+        now = time.perf_counter()
+        timings[stage] = round((now - started) * 1000, 3)
+        started = now
+
+    domains = [item.dict() for item in payload.domains]
+    roles = [item.dict() for item in payload.roles]
+    activities = [item.dict() for item in payload.activities]
+    recommended = [item.dict() for item in payload.recommended or []]
+    domain_names = {d["name"] for d in domains}
+    for activity in activities:
+        if activity["domain"] not in domain_names:
+            raise ImportValidationError(f"Domain '{activity['domain']}' missing for activity '{activity['name']}'")
+    activity_names = {a["name"] for a in activities}
+    role_names = {r["name"] for r in roles}
+    for rec in recommended:
+        if rec["activity_name"] not in activity_names or rec["role_name"] not in role_names:
+            raise ImportValidationError(f"Invalid recommendation reference {rec['activity_name']}/{rec['role_name']}")
+    lap("validate")
+
+    try:
+        organization = models.Organization(**payload.organization.dict())
+        db.add(organization)
+        db.flush()
+        lap("organization")
+
+        domain_ids = _insert_returning_ids(db, models.Domain, [{**d, "organization_id": organization.id} for d in domains])
+        domain_map = dict(zip((d["name"] for d in domains), domain_ids))
+        lap("domains")
+
+        role_ids = _insert_returning_ids(db, models.Role, [{**r, "organization_id": organization.id} for r in roles])
+        role_map = dict(zip((r["name"] for r in roles), role_ids))
+        lap("roles")
+
+        activity_rows = [
             {
-                "workshop_id": workshop_id,
-                "issue_id": issue.id,
-                "summary": summary,
-                "status": "planned",
-                "owner_role_id": None,
-                "owner_name": None,
-                "priority": None,
-                "due_date": None,
-            },
-        )
-        actions.append(action)
-    return actions
+                "name": a["name"],
+                "description": a.get("description"),
+                "code": a.get("code"),
+                "criticality": a.get("criticality"),
+                "framework_refs": a.get("framework_refs"),
+                "domain_id": domain_map[a["domain"]],
+            }
+            for a in activities
+        ]
+        activity_map = dict(zip((a["name"] for a in activities), _insert_returning_ids(db, models.Activity, activity_rows)))
+        lap("activities")
+
+        if recommended:
+            db.execute(
+                insert(models.RecommendedRACI.__table__),
+                [
+                    {"activity_id": activity_map[rec["activity_name"]], "role_id": role_map[rec["role_name"]], "value": rec.get("value")}
+                    for rec in recommended
+                ],
+            )
+        lap("recommended")
+
+        crud.bump_table_versions(db, models.Organization, models.Domain, models.Role, models.Activity)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    db.refresh(organization)
+    lap("commit")
+    return organization, timings
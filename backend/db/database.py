@@ -1,9 +1,11 @@
 import os
 from pathlib import Path
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 from sqlalchemy.pool import StaticPool
 
+from common.sqlite import apply_sqlite_profile
+
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 DATA_DIR = BASE_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
@@ -13,6 +15,10 @@ _engine = None
 SessionLocal = None
 
 
+class WorkshopSession(Session):
+    """Session for the backend models; ``models`` bumps workshop revisions before each of its flushes."""
+
+
 def resolve_database_url() -> str:
     return os.getenv("RACI_DATABASE_URL", f"sqlite:///{DATA_DIR / 'raci_workshop.db'}")
 
@@ -24,7 +30,9 @@ def get_engine():
         connect_args = {"check_same_thread": False} if db_url.startswith("sqlite") else {}
         pool = StaticPool if db_url in {"sqlite://", "sqlite:///:memory:"} else None
         _engine = create_engine(db_url, connect_args=connect_args, poolclass=pool)
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=_engine)
+        if db_url.startswith("sqlite"):
+            apply_sqlite_profile(_engine, os.getenv("RACI_SQLITE_PROFILE", "production"))
+        SessionLocal = sessionmaker(class_=WorkshopSession, autocommit=False, autoflush=False, bind=_engine)
     return _engine
 
 
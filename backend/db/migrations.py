@@ -0,0 +1,28 @@
+"""Bring an existing backend database up to the current column and index layout.
+
+``Base.metadata.create_all`` only creates missing tables, so a database file
+created before a column or index was added to ``backend.db.models`` never gets
+it. ``upgrade`` adds whatever columns and indexes are missing. It runs from the
+API's startup hook and can also be run by hand:
+
+    python -m backend.db.migrations
+"""
+from typing import List, Optional
+
+from sqlalchemy.engine import Engine
+
+from common import schema
+
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+from .database import Base, get_engine
+
+
+def upgrade(engine: Optional[Engine] = None) -> List[str]:
+    """Add missing columns and indexes and return their names."""
+    return schema.upgrade(engine or get_engine(), Base.metadata)
+
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=get_engine())
+    created = upgrade()
+    print(f"Created {len(created)} column(s)/index(es): {', '.join(created)}" if created else "Schema already up to date")
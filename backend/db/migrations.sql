@@ -14,9 +14,12 @@ CREATE TABLE IF NOT EXISTS workshops (
     workshop_name TEXT NOT NULL,
     status TEXT,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    revision INTEGER NOT NULL DEFAULT 0
 );
 
+-- older databases get columns and indexes added since by backend.db.migrations.upgrade on startup
+
 CREATE TABLE IF NOT EXISTS domains (
     id INTEGER PRIMARY KEY,
     workshop_id INTEGER NOT NULL REFERENCES workshops(id),
@@ -82,3 +85,16 @@ CREATE TABLE IF NOT EXISTS exports (
     filepath TEXT NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    workshop_id INTEGER NOT NULL REFERENCES workshops(id),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    revision INTEGER,
+    kind TEXT,
+    base_id INTEGER REFERENCES snapshots(id),
+    payload BLOB,
+    blob_json JSON NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_snapshots_workshop_id ON snapshots (workshop_id, id);
@@ -1,8 +1,9 @@
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, JSON, String, Boolean, Text
+from itertools import chain
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, JSON, LargeBinary, String, Boolean, Text, event
 from sqlalchemy.orm import relationship
 
-from .database import Base
+from .database import Base, WorkshopSession
 
 
 class Template(Base):
@@ -28,6 +29,8 @@ class Workshop(Base):
     status = Column(String, default="draft")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # bumped on every write to the workshop or its content; keys cached exports
+    revision = Column(Integer, nullable=False, default=0, server_default="0")
 
     template = relationship("Template", back_populates="workshops")
     domains = relationship("Domain", back_populates="workshop", cascade="all, delete-orphan")
@@ -169,10 +172,18 @@ class DecisionLog(Base):
 
 class Snapshot(Base):
     __tablename__ = "snapshots"
+    __table_args__ = (Index("ix_snapshots_workshop_id", "workshop_id", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     workshop_id = Column(Integer, ForeignKey("workshops.id"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    # workshop revision the snapshot captured
+    revision = Column(Integer, nullable=True)
+    # "base" holds every cell, "delta" only the cells changed since the previous snapshot
+    kind = Column(String, nullable=True)
+    base_id = Column(Integer, ForeignKey("snapshots.id"), nullable=True)
+    # zlib-compressed cells, see backend.services.snapshots
+    payload = Column(LargeBinary, nullable=True)
     blob_json = Column(JSON, nullable=False)
 
     workshop = relationship("Workshop")
@@ -188,3 +199,28 @@ class Export(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     workshop = relationship("Workshop")
+
+
+# rows whose changes alter what a workshop export renders
+REVISIONED_MODELS = (Domain, Role, Activity, Assignment, Note, Issue, Action)
+
+
+@event.listens_for(WorkshopSession, "before_flush")
+def _bump_workshop_revisions(session, flush_context, instances):
+    workshop_ids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, REVISIONED_MODELS):
+            if obj in session.new or obj in session.deleted or session.is_modified(obj):
+                workshop_id = obj.workshop_id
+                if workshop_id is None and getattr(obj, "workshop", None) is not None:
+                    workshop_id = obj.workshop.id  # set through the relationship, not yet flushed
+                workshop_ids.add(workshop_id)
+        elif isinstance(obj, Workshop) and obj not in session.new and session.is_modified(obj):
+            workshop_ids.add(obj.id)
+    workshop_ids.discard(None)
+    with session.no_autoflush:
+        for workshop_id in workshop_ids:
+            workshop = session.get(Workshop, workshop_id)
+            if workshop is not None and workshop not in session.new:
+                # increment in SQL so concurrent writers never reuse a revision
+                workshop.revision = Workshop.revision + 1
@@ -1,10 +1,48 @@
 from io import BytesIO
 import json
-from fastapi import FastAPI, UploadFile, File
-from fastapi.responses import StreamingResponse
+from pathlib import Path
+from typing import List
+from fastapi import Depends, FastAPI, HTTPException, Request, UploadFile, File
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.orm import Session
+
+from .db import models
+from .db.database import Base, get_db, get_engine
+from .db.migrations import upgrade
+from .schemas import ExportJobIn, ExportJobOut, SnapshotDiff, SnapshotOut, SnapshotState
+from .services import export_jobs, snapshots
+from .services.scheduler import scheduler
 
 app = FastAPI(title="Alignment Workshop Engine API")
 
+EXPORT_MEDIA_TYPES = {
+    "excel": 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    "actions_csv": 'text/csv',
+    "pptx": 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    "pdf": 'application/pdf',
+}
+
+
+@app.on_event("startup")
+async def on_startup():
+    Base.metadata.create_all(bind=get_engine())
+    # create_all skips tables that already exist, so add columns and indexes introduced since
+    upgrade()
+    scheduler.start()
+
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await scheduler.stop()
+    export_jobs.default_queue.shutdown(wait=False)
+
+
+@app.middleware("http")
+async def defer_background_work(request: Request, call_next):
+    # the scheduler only starts background writes while no request is in flight
+    with scheduler.interactive():
+        return await call_next(request)
+
 
 @app.post('/api/template/parse')
 async def parse_template(file: UploadFile = File(...)):
@@ -30,6 +68,111 @@ async def export_pdf(payload: dict):
     return StreamingResponse(BytesIO(content), media_type='application/pdf', headers={'Content-Disposition': 'attachment; filename="summary.pdf"'})
 
 
+@app.post('/api/workshops/{workshop_id}/exports', response_model=ExportJobOut, status_code=202)
+def submit_export(workshop_id: int, payload: ExportJobIn, db: Session = Depends(get_db)):
+    """Queue a rendered export; identical requests for an unchanged workshop share one job."""
+    if db.get(models.Workshop, workshop_id) is None:
+        raise HTTPException(status_code=404, detail="Workshop not found")
+    try:
+        job = export_jobs.default_queue.submit(db, workshop_id, payload.export_type)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return job.to_dict()
+
+
+@app.get('/api/exports/{job_id}', response_model=ExportJobOut)
+def export_status(job_id: str, db: Session = Depends(get_db)):
+    job = export_jobs.default_queue.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job.to_dict()
+
+
+@app.get('/api/exports/{job_id}/download')
+def download_export(job_id: str, db: Session = Depends(get_db)):
+    job = export_jobs.default_queue.get(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job.status != export_jobs.DONE:
+        raise HTTPException(status_code=409, detail=f"Export job is {job.status}")
+    path = Path(job.filepath)
+    return FileResponse(path, media_type=EXPORT_MEDIA_TYPES[job.export_type], filename=path.name)
+
+
+def _snapshot_out(snapshot: models.Snapshot) -> dict:
+    meta = snapshot.blob_json
+    return {
+        "id": snapshot.id,
+        "workshop_id": snapshot.workshop_id,
+        "revision": snapshot.revision,
+        "kind": snapshot.kind,
+        "created_at": snapshot.created_at,
+        "cells": meta["cells"],
+        "changes": meta["changes"],
+        "stored_bytes": len(snapshot.payload),
+    }
+
+
+def _workshop_snapshot(db: Session, workshop_id: int, snapshot_id: int) -> models.Snapshot:
+    snapshot = db.get(models.Snapshot, snapshot_id)
+    if snapshot is None or snapshot.workshop_id != workshop_id:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    return snapshot
+
+
+@app.get('/api/workshops/{workshop_id}/snapshots', response_model=List[SnapshotOut])
+def list_snapshots(workshop_id: int, db: Session = Depends(get_db)):
+    return [_snapshot_out(snapshot) for snapshot in snapshots.list_snapshots(db, workshop_id)]
+
+
+@app.post('/api/workshops/{workshop_id}/snapshots', response_model=SnapshotOut, status_code=201)
+def create_snapshot(workshop_id: int, db: Session = Depends(get_db)):
+    try:
+        return _snapshot_out(snapshots.write_snapshot(db, workshop_id))
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Workshop not found")
+
+
+@app.get('/api/workshops/{workshop_id}/snapshots/diff', response_model=SnapshotDiff)
+def diff_snapshots(workshop_id: int, from_id: int, to_id: int, db: Session = Depends(get_db)):
+    """Cells that differ between two snapshots, rebuilt from the deltas between them where possible."""
+    older, newer = _workshop_snapshot(db, workshop_id, from_id), _workshop_snapshot(db, workshop_id, to_id)
+    changes = [
+        {"activity_id": activity_id, "role_id": role_id, "before": before, "after": after}
+        for activity_id, role_id, before, after in snapshots.diff_snapshots(db, older, newer)
+    ]
+    return {"workshop_id": workshop_id, "from_id": from_id, "to_id": to_id, "changes": changes}
+
+
+@app.get('/api/workshops/{workshop_id}/snapshots/{snapshot_id}', response_model=SnapshotState)
+def snapshot_state(workshop_id: int, snapshot_id: int, db: Session = Depends(get_db)):
+    return _snapshot_state(db, _workshop_snapshot(db, workshop_id, snapshot_id))
+
+
+@app.get('/api/workshops/{workshop_id}/revisions/{revision}', response_model=SnapshotState)
+def revision_state(workshop_id: int, revision: int, db: Session = Depends(get_db)):
+    """Cells as of the newest snapshot taken at or before ``revision``."""
+    snapshot = snapshots.snapshot_at_revision(db, workshop_id, revision)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No snapshot at or before this revision")
+    return _snapshot_state(db, snapshot)
+
+
+def _snapshot_state(db: Session, snapshot: models.Snapshot) -> dict:
+    cells = snapshots.cells_at(db, snapshot)
+    return {
+        "snapshot": _snapshot_out(snapshot),
+        "cells": [
+            {"activity_id": activity_id, "role_id": role_id, "value": value} for (activity_id, role_id), value in sorted(cells.items())
+        ],
+    }
+
+
+@app.get('/api/scheduler')
+async def scheduler_status():
+    return scheduler.status()
+
+
 @app.get('/api/health')
 async def health():
     return {"status": "ok"}
@@ -87,3 +87,53 @@ class ActionItemIn(BaseModel):
 class ActionItemOut(ActionItemIn):
   id: str
   workshop_id: str
+
+
+class ExportJobIn(BaseModel):
+  export_type: str
+
+
+class ExportJobOut(BaseModel):
+  id: str
+  workshop_id: int
+  export_type: str
+  status: str
+  export_id: Optional[int] = None
+  error: Optional[str] = None
+  download_url: Optional[str] = None
+
+
+class SnapshotOut(BaseModel):
+  id: int
+  workshop_id: int
+  revision: Optional[int] = None
+  kind: str
+  created_at: Optional[datetime] = None
+  cells: int
+  changes: int
+  stored_bytes: int
+
+
+class SnapshotCell(BaseModel):
+  activity_id: int
+  role_id: int
+  value: str
+
+
+class SnapshotState(BaseModel):
+  snapshot: SnapshotOut
+  cells: List[SnapshotCell]
+
+
+class SnapshotChange(BaseModel):
+  activity_id: int
+  role_id: int
+  before: Optional[str] = None
+  after: Optional[str] = None
+
+
+class SnapshotDiff(BaseModel):
+  workshop_id: int
+  from_id: int
+  to_id: int
+  changes: List[SnapshotChange]
@@ -1,7 +1,8 @@
+from collections import defaultdict
 from datetime import datetime
 import csv
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Optional, Tuple
 
 from openpyxl import load_workbook, Workbook
 from openpyxl.utils import get_column_letter
@@ -14,51 +15,94 @@ EXPORT_DIR = Path(__file__).resolve().parent.parent / "data" / "exports"
 EXPORT_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def fill_workbook_from_assignments(template_path: Path, template_data: Dict, db: Session, workshop_id: int) -> Path:
-    workbook = load_workbook(template_path)
-    assignments = (
-        db.query(models.Assignment)
-        .filter(models.Assignment.workshop_id == workshop_id)
-        .all()
-    )
-    assignment_map = {}
-    for assignment in assignments:
-        assignment_map[(assignment.activity_id, assignment.role_id)] = assignment.raci_value
-
-    # build helper maps
-    role_lookup = {role.id: role for role in db.query(models.Role).filter(models.Role.workshop_id == workshop_id)}
-    activity_lookup = {activity.id: activity for activity in db.query(models.Activity).filter(models.Activity.workshop_id == workshop_id)}
+def build_name_indexes(db: Session, workshop_id: int) -> Tuple[Dict[str, int], Dict[str, int]]:
+    """Map activity text and role name to ids; the first row wins when names repeat."""
+    activity_index: Dict[str, int] = {}
+    for activity_id, activity_text in (
+        db.query(models.Activity.id, models.Activity.activity_text).filter(models.Activity.workshop_id == workshop_id)
+    ):
+        activity_index.setdefault(activity_text, activity_id)
+    role_index: Dict[str, int] = {}
+    for role_id, role_name in db.query(models.Role.id, models.Role.role_name).filter(models.Role.workshop_id == workshop_id):
+        role_index.setdefault(role_name, role_id)
+    return activity_index, role_index
+
 
+def plan_cell_writes(
+    template_data: Dict,
+    sheetnames: List[str],
+    activity_index: Dict[str, int],
+    role_index: Dict[str, int],
+    assignment_map: Dict[Tuple[int, int], str],
+) -> Dict[str, List[Tuple[int, int, str]]]:
+    """Resolve every filled template cell to (row, col, value), grouped by sheet, in one pass."""
+    known_sheets = set(sheetnames)
+    writes: Dict[str, List[Tuple[int, int, str]]] = defaultdict(list)
     for activity_blob in template_data.get("activities", []):
         domain_sheet = activity_blob["domain"]
-        if domain_sheet not in workbook.sheetnames:
+        if domain_sheet not in known_sheets:
             continue
-        sheet = workbook[domain_sheet]
-        cell_map = activity_blob.get("cell_map", {})
-        activity_match = next((a for a in activity_lookup.values() if a.activity_text == activity_blob["activity_text"]), None)
-        if not activity_match:
+        activity_id = activity_index.get(activity_blob["activity_text"])
+        if activity_id is None:
             continue
-        for role_name, coords in cell_map.items():
-            role_obj = next((r for r in role_lookup.values() if r.role_name == role_name), None)
-            if not role_obj:
+        sheet_writes = writes[domain_sheet]
+        for role_name, coords in activity_blob.get("cell_map", {}).items():
+            role_id = role_index.get(role_name)
+            if role_id is None:
                 continue
-            value = assignment_map.get((activity_match.id, role_obj.id))
+            value = assignment_map.get((activity_id, role_id))
             if value:
                 row_idx, col_idx = coords
-                sheet[f"{get_column_letter(col_idx)}{row_idx}"] = value
+                sheet_writes.append((row_idx, col_idx, value))
+    return writes
+
+
+def fill_workbook_from_assignments(
+    template_path: Path,
+    template_data: Dict,
+    db: Session,
+    workshop_id: int,
+    row_major: bool = False,
+    export_dir: Optional[Path] = None,
+) -> Path:
+    """Write workshop assignments into the template cells recorded at ingest time.
+
+    With ``row_major`` the writes for each sheet are sorted by row then column before
+    being applied, which keeps large sheets appending in order.
+    """
+    workbook = load_workbook(template_path)
+    assignment_map = {
+        (activity_id, role_id): raci_value
+        for activity_id, role_id, raci_value in db.query(
+            models.Assignment.activity_id, models.Assignment.role_id, models.Assignment.raci_value
+        ).filter(models.Assignment.workshop_id == workshop_id)
+    }
+    activity_index, role_index = build_name_indexes(db, workshop_id)
+    writes = plan_cell_writes(template_data, workbook.sheetnames, activity_index, role_index, assignment_map)
+
+    column_letters: Dict[int, str] = {}
+    for sheet_name, cells in writes.items():
+        sheet = workbook[sheet_name]
+        if row_major:
+            cells.sort()
+        for row_idx, col_idx, value in cells:
+            letter = column_letters.get(col_idx)
+            if letter is None:
+                letter = column_letters[col_idx] = get_column_letter(col_idx)
+            sheet[f"{letter}{row_idx}"] = value
 
     outputs_sheet = workbook.create_sheet("Outputs")
     outputs_sheet.append(["Exported", datetime.utcnow().isoformat()])
     outputs_sheet.append(["Workshop ID", workshop_id])
     outputs_sheet.append(["Notes", "Filled from OT RACI Workshop Wizard"])
 
-    export_path = EXPORT_DIR / f"workshop_{workshop_id}_filled.xlsx"
+    export_path = (export_dir or EXPORT_DIR) / f"workshop_{workshop_id}_filled.xlsx"
     workbook.save(export_path)
     return export_path
 
 
-def export_actions_csv(db: Session, workshop_id: int) -> Path:
-    path = EXPORT_DIR / f"workshop_{workshop_id}_actions.csv"
+def export_actions_csv(db: Session, workshop_id: int, export_dir: Optional[Path] = None) -> Path:
+    path = (export_dir or EXPORT_DIR) / f"workshop_{workshop_id}_actions.csv"
     import csv
 
     actions = db.query(models.Action).filter(models.Action.workshop_id == workshop_id).all()
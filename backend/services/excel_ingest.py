@@ -1,114 +1,173 @@
 import hashlib
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 from openpyxl import load_workbook
 
+# bump when the parse output changes so cached parses are not reused
+PARSER_VERSION = "2"
+HASH_CHUNK_SIZE = 1024 * 1024
+
+MATRIX_SHEET = "matrix"
+INSTRUCTIONS_SHEET = "instructions"
+LISTS_SHEET = "lists"
+
+TemplateRecord = Tuple[str, object]
+
+
+def hash_file(path: Path, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def classify_sheet(name: str) -> Tuple[str, ...]:
+    """Return the parser kinds a sheet feeds, decided from its name alone."""
+    lowered = name.lower()
+    kinds = []
+    if lowered.endswith("raci"):
+        kinds.append(MATRIX_SHEET)
+    if lowered.startswith("instruction"):
+        kinds.append(INSTRUCTIONS_SHEET)
+    if lowered.startswith("list"):
+        kinds.append(LISTS_SHEET)
+    return tuple(kinds)
+
+
+class _MatrixSheetStream:
+    """Single-pass reader for a RACI matrix sheet: role header row, section rows, activity rows."""
+
+    def __init__(self, parser: "ParsedTemplate", sheet_name: str, include_cell_map: bool):
+        self.parser = parser
+        self.sheet_name = sheet_name
+        self.include_cell_map = include_cell_map
+        self.role_map: Optional[Dict[int, str]] = None
+        self.current_section = None
+
+    def start(self) -> Iterator[TemplateRecord]:
+        domain = {
+            "sheet_name": self.sheet_name,
+            "display_name": self.sheet_name,
+            "order_index": self.parser.domain_count,
+        }
+        self.parser.domain_count += 1
+        yield "domain", domain
+
+    def feed(self, r_idx: int, row: tuple) -> Iterator[TemplateRecord]:
+        if self.role_map is None:
+            yield from self._detect_role_row(row)
+            return
+        if not row:
+            return
+        first_cell = row[0]
+        remaining = row[1:]
+        if not any([first_cell, *remaining]):
+            return
+        # section header if other cells empty
+        if first_cell and not any(remaining):
+            self.current_section = str(first_cell)
+            return
+        if not first_cell:
+            return
+        assignments = {}
+        for c_idx, value in enumerate(remaining, start=1):
+            if value:
+                assignments[self.role_map.get(c_idx)] = str(value).strip()
+        activity = {
+            "domain": self.sheet_name,
+            "activity_text": str(first_cell),
+            "section_text": self.current_section,
+            "order_index": self.parser.activity_count,
+            "initial_assignments": assignments,
+        }
+        if self.include_cell_map:
+            activity["cell_map"] = {name: (r_idx, c_idx + 1) for c_idx, name in self.role_map.items()}
+        else:
+            # cells sit at (row_index, role["column_index"])
+            activity["row_index"] = r_idx
+        self.parser.activity_count += 1
+        yield "activity", activity
+
+    def _detect_role_row(self, row: tuple) -> Iterator[TemplateRecord]:
+        cells = list(row)
+        if len(cells) < 2:
+            return
+        role_names = [str(c).strip() for c in cells[1:] if c]
+        if not role_names:
+            return
+        self.role_map = {i + 1: name for i, name in enumerate(role_names)}
+        # register roles globally
+        for col_index, name in self.role_map.items():
+            yield "role", {
+                "role_name": name,
+                "role_key": f"{self.sheet_name}:{name}",
+                "order_index": col_index,
+                "domain": self.sheet_name,
+                "column_index": col_index + 1,
+            }
+
 
 class ParsedTemplate:
-    def __init__(self, template_path: Path):
+    def __init__(self, template_path: Path, read_only: bool = False):
         self.template_path = template_path
-        self.workbook = load_workbook(template_path, data_only=True)
+        self.workbook = load_workbook(template_path, read_only=read_only, data_only=True)
         self.domains: List[Dict] = []
         self.roles: List[Dict] = []
         self.activities: List[Dict] = []
         self.instructions: Dict[str, str] = {}
         self.lists: Dict[str, List[str]] = {}
+        self.domain_count = 0
+        self.activity_count = 0
 
     def _hash_file(self) -> str:
-        data = self.template_path.read_bytes()
-        return hashlib.sha256(data).hexdigest()
-
-    def _detect_role_row(self, sheet) -> Tuple[int, List[str]]:
-        for idx, row in enumerate(sheet.iter_rows(values_only=True), start=1):
-            cells = list(row)
-            if len(cells) < 2:
-                continue
-            header_candidates = [c for c in cells[1:] if c]
-            if len(header_candidates) >= 1:
-                return idx, [str(c).strip() for c in cells[1:] if c]
-        return 1, []
-
-    def parse_matrix_sheet(self, sheet_name: str):
-        sheet = self.workbook[sheet_name]
-        role_row_index, role_names = self._detect_role_row(sheet)
-        role_map: Dict[int, str] = {i + 1: name for i, name in enumerate(role_names)}
-        self.domains.append(
-            {
-                "sheet_name": sheet_name,
-                "display_name": sheet_name,
-                "order_index": len(self.domains),
-            }
-        )
+        return hash_file(self.template_path)
 
-        # register roles globally
-        for col_index, name in role_map.items():
-            self.roles.append(
-                {
-                    "role_name": name,
-                    "role_key": f"{sheet_name}:{name}",
-                    "order_index": col_index,
-                    "domain": sheet_name,
-                    "column_index": col_index + 1,
-                }
-            )
-
-        current_section = None
-        for r_idx, row in enumerate(sheet.iter_rows(min_row=role_row_index + 1, values_only=True), start=role_row_index + 1):
-            first_cell = row[0]
-            remaining = row[1:]
-            if not any([first_cell, *remaining]):
-                continue
-            # section header if other cells empty
-            if first_cell and not any(remaining):
-                current_section = str(first_cell)
-                continue
-            if not first_cell:
-                continue
-            activity_text = str(first_cell)
-            assignments = {}
-            for c_idx, value in enumerate(remaining, start=1):
-                if value:
-                    assignments[role_map.get(c_idx)] = str(value).strip()
-            self.activities.append(
-                {
-                    "domain": sheet_name,
-                    "activity_text": activity_text,
-                    "section_text": current_section,
-                    "order_index": len(self.activities),
-                    "cell_map": {role_map.get(c_idx): (r_idx, c_idx + 1) for c_idx in role_map.keys()},
-                    "initial_assignments": assignments,
-                }
-            )
-
-    def parse_instructions_sheet(self):
-        for name in self.workbook.sheetnames:
-            if name.lower().startswith("instruction"):
-                content_lines = []
-                for row in self.workbook[name].iter_rows(values_only=True):
+    def classify_sheets(self) -> List[Tuple[str, Tuple[str, ...]]]:
+        return [(name, kinds) for name in self.workbook.sheetnames for kinds in [classify_sheet(name)] if kinds]
+
+    def iter_records(self, include_cell_map: bool = True) -> Iterator[TemplateRecord]:
+        """Yield ``(kind, payload)`` records sheet by sheet, reading each sheet's rows once.
+
+        Kinds are ``domain``, ``role`` and ``activity`` (dict payloads) plus
+        ``instructions`` and ``lists`` whose payload is ``(sheet_name, content)``.
+        """
+        for name, kinds in self.classify_sheets():
+            matrix = _MatrixSheetStream(self, name, include_cell_map) if MATRIX_SHEET in kinds else None
+            lines: Optional[List[str]] = [] if INSTRUCTIONS_SHEET in kinds else None
+            values: Optional[List[str]] = [] if LISTS_SHEET in kinds else None
+            if matrix:
+                yield from matrix.start()
+            for r_idx, row in enumerate(self.workbook[name].iter_rows(values_only=True), start=1):
+                if matrix:
+                    yield from matrix.feed(r_idx, row)
+                if lines is not None:
                     line = " ".join([str(c) for c in row if c])
                     if line:
-                        content_lines.append(line)
-                self.instructions[name] = "\n".join(content_lines)
-
-    def parse_lists_sheet(self):
-        for name in self.workbook.sheetnames:
-            if name.lower().startswith("list"):
-                values: List[str] = []
-                for row in self.workbook[name].iter_rows(values_only=True):
-                    if row and row[0]:
-                        values.append(str(row[0]))
-                self.lists[name] = values
-
-    def parse(self):
-        for name in self.workbook.sheetnames:
-            if name.lower().endswith("raci"):
-                self.parse_matrix_sheet(name)
-        self.parse_instructions_sheet()
-        self.parse_lists_sheet()
+                        lines.append(line)
+                if values is not None and row and row[0]:
+                    values.append(str(row[0]))
+            if lines is not None:
+                yield INSTRUCTIONS_SHEET, (name, "\n".join(lines))
+            if values is not None:
+                yield LISTS_SHEET, (name, values)
+
+    def close(self):
+        self.workbook.close()
+
+    def parse(self, file_hash: Optional[str] = None):
+        collectors = {"domain": self.domains, "role": self.roles, "activity": self.activities}
+        for kind, payload in self.iter_records():
+            if kind in collectors:
+                collectors[kind].append(payload)
+            elif kind == INSTRUCTIONS_SHEET:
+                self.instructions[payload[0]] = payload[1]
+            elif kind == LISTS_SHEET:
+                self.lists[payload[0]] = payload[1]
 
         return {
-            "file_hash": self._hash_file(),
+            "file_hash": file_hash or self._hash_file(),
             "domains": self.domains,
             "roles": self.roles,
             "activities": self.activities,
@@ -120,3 +179,15 @@ class ParsedTemplate:
 def parse_template(path: Path) -> Dict:
     parser = ParsedTemplate(path)
     return parser.parse()
+
+
+def iter_template(path: Path, include_cell_map: bool = True) -> Iterator[TemplateRecord]:
+    """Stream a template's records from a read-only workbook without building the full parse dict.
+
+    No upload path uses it yet; ``/api/template/parse`` is still a placeholder.
+    """
+    parser = ParsedTemplate(path, read_only=True)
+    try:
+        yield from parser.iter_records(include_cell_map=include_cell_map)
+    finally:
+        parser.close()
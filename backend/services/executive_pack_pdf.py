@@ -1,13 +1,13 @@
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 PDF_DIR = Path(__file__).resolve().parent.parent / "data" / "exports"
 PDF_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def build_pdf(summary: Dict, workshop_id: int) -> Path:
+def build_pdf(summary: Dict, workshop_id: int, export_dir: Optional[Path] = None) -> Path:
     """Generate a lightweight PDF (fallbacks to text when render engine unavailable)."""
-    target = PDF_DIR / f"workshop_{workshop_id}_executive.pdf"
+    target = (export_dir or PDF_DIR) / f"workshop_{workshop_id}_executive.pdf"
     html = f"""
     <html><body>
     <h1>OT RACI Current State – Executive Readout</h1>
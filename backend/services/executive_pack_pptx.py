@@ -1,5 +1,5 @@
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 from pptx import Presentation
 
@@ -20,7 +20,7 @@ SLIDE_TITLES = [
 ]
 
 
-def build_pptx(summary: Dict, workshop_id: int) -> Path:
+def build_pptx(summary: Dict, workshop_id: int, export_dir: Optional[Path] = None) -> Path:
     prs = Presentation()
     for title in SLIDE_TITLES:
         slide_layout = prs.slide_layouts[0] if prs.slide_layouts else prs.slides.add_slide(prs.slide_layouts[6])
@@ -30,6 +30,6 @@ def build_pptx(summary: Dict, workshop_id: int) -> Path:
             for placeholder in slide.placeholders:
                 if placeholder.placeholder_format.type == 1:  # body placeholder
                     placeholder.text = f"Auto-generated summary: {summary}"
-    target = PPTX_DIR / f"workshop_{workshop_id}_executive.pptx"
+    target = (export_dir or PPTX_DIR) / f"workshop_{workshop_id}_executive.pptx"
     prs.save(target)
     return target
@@ -0,0 +1,95 @@
+"""Export artifacts cached on disk by (workshop, revision, export type).
+
+A workshop's revision only ever goes up, so a cached file never needs
+invalidating: a write makes the next lookup miss and the stale file is removed
+when the new one is stored. Total size is kept under ``max_bytes`` by dropping
+the least recently served files.
+"""
+import os
+import re
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+MAX_CACHE_BYTES = int(os.getenv("RACI_EXPORT_CACHE_BYTES", str(512 * 1024 * 1024)))
+
+_FILENAME = re.compile(r"^workshop_(?P<workshop>\d+)_r(?P<revision>\d+)_(?P<type>[a-z_]+)\.\w+$")
+
+
+class ExportCache:
+    def __init__(self, directory: Path, max_bytes: int = MAX_CACHE_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def path_for(self, workshop_id: int, revision: int, export_type: str, suffix: str) -> Path:
+        return self.directory / f"workshop_{workshop_id}_r{revision}_{export_type}{suffix}"
+
+    def get(self, workshop_id: int, revision: int, export_type: str, suffix: str) -> Optional[Path]:
+        path = self.path_for(workshop_id, revision, export_type, suffix)
+        try:
+            os.utime(path)  # mark as recently used for eviction
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, source: Path, workshop_id: int, revision: int, export_type: str, suffix: str) -> Path:
+        """Move a rendered file into the cache and return its cached path."""
+        target = self.path_for(workshop_id, revision, export_type, suffix)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        os.replace(source, target)
+        self._after_put(target, workshop_id, export_type)
+        return target
+
+    def tee(
+        self, chunks: Iterable[Union[str, bytes]], workshop_id: int, revision: int, export_type: str, suffix: str
+    ) -> Iterator[Union[str, bytes]]:
+        """Pass ``chunks`` through while writing them to the cache; nothing is stored if the stream stops early."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        handle, partial = tempfile.mkstemp(prefix=".partial-", suffix=suffix, dir=self.directory)
+        try:
+            with os.fdopen(handle, "wb") as out:
+                for chunk in chunks:
+                    out.write(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+                    yield chunk
+            self.put(Path(partial), workshop_id, revision, export_type, suffix)
+        finally:
+            if os.path.exists(partial):
+                os.remove(partial)
+
+    def evict(self, keep: Optional[Path] = None):
+        """Delete least recently used files until the cache fits in ``max_bytes``."""
+        with self._lock:
+            entries = []
+            for path in self.directory.iterdir():
+                if not _FILENAME.match(path.name):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                _remove(path)
+                total -= size
+
+    def _after_put(self, target: Path, workshop_id: int, export_type: str):
+        # older revisions of the same export can never be served again
+        for path in self.directory.glob(f"workshop_{workshop_id}_r*_{export_type}.*"):
+            match = _FILENAME.match(path.name)
+            if path != target and match and match["type"] == export_type:
+                _remove(path)
+        self.evict(keep=target)
+
+
+def _remove(path: Path):
+    try:
+        path.unlink()
+    except FileNotFoundError:
+        pass
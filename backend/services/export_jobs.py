@@ -0,0 +1,250 @@
+"""Background export jobs: submit, render in a process pool, poll, download.
+
+A job is identified by (workshop, revision, export type). Submitting the same
+export while the workshop revision is unchanged returns the same job, and once
+it has rendered, the file already in the export cache, which also lets a
+restarted server find finished jobs again. Rendered files are recorded in the
+``exports`` table.
+"""
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from backend.db import database, models
+from backend.services.excel_export import EXPORT_DIR, export_actions_csv, fill_workbook_from_assignments
+from backend.services.export_cache import ExportCache
+from backend.services.executive_pack_pdf import build_pdf
+from backend.services.executive_pack_pptx import build_pptx
+
+# uploaded templates referenced by a relative Template.uploaded_filename
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "data" / "templates"
+EXPORT_SUFFIXES = {"excel": ".xlsx", "actions_csv": ".csv", "pptx": ".pptx", "pdf": ".pdf"}
+MAX_WORKERS = int(os.getenv("RACI_EXPORT_WORKERS", "2"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+def workshop_revision(db: Session, workshop_id: int) -> int:
+    revision = db.query(models.Workshop.revision).filter(models.Workshop.id == workshop_id).scalar()
+    if revision is None:
+        raise LookupError(f"Workshop {workshop_id} not found")
+    return revision
+
+
+def export_job_id(workshop_id: int, export_type: str, revision: int) -> str:
+    return f"{workshop_id}-r{revision}-{export_type}"
+
+
+def _parse_job_id(job_id: str) -> Optional[Tuple[int, int, str]]:
+    match = re.fullmatch(r"(\d+)-r(\d+)-([a-z_]+)", job_id)
+    if match is None or match[3] not in EXPORT_SUFFIXES:
+        return None
+    return int(match[1]), int(match[2]), match[3]
+
+
+def build_export_summary(db: Session, workshop_id: int) -> Dict:
+    """Headline counts for the executive PPTX/PDF packs."""
+    workshop = db.get(models.Workshop, workshop_id)
+
+    def grouped(column, *criteria):
+        return {str(key): count for key, count in db.query(column, func.count()).filter(*criteria).group_by(column)}
+
+    return {
+        "workshop": workshop.workshop_name,
+        "organization": workshop.org_name,
+        "activities": db.query(func.count(models.Activity.id)).filter(models.Activity.workshop_id == workshop_id).scalar(),
+        "assignments": grouped(models.Assignment.raci_value, models.Assignment.workshop_id == workshop_id),
+        "open_issues": grouped(models.Issue.severity, models.Issue.workshop_id == workshop_id, models.Issue.status == "open"),
+        "actions": grouped(models.Action.status, models.Action.workshop_id == workshop_id),
+    }
+
+
+def _template_path(template: models.Template) -> Path:
+    path = Path(template.uploaded_filename)
+    return path if path.is_absolute() else TEMPLATE_DIR / path
+
+
+def _render_excel(db: Session, workshop_id: int, export_dir: Path) -> Path:
+    template = db.get(models.Workshop, workshop_id).template
+    return fill_workbook_from_assignments(_template_path(template), template.parsed_json, db, workshop_id, export_dir=export_dir)
+
+
+def _render_pptx(db: Session, workshop_id: int, export_dir: Path) -> Path:
+    return build_pptx(build_export_summary(db, workshop_id), workshop_id, export_dir=export_dir)
+
+
+def _render_pdf(db: Session, workshop_id: int, export_dir: Path) -> Path:
+    return build_pdf(build_export_summary(db, workshop_id), workshop_id, export_dir=export_dir)
+
+
+RENDERERS: Dict[str, Callable[[Session, int, Path], Path]] = {
+    "excel": _render_excel,
+    "actions_csv": export_actions_csv,
+    "pptx": _render_pptx,
+    "pdf": _render_pdf,
+}
+
+
+def render_cached(db: Session, workshop_id: int, export_type: str, cache: Optional[ExportCache] = None) -> Tuple[Path, bool]:
+    """Path of the export for the workshop's current revision, rendering it only on a cache miss.
+
+    Returns ``(path, rendered)``. The revision is read before rendering, so a write
+    that lands mid-render can only make the cached file newer than its key.
+    """
+    cache = cache or export_cache
+    suffix = EXPORT_SUFFIXES[export_type]
+    revision = workshop_revision(db, workshop_id)
+    cached = cache.get(workshop_id, revision, export_type, suffix)
+    if cached is not None:
+        return cached, False
+    # render into a private directory so concurrent renders never share the renderer's fixed file name
+    cache.directory.mkdir(parents=True, exist_ok=True)
+    staging = Path(tempfile.mkdtemp(prefix=".render-", dir=cache.directory))
+    try:
+        rendered = RENDERERS[export_type](db, workshop_id, staging)
+        return cache.put(rendered, workshop_id, revision, export_type, suffix), True
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def render_export(workshop_id: int, export_type: str) -> Dict:
+    """Render one export with its own session and record it; runs inside a pool worker."""
+    database.get_engine()
+    db = database.SessionLocal()
+    try:
+        path, rendered = render_cached(db, workshop_id, export_type)
+        export = None if rendered else db.query(models.Export).filter(models.Export.filepath == str(path)).first()
+        if export is None:
+            export = models.Export(workshop_id=workshop_id, export_type=export_type, filepath=str(path))
+            db.add(export)
+            db.commit()
+        return {"export_id": export.id, "filepath": str(path)}
+    finally:
+        db.close()
+
+
+@dataclass
+class ExportJob:
+    id: str
+    workshop_id: int
+    export_type: str
+    future: Optional[Future] = None
+    export_id: Optional[int] = None
+    filepath: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def status(self) -> str:
+        if self.future is not None and self.future.done() and self.filepath is None and self.error is None:
+            try:
+                result = self.future.result()
+                self.export_id, self.filepath = result["export_id"], result["filepath"]
+            except Exception as exc:  # surfaced to the poller as the job error
+                self.error = f"{type(exc).__name__}: {exc}"
+        if self.error is not None:
+            return FAILED
+        if self.filepath is not None:
+            return DONE
+        return RUNNING if self.future.running() else QUEUED
+
+    def to_dict(self) -> Dict:
+        status = self.status
+        return {
+            "id": self.id,
+            "workshop_id": self.workshop_id,
+            "export_type": self.export_type,
+            "status": status,
+            "export_id": self.export_id,
+            "error": self.error,
+            "download_url": f"/api/exports/{self.id}/download" if status == DONE else None,
+        }
+
+
+class ExportJobQueue:
+    """Deduplicating front end to a pool of export renderers."""
+
+    def __init__(self, executor_factory: Optional[Callable[[], Executor]] = None, max_jobs: int = 1024):
+        # spawn, not fork: the server is multi-threaded, and a fork could copy a lock another thread holds
+        self._executor_factory = executor_factory or (
+            lambda: ProcessPoolExecutor(max_workers=MAX_WORKERS, mp_context=get_context("spawn"))
+        )
+        self._executor: Optional[Executor] = None
+        self._jobs: "OrderedDict[str, ExportJob]" = OrderedDict()
+        self._max_jobs = max_jobs
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = self._executor_factory()
+        return self._executor
+
+    def submit(self, db: Session, workshop_id: int, export_type: str) -> ExportJob:
+        """Queue an export, or return the job already covering this workshop revision."""
+        if export_type not in RENDERERS:
+            raise ValueError(f"Unknown export type {export_type!r}; expected one of {sorted(RENDERERS)}")
+        job_id = export_job_id(workshop_id, export_type, workshop_revision(db, workshop_id))
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status != FAILED:
+                return job
+            job = self._recorded_job(db, job_id)
+            if job is None:
+                job = ExportJob(id=job_id, workshop_id=workshop_id, export_type=export_type)
+                job.future = self.executor.submit(render_export, workshop_id, export_type)
+            self._remember(job)
+            return job
+
+    def get(self, db: Session, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._recorded_job(db, job_id)
+                if job is not None:
+                    self._remember(job)
+            return job
+
+    def shutdown(self, wait: bool = True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _recorded_job(self, db: Session, job_id: str) -> Optional[ExportJob]:
+        key = _parse_job_id(job_id)
+        if key is None:
+            return None
+        workshop_id, revision, export_type = key
+        path = export_cache.get(workshop_id, revision, export_type, EXPORT_SUFFIXES[export_type])
+        if path is None:
+            return None
+        export = db.query(models.Export).filter(models.Export.filepath == str(path)).order_by(models.Export.id.desc()).first()
+        return ExportJob(
+            id=job_id, workshop_id=workshop_id, export_type=export_type, export_id=export.id if export else None, filepath=str(path)
+        )
+
+    def _remember(self, job: ExportJob):
+        self._jobs[job.id] = job
+        self._jobs.move_to_end(job.id)
+        # forget the oldest finished jobs; their files stay findable through the export cache
+        for stale_id in [key for key, stale in self._jobs.items() if stale.status in (DONE, FAILED)]:
+            if len(self._jobs) <= self._max_jobs:
+                break
+            del self._jobs[stale_id]
+
+
+export_cache = ExportCache(EXPORT_DIR)
+default_queue = ExportJobQueue()
@@ -0,0 +1,314 @@
+"""Pluggable RACI validation rules compiled into one fused evaluator.
+
+A rule is registered as a factory taking the run's options (for example
+``overload_threshold``) and returning a check bound to them. ``compile`` builds
+every enabled rule once per run, so options are resolved up front instead of in
+the per-activity loop, and ``CompiledRules.evaluate`` walks the subjects once,
+handing each activity's (or role's) counts to every check in turn. Enabling
+another rule adds a call per subject, not another pass over the assignments.
+
+Checks take ``(subject_id, counts, extra)``: ``counts`` maps "R"/"A"/"C"/"I" to
+how many cells hold that value, and ``extra`` carries scope-specific context (an
+activity's deviations from the recommended RACI, or a role's last activity).
+They return a tuple of ``Finding``; consumers turn findings into their own issue
+rows.
+
+Organizations can add count rules of their own with ``add_count_rule``; they
+run after the built-in rules whenever that organization's workshops are
+validated. Each rule keeps call, finding and time counters across runs.
+"""
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+ACTIVITY = "activity"
+ROLE = "role"
+SCOPES = (ACTIVITY, ROLE)
+RACI_LETTERS = ("R", "A", "C", "I")
+
+NO_FINDINGS: Tuple = ()
+
+
+class Finding(NamedTuple):
+    rule: str
+    # issue type the finding is recorded as
+    kind: str
+    activity_id: Optional[int]
+    role_id: Optional[int]
+    severity: str
+    notes: str
+
+
+Check = Callable[[int, Mapping[str, int], Any], Sequence[Finding]]
+RuleFactory = Callable[[Mapping[str, Any]], Check]
+
+
+class RuleSpec(NamedTuple):
+    name: str
+    scope: str
+    factory: RuleFactory
+    organization_id: Optional[int] = None
+    # finding kinds the rule can report; issues of these kinds belong to the rule
+    kinds: Tuple[str, ...] = ()
+
+
+class RuleStats:
+    __slots__ = ("calls", "findings", "seconds")
+
+    def __init__(self):
+        self.calls = 0
+        self.findings = 0
+        self.seconds = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {"calls": self.calls, "findings": self.findings, "seconds": self.seconds}
+
+
+class CompiledRules:
+    """The enabled rules of one run, bound to its options."""
+
+    def __init__(self, registry: "RuleRegistry", specs: Sequence[RuleSpec], options: Mapping[str, Any]):
+        self.registry = registry
+        self.names = [spec.name for spec in specs]
+        self._kinds = {scope: tuple(kind for spec in specs if spec.scope == scope for kind in spec.kinds) for scope in SCOPES}
+        self._checks = {
+            scope: tuple(((spec.organization_id, spec.name), spec.factory(options)) for spec in specs if spec.scope == scope)
+            for scope in SCOPES
+        }
+
+    def evaluate(self, scope: str, subjects: Iterable[Tuple[int, Mapping[str, int], Any]]) -> List[Finding]:
+        """Run every ``scope`` rule over each (subject_id, counts, extra) in a single pass."""
+        checks = self._checks[scope]
+        findings: List[Finding] = []
+        if not checks:
+            return findings
+        clock = time.perf_counter
+        calls = 0
+        found = [0] * len(checks)
+        elapsed = [0.0] * len(checks)
+        for subject_id, counts, extra in subjects:
+            calls += 1
+            for index, (_, check) in enumerate(checks):
+                started = clock()
+                results = check(subject_id, counts, extra)
+                elapsed[index] += clock() - started
+                if results:
+                    found[index] += len(results)
+                    findings.extend(results)
+        self.registry._record([(key, calls, found[i], elapsed[i]) for i, (key, _) in enumerate(checks)])
+        return findings
+
+    def kinds(self, scope: str) -> Tuple[str, ...]:
+        """Finding kinds the ``scope`` rules can report."""
+        return self._kinds[scope]
+
+    def evaluate_activities(self, subjects: Iterable[Tuple[int, Mapping[str, int], Any]]) -> List[Finding]:
+        return self.evaluate(ACTIVITY, subjects)
+
+    def evaluate_roles(self, subjects: Iterable[Tuple[int, Mapping[str, int], Any]]) -> List[Finding]:
+        return self.evaluate(ROLE, subjects)
+
+
+class RuleRegistry:
+    def __init__(self):
+        self._rules: Dict[str, RuleSpec] = {}
+        self._org_rules: Dict[int, Dict[str, RuleSpec]] = defaultdict(dict)
+        self._stats: Dict[Tuple[Optional[int], str], RuleStats] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, scope: str, organization_id: Optional[int] = None, kinds: Sequence[str] = ()):
+        """Decorator registering a rule factory under ``name``; replaces a rule of the same name.
+
+        ``kinds`` lists the finding kinds the rule reports, ``name`` if not given.
+        """
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown rule scope {scope!r}; expected one of {', '.join(SCOPES)}")
+
+        def decorator(factory: RuleFactory) -> RuleFactory:
+            spec = RuleSpec(name, scope, factory, organization_id, tuple(kinds) or (name,))
+            with self._lock:
+                if organization_id is None:
+                    self._rules[name] = spec
+                else:
+                    self._org_rules[organization_id][name] = spec
+            return factory
+
+        return decorator
+
+    def add_count_rule(
+        self,
+        organization_id: int,
+        name: str,
+        value: str,
+        minimum: Optional[int] = None,
+        maximum: Optional[int] = None,
+        scope: str = ACTIVITY,
+        severity: str = "Medium",
+        notes: Optional[str] = None,
+    ):
+        """Register an organization rule flagging subjects with fewer than ``minimum`` or more than ``maximum`` ``value`` cells."""
+        value = value.upper()
+        if value not in RACI_LETTERS:
+            raise ValueError(f"Invalid RACI value {value!r}; expected one of {', '.join(RACI_LETTERS)}")
+        if minimum is None and maximum is None:
+            raise ValueError("A count rule needs a minimum or a maximum")
+        low = minimum if minimum is not None else 0
+        high = maximum if maximum is not None else float("inf")
+        message = notes or f"Expected {_bounds(minimum, maximum)} {value} per {scope}"
+
+        @self.register(name, scope, organization_id)
+        def count_rule(options):
+            def check(subject_id, counts, extra):
+                if low <= counts.get(value, 0) <= high:
+                    return NO_FINDINGS
+                if scope == ROLE:
+                    return (Finding(name, name, extra or 0, subject_id, severity, message),)
+                return (Finding(name, name, subject_id, None, severity, message),)
+
+            return check
+
+    def remove(self, name: str, organization_id: Optional[int] = None):
+        with self._lock:
+            rules = self._rules if organization_id is None else self._org_rules.get(organization_id, {})
+            rules.pop(name, None)
+
+    def rules(self, organization_id: Optional[int] = None) -> List[RuleSpec]:
+        """Built-in rules followed by the organization's own."""
+        with self._lock:
+            specs = list(self._rules.values())
+            if organization_id is not None:
+                specs.extend(self._org_rules.get(organization_id, {}).values())
+        return specs
+
+    def compile(self, enabled: Iterable[str], organization_id: Optional[int] = None, **options) -> CompiledRules:
+        """Bind the ``enabled`` built-in rules, plus every rule of ``organization_id``, to ``options``."""
+        with self._lock:
+            specs = []
+            for name in enabled:
+                try:
+                    specs.append(self._rules[name])
+                except KeyError:
+                    raise ValueError(f"Unknown validation rule {name!r}")
+            if organization_id is not None:
+                specs.extend(self._org_rules.get(organization_id, {}).values())
+        return CompiledRules(self, specs, options)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"name": name, "organization_id": organization_id, **stats.as_dict()}
+                for (organization_id, name), stats in sorted(self._stats.items(), key=lambda item: (item[0][0] or 0, item[0][1]))
+            ]
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats.clear()
+
+    def _record(self, counters: Iterable[Tuple[Tuple[Optional[int], str], int, int, float]]):
+        # totals of a whole pass are merged at once so checks never touch the lock
+        with self._lock:
+            for key, calls, findings, seconds in counters:
+                stats = self._stats.get(key)
+                if stats is None:
+                    stats = self._stats[key] = RuleStats()
+                stats.calls += calls
+                stats.findings += findings
+                stats.seconds += seconds
+
+
+def _bounds(minimum: Optional[int], maximum: Optional[int]) -> str:
+    if maximum is None:
+        return f"at least {minimum}"
+    if minimum is None:
+        return f"at most {maximum}"
+    return f"between {minimum} and {maximum}"
+
+
+registry = RuleRegistry()
+
+
+@registry.register("exactly_one_A", ACTIVITY, kinds=("missing_A", "multiple_A"))
+def _exactly_one_accountable(options):
+    def check(activity_id, counts, extra):
+        accountable = counts.get("A", 0)
+        if accountable == 1:
+            return NO_FINDINGS
+        if accountable == 0:
+            return (Finding("exactly_one_A", "missing_A", activity_id, None, "High", "No accountable role selected"),)
+        return (Finding("exactly_one_A", "multiple_A", activity_id, None, "High", "More than one accountable role selected"),)
+
+    return check
+
+
+@registry.register("at_least_one_R", ACTIVITY, kinds=("no_R",))
+def _at_least_one_responsible(options):
+    def check(activity_id, counts, extra):
+        if counts.get("R", 0):
+            return NO_FINDINGS
+        return (Finding("at_least_one_R", "no_R", activity_id, None, "Medium", "No responsible role selected"),)
+
+    return check
+
+
+@registry.register("communication_gap", ACTIVITY)
+def _communication_gap(options):
+    def check(activity_id, counts, extra):
+        if not counts.get("R", 0) or counts.get("I", 0):
+            return NO_FINDINGS
+        return (
+            Finding(
+                "communication_gap",
+                "communication_gap",
+                activity_id,
+                None,
+                "Medium",
+                "Responsibilities defined without Inform recipients",
+            ),
+        )
+
+    return check
+
+
+@registry.register("deviation", ACTIVITY, kinds=("deviation_from_recommended",))
+def _deviation_from_recommended(options):
+    # ``extra`` is the activity's (activity_id, role_id, recommended, actual) deviations
+    def check(activity_id, counts, extra):
+        if not extra:
+            return NO_FINDINGS
+        return tuple(
+            Finding(
+                "deviation",
+                "deviation_from_recommended",
+                activity_id,
+                role_id,
+                "Low",
+                f"Recommended {recommended or 'None'} differs from actual {actual or 'None'}",
+            )
+            for _, role_id, recommended, actual in extra
+        )
+
+    return check
+
+
+@registry.register("overload", ROLE, kinds=("role_overload",))
+def _role_overload(options):
+    threshold = options.get("overload_threshold", 10)
+
+    # ``extra`` is the activity the issue is attached to
+    def check(role_id, counts, extra):
+        total = counts.get("R", 0) + counts.get("A", 0)
+        if total <= threshold:
+            return NO_FINDINGS
+        return (
+            Finding(
+                "overload",
+                "role_overload",
+                extra or 0,
+                role_id,
+                "Medium",
+                f"Role has {total} R/A assignments exceeding threshold {threshold}",
+            ),
+        )
+
+    return check
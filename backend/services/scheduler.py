@@ -0,0 +1,196 @@
+"""Periodic revalidation and snapshotting of changed workshops.
+
+``Scheduler.run`` is an asyncio task started by the API's startup hook. Every
+``interval`` seconds, give or take ``jitter``, it reads each workshop's
+revision in one query. It revalidates the workshops whose revision moved since
+it last validated them, and snapshots those whose newest snapshot is older than
+``snapshot_interval`` and at an earlier revision. The work runs in threads with
+sessions of their own, never more than ``concurrency`` at a time, so it stays
+off the event loop.
+
+SQLite has a single writer, so background writes keep out of the way of
+interactive requests. A workshop is only started while no API request is in
+flight (``interactive`` tracks them). Background connections wait at most
+``busy_timeout_ms`` for the write lock, and a workshop that finds the
+database busy is retried on the next tick rather than queued. The last
+validated revisions are kept in memory, so every workshop is revalidated once
+after a restart; validation skips issues that are already open, so that run
+adds nothing.
+"""
+import asyncio
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from backend.db import database, models
+from backend.services import snapshots, validation
+
+SCHEDULER_INTERVAL = float(os.getenv("RACI_SCHEDULER_INTERVAL", "300"))
+SNAPSHOT_INTERVAL = float(os.getenv("RACI_SNAPSHOT_INTERVAL", "3600"))
+SCHEDULER_JITTER = float(os.getenv("RACI_SCHEDULER_JITTER", "0.2"))
+SCHEDULER_CONCURRENCY = int(os.getenv("RACI_SCHEDULER_CONCURRENCY", "1"))
+BACKGROUND_BUSY_TIMEOUT_MS = int(os.getenv("RACI_SCHEDULER_BUSY_TIMEOUT_MS", "250"))
+IDLE_POLL_SECONDS = 0.05
+
+
+class Scheduler:
+    def __init__(
+        self,
+        interval: float = SCHEDULER_INTERVAL,
+        snapshot_interval: float = SNAPSHOT_INTERVAL,
+        jitter: float = SCHEDULER_JITTER,
+        concurrency: int = SCHEDULER_CONCURRENCY,
+        busy_timeout_ms: int = BACKGROUND_BUSY_TIMEOUT_MS,
+        engine_factory: Callable[[], Engine] = database.get_engine,
+    ):
+        self.interval = interval
+        self.snapshot_interval = snapshot_interval
+        self.jitter = jitter
+        self.concurrency = max(1, concurrency)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.engine_factory = engine_factory
+        self.validated: Dict[int, int] = {}
+        self.active_requests = 0
+        self.last_tick: Optional[Dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @contextmanager
+    def interactive(self) -> Iterator[None]:
+        """Mark an API request in flight; background work waits for it."""
+        self.active_requests += 1
+        try:
+            yield
+        finally:
+            self.active_requests -= 1
+
+    def start(self) -> Optional[asyncio.Task]:
+        if self.interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+        return self._task
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.next_delay())
+            try:
+                await self.tick()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # keep the loop alive; the error shows in the status
+                self.last_tick = {"finished_at": time.time(), "error": f"{type(exc).__name__}: {exc}"}
+
+    def next_delay(self) -> float:
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    async def tick(self) -> Dict:
+        """Revalidate and snapshot every workshop that needs it; returns what was done."""
+        started = time.perf_counter()
+        due = await asyncio.to_thread(self.due_workshops)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results: Dict[str, List[int]] = {"validated": [], "snapshotted": [], "deferred": []}
+
+        async def process(workshop_id: int, revalidate: bool, snapshot: bool):
+            async with semaphore:
+                await self._wait_until_idle()
+                outcome = await asyncio.to_thread(self.process_workshop, workshop_id, revalidate, snapshot)
+            for key in outcome:
+                results[key].append(workshop_id)
+
+        await asyncio.gather(*(process(workshop_id, *work) for workshop_id, work in sorted(due.items())))
+        self.last_tick = {
+            "finished_at": time.time(),
+            "elapsed_ms": (time.perf_counter() - started) * 1000,
+            **{key: sorted(ids) for key, ids in results.items()},
+        }
+        return self.last_tick
+
+    def due_workshops(self) -> Dict[int, tuple]:
+        """workshop_id -> (revalidate, snapshot) for every workshop with work to do."""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.snapshot_interval)
+        with self._session() as db:
+            revisions = dict(db.query(models.Workshop.id, models.Workshop.revision))
+            latest = snapshots.latest_snapshots(db)
+        due = {}
+        for workshop_id, revision in revisions.items():
+            revalidate = self.validated.get(workshop_id) != revision
+            snapshot_revision, snapshot_at = latest.get(workshop_id, (None, None))
+            snapshot = snapshot_revision != revision and (snapshot_at is None or snapshot_at <= cutoff)
+            if revalidate or snapshot:
+                due[workshop_id] = (revalidate, snapshot)
+        for workshop_id in set(self.validated) - set(revisions):
+            del self.validated[workshop_id]
+        return due
+
+    def process_workshop(self, workshop_id: int, revalidate: bool, snapshot: bool) -> List[str]:
+        done: List[str] = []
+        with self._session() as db:
+            try:
+                if revalidate:
+                    validation.validate_workshop(db, workshop_id)
+                    # validating can itself bump the revision; what it left is what was checked
+                    self.validated[workshop_id] = (
+                        db.query(models.Workshop.revision).filter(models.Workshop.id == workshop_id).scalar()
+                    )
+                    done.append("validated")
+                if snapshot:
+                    snapshots.write_snapshot(db, workshop_id)
+                    done.append("snapshotted")
+            except OperationalError as exc:
+                db.rollback()
+                if "locked" not in str(exc) and "busy" not in str(exc):
+                    raise
+                done.append("deferred")
+        return done
+
+    async def _wait_until_idle(self):
+        while self.active_requests:
+            await asyncio.sleep(IDLE_POLL_SECONDS)
+
+    @contextmanager
+    def _session(self) -> Iterator[Session]:
+        """A session on one connection held for the whole unit of work, with the short busy timeout."""
+        engine = self.engine_factory()
+        sqlite = engine.dialect.name == "sqlite"
+        with engine.connect() as connection:
+            if sqlite:
+                # the connection goes back to the pool for interactive requests, so keep its own timeout
+                restore = connection.exec_driver_sql("PRAGMA busy_timeout").scalar()
+                connection.exec_driver_sql(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+                connection.commit()
+            db = database.WorkshopSession(bind=connection, autoflush=False)
+            try:
+                yield db
+            finally:
+                db.close()
+                if sqlite:
+                    connection.exec_driver_sql(f"PRAGMA busy_timeout={restore}")
+                    connection.commit()
+
+    def status(self) -> Dict:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval": self.interval,
+            "snapshot_interval": self.snapshot_interval,
+            "concurrency": self.concurrency,
+            "active_requests": self.active_requests,
+            "tracked_workshops": len(self.validated),
+            "last_tick": self.last_tick,
+        }
+
+
+scheduler = Scheduler()
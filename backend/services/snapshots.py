@@ -0,0 +1,201 @@
+"""Point-in-time copies of a workshop's RACI assignments, stored as a base plus deltas.
+
+A snapshot row is either a ``base`` holding every non-blank cell or a
+``delta`` holding only the cells that changed since the previous snapshot
+(a removed cell is stored as blank). A new base is written every
+``SNAPSHOT_BASE_EVERY`` snapshots, or when a delta would be larger than half
+the matrix, so rebuilding a revision never reads more than one base and a
+bounded run of deltas.
+
+Cells are packed column-wise (all activity ids, then all role ids, then one
+byte per cell indexing the row's value table) and compressed with zlib.
+Sorted, mostly repeating ids compress to a few bytes per cell. ``blob_json``
+keeps only the small metadata: the kind, the value table and counts.
+
+Diffing two snapshots of the same chain only replays the deltas between them,
+and reads the earlier values of just those cells.
+"""
+import os
+import struct
+import zlib
+from datetime import datetime
+from typing import Collection, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from backend.db import models
+
+SNAPSHOT_BASE_EVERY = int(os.getenv("RACI_SNAPSHOT_BASE_EVERY", "20"))
+SNAPSHOT_FORMAT = 2
+BASE = "base"
+DELTA = "delta"
+
+Key = Tuple[int, int]
+# value None marks a cell removed since the previous snapshot
+Cells = Dict[Key, Optional[str]]
+Change = Tuple[int, int, Optional[str], Optional[str]]
+
+
+def current_cells(db: Session, workshop_id: int) -> Tuple[int, Cells]:
+    """The workshop's revision and its non-blank cells keyed by (activity_id, role_id)."""
+    revision = db.query(models.Workshop.revision).filter(models.Workshop.id == workshop_id).scalar()
+    if revision is None:
+        raise LookupError(f"Workshop {workshop_id} not found")
+    rows = db.query(models.Assignment.activity_id, models.Assignment.role_id, models.Assignment.raci_value).filter(
+        models.Assignment.workshop_id == workshop_id, models.Assignment.raci_value.isnot(None)
+    )
+    return revision, {(activity_id, role_id): value for activity_id, role_id, value in rows if value}
+
+
+def encode_cells(cells: Cells) -> Tuple[bytes, List[str]]:
+    """Compressed payload and value table for ``cells``."""
+    keys = sorted(cells)
+    values = sorted({value for value in cells.values() if value is not None})
+    if len(values) > 255:
+        raise ValueError("A snapshot holds at most 255 distinct cell values")
+    index = {value: i for i, value in enumerate(values, start=1)}
+    count = len(keys)
+    raw = b"".join(
+        (
+            struct.pack(f"<I{count}I", count, *(activity_id for activity_id, _ in keys)),
+            struct.pack(f"<{count}I", *(role_id for _, role_id in keys)),
+            bytes(index.get(cells[key], 0) for key in keys),
+        )
+    )
+    return zlib.compress(raw, 6), values
+
+
+def decode_cells(payload: bytes, values: List[str]) -> Iterator[Tuple[Key, Optional[str]]]:
+    raw = zlib.decompress(payload)
+    (count,) = struct.unpack_from("<I", raw)
+    activity_ids = struct.unpack_from(f"<{count}I", raw, 4)
+    role_ids = struct.unpack_from(f"<{count}I", raw, 4 + 4 * count)
+    codes = raw[4 + 8 * count :]
+    table = (None, *values)
+    for activity_id, role_id, code in zip(activity_ids, role_ids, codes):
+        yield (activity_id, role_id), table[code]
+
+
+def _cells_of(snapshot: models.Snapshot) -> Iterator[Tuple[Key, Optional[str]]]:
+    return decode_cells(snapshot.payload, snapshot.blob_json["values"])
+
+
+def _base_id(snapshot: models.Snapshot) -> int:
+    return snapshot.base_id if snapshot.kind == DELTA else snapshot.id
+
+
+def _chain(db: Session, snapshot: models.Snapshot, after_id: Optional[int] = None) -> List[models.Snapshot]:
+    """The snapshots to replay, in order, to rebuild ``snapshot``: its base and its deltas so far."""
+    base_id = _base_id(snapshot)
+    query = db.query(models.Snapshot).filter(
+        models.Snapshot.workshop_id == snapshot.workshop_id,
+        or_(models.Snapshot.id == base_id, models.Snapshot.base_id == base_id),
+        models.Snapshot.id <= snapshot.id,
+    )
+    if after_id is not None:
+        query = query.filter(models.Snapshot.id > after_id)
+    return query.order_by(models.Snapshot.id).all()
+
+
+def cells_at(db: Session, snapshot: models.Snapshot, keys: Optional[Collection[Key]] = None) -> Cells:
+    """Rebuild the cells captured by ``snapshot``, or only those in ``keys``."""
+    cells: Cells = {}
+    for row in _chain(db, snapshot):
+        if row.kind != DELTA:
+            cells.clear()
+        for key, value in _cells_of(row):
+            if keys is not None and key not in keys:
+                continue
+            if value is None:
+                cells.pop(key, None)
+            else:
+                cells[key] = value
+    return cells
+
+
+def latest_snapshot(db: Session, workshop_id: int) -> Optional[models.Snapshot]:
+    return (
+        db.query(models.Snapshot).filter(models.Snapshot.workshop_id == workshop_id).order_by(models.Snapshot.id.desc()).first()
+    )
+
+
+def write_snapshot(db: Session, workshop_id: int, base_every: int = SNAPSHOT_BASE_EVERY) -> models.Snapshot:
+    """Record the workshop's current cells; returns the newest snapshot unchanged if it is at this revision."""
+    revision, cells = current_cells(db, workshop_id)
+    previous = latest_snapshot(db, workshop_id)
+    if previous is not None and previous.revision == revision:
+        return previous
+
+    kind, changes, depth = BASE, cells, 0
+    if previous is not None:
+        depth = previous.blob_json["depth"] + 1
+        before = cells_at(db, previous)
+        delta = {key: value for key, value in cells.items() if before.get(key) != value}
+        delta.update((key, None) for key in before.keys() - cells.keys())
+        if depth < base_every and len(delta) * 2 <= len(cells):
+            kind, changes = DELTA, delta
+    if kind == BASE:
+        depth = 0
+    payload, values = encode_cells(changes)
+    snapshot = models.Snapshot(
+        workshop_id=workshop_id,
+        revision=revision,
+        kind=kind,
+        base_id=_base_id(previous) if kind == DELTA else None,
+        payload=payload,
+        blob_json={
+            "format": SNAPSHOT_FORMAT,
+            "kind": kind,
+            "depth": depth,
+            "cells": len(cells),
+            "changes": len(changes),
+            "values": values,
+        },
+    )
+    db.add(snapshot)
+    db.commit()
+    return snapshot
+
+
+def snapshot_at_revision(db: Session, workshop_id: int, revision: int) -> Optional[models.Snapshot]:
+    """The newest snapshot taken at or before ``revision``."""
+    return (
+        db.query(models.Snapshot)
+        .filter(models.Snapshot.workshop_id == workshop_id, models.Snapshot.revision <= revision)
+        .order_by(models.Snapshot.id.desc())
+        .first()
+    )
+
+
+def diff_snapshots(db: Session, older: models.Snapshot, newer: models.Snapshot) -> List[Change]:
+    """(activity_id, role_id, before, after) for every cell that differs between two snapshots."""
+    if older.id > newer.id:
+        return [(activity_id, role_id, after, before) for activity_id, role_id, before, after in diff_snapshots(db, newer, older)]
+    if _base_id(older) == _base_id(newer):
+        # same chain: only the cells the deltas in between touched can differ
+        after: Cells = {}
+        for row in _chain(db, newer, after_id=older.id):
+            after.update(_cells_of(row))
+        before = cells_at(db, older, keys=after.keys())
+    else:
+        before, after = cells_at(db, older), cells_at(db, newer)
+        after.update((key, None) for key in before.keys() - after.keys())
+    return [
+        (activity_id, role_id, before.get((activity_id, role_id)), value)
+        for (activity_id, role_id), value in sorted(after.items())
+        if before.get((activity_id, role_id)) != value
+    ]
+
+
+def list_snapshots(db: Session, workshop_id: int) -> List[models.Snapshot]:
+    return db.query(models.Snapshot).filter(models.Snapshot.workshop_id == workshop_id).order_by(models.Snapshot.id).all()
+
+
+def latest_snapshots(db: Session) -> Dict[int, Tuple[int, datetime]]:
+    """(revision, created_at) of every workshop's newest snapshot, in one query."""
+    newest = db.query(func.max(models.Snapshot.id)).group_by(models.Snapshot.workshop_id).subquery()
+    rows = db.query(models.Snapshot.workshop_id, models.Snapshot.revision, models.Snapshot.created_at).filter(
+        models.Snapshot.id.in_(newest.select())
+    )
+    return {workshop_id: (revision, created_at) for workshop_id, revision, created_at in rows}
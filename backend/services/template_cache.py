@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from backend.services.excel_ingest import PARSER_VERSION, ParsedTemplate, hash_file
+
+CACHE_DIR = Path(__file__).resolve().parent.parent.parent / "data" / "template_cache"
+
+
+class TemplateParseCache:
+    """Parsed templates keyed by (file hash, parser version): an in-process LRU over a JSON store on disk."""
+
+    def __init__(self, directory: Path = CACHE_DIR, max_entries: int = 32, parser_version: str = PARSER_VERSION):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.parser_version = parser_version
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, file_hash: str) -> Path:
+        return self.directory / f"{file_hash}.v{self.parser_version}.json"
+
+    def _remember(self, file_hash: str, serialized: str):
+        with self._lock:
+            self._entries[file_hash] = serialized
+            self._entries.move_to_end(file_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, file_hash: str) -> Optional[Dict]:
+        with self._lock:
+            serialized = self._entries.get(file_hash)
+            if serialized is not None:
+                self._entries.move_to_end(file_hash)
+        if serialized is None:
+            path = self._path(file_hash)
+            if not path.exists():
+                return None
+            serialized = path.read_text(encoding="utf-8")
+            self._remember(file_hash, serialized)
+        return json.loads(serialized)
+
+    def put(self, file_hash: str, parsed: Dict) -> Dict:
+        serialized = json.dumps(parsed)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self._path(file_hash)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(serialized, encoding="utf-8")
+        os.replace(tmp, target)
+        self._remember(file_hash, serialized)
+        return json.loads(serialized)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+default_cache = TemplateParseCache()
+
+
+def parse_template_cached(path: Path, cache: TemplateParseCache = default_cache) -> Dict:
+    """Parse a template, reusing the stored result when an identical workbook was parsed before.
+
+    Results are JSON round-tripped on both paths so hits and misses look the same
+    (``cell_map`` coordinates are lists, as they are once stored in ``Template.parsed_json``).
+    Nothing calls it yet: ``/api/template/parse`` does not parse uploads so far.
+    """
+    file_hash = hash_file(path)
+    cached = cache.get(file_hash)
+    if cached is not None:
+        return cached
+    parser = ParsedTemplate(path)
+    try:
+        parsed = parser.parse(file_hash=file_hash)
+    finally:
+        parser.close()
+    return cache.put(file_hash, parsed)
@@ -1,97 +1,121 @@
-from collections import defaultdict
-from typing import Dict, List
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, insert, update
 from sqlalchemy.orm import Session
 
 from backend.db import models
+from backend.services.rules import CompiledRules, Finding, registry as rule_registry
 
+ENABLED_RULES = ("exactly_one_A", "at_least_one_R", "communication_gap")
+# rule finding kinds that this schema records under another issue_type
+ISSUE_TYPES = {"multiple_A": "too_many_A", "no_R": "missing_R"}
 
-MANDATORY_RULES = {
-    "accountable_exactly_one": True,
-    "responsible_at_least_one": True,
+# issue_type -> (description, recommendation, severity)
+ISSUE_TEXT = {
+    "missing_A": ("Accountable role not selected", "Choose exactly one Accountable for this activity.", "high"),
+    "too_many_A": ("Multiple Accountable roles detected", "Confirm a single Accountable and move others to R/C/I.", "high"),
+    "missing_R": ("Responsible role missing", "Assign at least one Responsible role to do the work.", "high"),
+    "communication_gap": (
+        "Responsibilities defined without Inform recipients",
+        "Identify who must be Informed when work is performed.",
+        "medium",
+    ),
 }
 
 
-def compute_activity_status(assignments: List[models.Assignment]):
-    counts = defaultdict(int)
-    for assignment in assignments:
-        value = (assignment.raci_value or "").upper()
-        if value:
-            counts[value] += 1
+def activity_counts(db: Session, workshop_id: int) -> Dict[int, Counter]:
+    """R/A/C/I counts per activity from one query grouped by activity and value."""
+    value = func.upper(func.trim(models.Assignment.raci_value))
+    rows = (
+        db.query(models.Assignment.activity_id, value, func.count())
+        .filter(models.Assignment.workshop_id == workshop_id, models.Assignment.raci_value.isnot(None))
+        .group_by(models.Assignment.activity_id, value)
+    )
+    counts: Dict[int, Counter] = defaultdict(Counter)
+    for activity_id, raci_value, count in rows:
+        if raci_value:
+            counts[activity_id][raci_value] += count
     return counts
 
 
-def validate_workshop(db: Session, workshop_id: int) -> Dict:
-    created_issues: List[models.Issue] = []
-    summary = defaultdict(int)
+def open_issue_keys(db: Session, workshop_id: int) -> Set[Tuple[int, str]]:
+    rows = db.query(models.Issue.activity_id, models.Issue.issue_type).filter(
+        models.Issue.workshop_id == workshop_id, models.Issue.status == "open"
+    )
+    return {(activity_id, issue_type) for activity_id, issue_type in rows}
+
+
+def _issue_payload(workshop_id: int, domain_id: int, finding: Finding) -> Dict:
+    issue_type = ISSUE_TYPES.get(finding.kind, finding.kind)
+    description, recommendation, severity = ISSUE_TEXT.get(issue_type, (finding.notes, None, finding.severity.lower()))
+    return {
+        "workshop_id": workshop_id,
+        "domain_id": domain_id,
+        "activity_id": finding.activity_id,
+        "issue_type": issue_type,
+        "description": description,
+        "recommendation": recommendation,
+        "severity": severity,
+        "status": "open",
+    }
+
 
+def insert_issues(db: Session, workshop_id: int, payloads: Iterable[Dict]) -> List[int]:
+    """Bulk insert issue rows and return their ids in one round trip; no commit.
+
+    Core inserts skip the ORM flush hook, so the workshop revision is bumped here.
+    """
+    payloads = list(payloads)
+    if not payloads:
+        return []
+    table = models.Issue.__table__
+    ids = sorted(db.scalars(insert(table).returning(table.c.id), payloads))
+    db.execute(
+        update(models.Workshop)
+        .where(models.Workshop.id == workshop_id)
+        .values(revision=models.Workshop.revision + 1)
+        .execution_options(synchronize_session=False)
+    )
+    return ids
+
+
+def validate_workshop(
+    db: Session, workshop_id: int, skip_open_duplicates: bool = True, rules: Optional[CompiledRules] = None
+) -> Dict:
+    """Check every activity of the workshop and record the issues found.
+
+    Runs a fixed number of queries whatever the workshop size: activities,
+    grouped assignment counts, open issues, one bulk insert and one read-back.
+    The activity rules (``ENABLED_RULES`` unless ``rules`` is given) run over
+    the counts in one pass. With ``skip_open_duplicates``, an issue already open
+    for the same activity and type is not recorded again, so repeated runs do
+    not grow the table.
+    """
+    if rules is None:
+        rules = rule_registry.compile(ENABLED_RULES)
+    summary = defaultdict(int)
     activities = (
-        db.query(models.Activity)
+        db.query(models.Activity.id, models.Activity.domain_id)
         .filter(models.Activity.workshop_id == workshop_id)
         .order_by(models.Activity.order_index)
         .all()
     )
+    counts = activity_counts(db, workshop_id)
+    existing = open_issue_keys(db, workshop_id) if skip_open_duplicates else set()
+
+    domain_of = dict(activities)
+    findings = rules.evaluate_activities((activity_id, counts.get(activity_id, Counter()), None) for activity_id, _ in activities)
+    payloads = []
+    for finding in findings:
+        payload = _issue_payload(workshop_id, domain_of[finding.activity_id], finding)
+        if (finding.activity_id, payload["issue_type"]) in existing:
+            summary["duplicates_skipped"] += 1
+            continue
+        payloads.append(payload)
 
-    for activity in activities:
-        assignments = (
-            db.query(models.Assignment)
-            .filter(models.Assignment.activity_id == activity.id)
-            .all()
-        )
-        counts = compute_activity_status(assignments)
-        if MANDATORY_RULES["accountable_exactly_one"]:
-            if counts.get("A", 0) == 0:
-                created_issues.append(
-                    models.Issue(
-                        workshop_id=workshop_id,
-                        domain_id=activity.domain_id,
-                        activity_id=activity.id,
-                        issue_type="missing_A",
-                        description="Accountable role not selected",
-                        recommendation="Choose exactly one Accountable for this activity.",
-                        severity="high",
-                    )
-                )
-            elif counts.get("A", 0) > 1:
-                created_issues.append(
-                    models.Issue(
-                        workshop_id=workshop_id,
-                        domain_id=activity.domain_id,
-                        activity_id=activity.id,
-                        issue_type="too_many_A",
-                        description="Multiple Accountable roles detected",
-                        recommendation="Confirm a single Accountable and move others to R/C/I.",
-                        severity="high",
-                    )
-                )
-        if MANDATORY_RULES["responsible_at_least_one"] and counts.get("R", 0) == 0:
-            created_issues.append(
-                models.Issue(
-                    workshop_id=workshop_id,
-                    domain_id=activity.domain_id,
-                    activity_id=activity.id,
-                    issue_type="missing_R",
-                    description="Responsible role missing",
-                    recommendation="Assign at least one Responsible role to do the work.",
-                    severity="high",
-                )
-            )
-        if counts.get("R", 0) and not counts.get("I", 0):
-            created_issues.append(
-                models.Issue(
-                    workshop_id=workshop_id,
-                    domain_id=activity.domain_id,
-                    activity_id=activity.id,
-                    issue_type="communication_gap",
-                    description="Responsibilities defined without Inform recipients",
-                    recommendation="Identify who must be Informed when work is performed.",
-                    severity="medium",
-                )
-            )
-
-    for issue in created_issues:
-        db.add(issue)
+    ids = insert_issues(db, workshop_id, payloads)
     db.commit()
-    for issue in created_issues:
-        db.refresh(issue)
+    created_issues = db.query(models.Issue).filter(models.Issue.id.in_(ids)).order_by(models.Issue.id).all() if ids else []
     summary["issues_created"] = len(created_issues)
     return {"created": created_issues, "summary": summary}
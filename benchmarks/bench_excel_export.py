@@ -0,0 +1,113 @@
+"""Benchmark fill_workbook_from_assignments across template sizes.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_excel_export [--roles 60] [--sizes 625 1250 2500 5000]
+
+Each run builds an in-memory database and a template workbook with
+``activities x roles`` matrix cells, then times the fill. Per-cell cost should
+stay flat as the template grows.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+os.environ.setdefault("RACI_DATABASE_URL", "sqlite://")
+
+from openpyxl import Workbook  # noqa: E402
+
+from backend.db import models  # noqa: E402
+from backend.db import database  # noqa: E402
+from backend.services.excel_export import fill_workbook_from_assignments  # noqa: E402
+
+SHEET = "APPLICATIONS RACI"
+VALUES = "RACI"
+
+
+def build_fixture(db, workdir: Path, activity_count: int, role_count: int):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = SHEET
+    role_names = [f"Role {c}" for c in range(role_count)]
+    sheet.append(["Activity", *role_names])
+
+    workshop = models.Workshop(template_id=1, workshop_name="bench")
+    db.add(workshop)
+    db.flush()
+    domain = models.Domain(workshop_id=workshop.id, sheet_name=SHEET, display_name=SHEET)
+    db.add(domain)
+    db.flush()
+    db.bulk_insert_mappings(
+        models.Role,
+        [{"workshop_id": workshop.id, "domain_id": domain.id, "role_name": name, "role_key": name} for name in role_names],
+    )
+    db.bulk_insert_mappings(
+        models.Activity,
+        [{"workshop_id": workshop.id, "domain_id": domain.id, "activity_text": f"Activity {r}"} for r in range(activity_count)],
+    )
+    role_ids = [rid for (rid,) in db.query(models.Role.id).order_by(models.Role.id)]
+    activity_ids = [aid for (aid,) in db.query(models.Activity.id).order_by(models.Activity.id)]
+    db.bulk_insert_mappings(
+        models.Assignment,
+        [
+            {
+                "workshop_id": workshop.id,
+                "domain_id": domain.id,
+                "activity_id": activity_id,
+                "role_id": role_id,
+                "raci_value": VALUES[(r + c) % len(VALUES)],
+            }
+            for r, activity_id in enumerate(activity_ids)
+            for c, role_id in enumerate(role_ids)
+        ],
+    )
+    db.commit()
+
+    activities = []
+    for r in range(activity_count):
+        sheet.append([f"Activity {r}"])
+        activities.append(
+            {
+                "domain": SHEET,
+                "activity_text": f"Activity {r}",
+                "cell_map": {name: (r + 2, c + 2) for c, name in enumerate(role_names)},
+            }
+        )
+    template_path = workdir / f"template_{activity_count}.xlsx"
+    workbook.save(template_path)
+    return workshop.id, template_path, {"activities": activities}
+
+
+def run(sizes, role_count: int, row_major: bool):
+    print(f"{'activities':>10} {'roles':>6} {'cells':>9} {'seconds':>9} {'us/cell':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        for activity_count in sizes:
+            engine = database.get_engine()
+            database.Base.metadata.drop_all(bind=engine)
+            database.Base.metadata.create_all(bind=engine)
+            with database.SessionLocal() as db:
+                workshop_id, template_path, template_data = build_fixture(db, workdir, activity_count, role_count)
+                started = time.perf_counter()
+                fill_workbook_from_assignments(
+                    template_path, template_data, db, workshop_id, row_major=row_major, export_dir=workdir
+                )
+                elapsed = time.perf_counter() - started
+            cells = activity_count * role_count
+            print(f"{activity_count:>10} {role_count:>6} {cells:>9} {elapsed:>9.2f} {elapsed / cells * 1e6:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--roles", type=int, default=60)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[625, 1250, 2500, 5000])
+    parser.add_argument("--row-major", action="store_true", help="write cells per sheet in row-major order")
+    args = parser.parse_args()
+    run(args.sizes, args.roles, args.row_major)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Add the columns and indexes a database file is missing compared with a ``MetaData``.
+
+``MetaData.create_all`` only creates missing tables, so a file created before a
+column or index was added to the models never gets it. Each app's
+``migrations`` module calls ``upgrade`` with its own metadata and any data
+fixes of its own.
+"""
+from typing import Callable, Iterable, List, Mapping, Optional
+
+from sqlalchemy import Column, Index, MetaData, inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+
+def missing_columns(engine: Engine, metadata: MetaData) -> List[Column]:
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(column for column in table.columns if column.name not in existing)
+    return missing
+
+
+def missing_indexes(engine: Engine, metadata: MetaData) -> List[Index]:
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    missing = []
+    for table in metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        missing.extend(index for index in sorted(table.indexes, key=lambda i: i.name) if index.name not in existing)
+    return missing
+
+
+def add_column(conn: Connection, column: Column):
+    # new columns must be nullable or carry a server default so existing rows stay valid
+    ddl = f"ALTER TABLE {column.table.name} ADD COLUMN {column.name} {column.type.compile(conn.dialect)}"
+    if column.server_default is not None:
+        ddl += f" DEFAULT {column.server_default.arg}"
+    if not column.nullable:
+        ddl += " NOT NULL"
+    conn.execute(text(ddl))
+
+
+def upgrade(
+    engine: Engine,
+    metadata: MetaData,
+    prepare: Optional[Mapping[str, Callable[[Connection], None]]] = None,
+    obsolete_indexes: Iterable[str] = (),
+    analyze: bool = False,
+) -> List[str]:
+    """Add missing columns and indexes and return their names.
+
+    ``prepare`` maps an index name to a data fix run just before the index is
+    built; ``obsolete_indexes`` are dropped when found. With ``analyze``,
+    SQLite's planner statistics are refreshed afterwards.
+    """
+    columns = missing_columns(engine, metadata)
+    indexes = missing_indexes(engine, metadata)
+    if not columns and not indexes:
+        return []
+    prepare = prepare or {}
+    with engine.begin() as conn:
+        for column in columns:
+            add_column(conn, column)
+        for index in indexes:
+            if index.name in prepare:
+                prepare[index.name](conn)
+            index.create(bind=conn)
+        for name in obsolete_indexes:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        if analyze and engine.dialect.name == "sqlite":
+            conn.execute(text("ANALYZE"))
+    return [f"{column.table.name}.{column.name}" for column in columns] + [index.name for index in indexes]
@@ -0,0 +1,40 @@
+"""SQLite PRAGMA profiles and the connect hook that applies them, shared by the app and backend engines."""
+from typing import Dict
+
+from sqlalchemy import event
+
+# WAL lets readers run alongside the single writer; busy_timeout waits out the write lock
+SQLITE_PROFILES: Dict[str, Dict[str, object]] = {
+    "default": {},
+    "production": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "cache_size": -65536,  # KiB, i.e. 64 MiB per connection
+        "mmap_size": 268435456,
+        "temp_store": "MEMORY",
+    },
+}
+# pragmas that write to the database file cannot run on read-only connections
+WRITE_PRAGMAS = {"journal_mode"}
+
+
+def apply_sqlite_profile(engine, profile: str, read_only: bool = False):
+    """Run the profile's PRAGMAs on every new connection of ``engine``."""
+    try:
+        pragmas = SQLITE_PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"Unknown SQLite profile {profile!r}; expected one of {sorted(SQLITE_PROFILES)}")
+    if read_only:
+        pragmas = {**{k: v for k, v in pragmas.items() if k not in WRITE_PRAGMAS}, "query_only": "ON"}
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
@@ -55,7 +55,7 @@ class Worksheet:
         for r in range(min_row, max_row + 1):
             row_values = []
             for c in range(1, max_col + 1):
-                cell = self._cells.get((r, c))
+                cell = self._cells.get((r, c), Cell())
                 row_values.append(cell.value if values_only else cell)
             yield tuple(row_values)
 
@@ -89,6 +89,9 @@ class Workbook:
         payload = {name: {"cells": {f"{r}:{c}": cell.value for (r, c), cell in ws._cells.items()}} for name, ws in self._sheets.items()}
         path.write_text(json.dumps(payload))
 
+    def close(self):
+        pass
+
     @classmethod
     def load(cls, filename):
         path = Path(filename)
@@ -105,5 +108,5 @@ class Workbook:
         return wb
 
 
-def load_workbook(filename, data_only: bool = False):  # noqa: ARG001
+def load_workbook(filename, read_only: bool = False, data_only: bool = False):  # noqa: ARG001
     return Workbook.load(filename)
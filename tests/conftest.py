@@ -0,0 +1,35 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# appended, not prepended, so an installed fastapi wins over the stub package at the repository root
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("RACI_DATABASE_URL", "sqlite://")
+
+from app import database as app_database  # noqa: E402
+from backend.db import database as backend_database  # noqa: E402
+
+
+def _fresh_session(database):
+    database.Base.metadata.drop_all(bind=database.engine)
+    database.Base.metadata.create_all(bind=database.engine)
+    session = database.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture()
+def db():
+    """Session on an empty ``app`` database."""
+    yield from _fresh_session(app_database)
+
+
+@pytest.fixture()
+def backend_db():
+    """Session on an empty ``backend`` database."""
+    yield from _fresh_session(backend_database)
@@ -0,0 +1,38 @@
+"""Workshops seeded through the app's crud layer or directly as backend models."""
+from app import crud
+from backend.db import models
+
+
+def seed_workshop(db, activity_count=3, role_count=3):
+    """An app organization with one domain, ``role_count`` roles, ``activity_count`` activities and a workshop."""
+    org = crud.create_organization(db, {"name": "Contoso"})
+    domain = crud.create_domain(db, {"name": "Applications", "organization_id": org.id})
+    roles = [crud.create_role(db, {"name": f"Role {i}", "organization_id": org.id}) for i in range(role_count)]
+    activities = [crud.create_activity(db, {"name": f"Activity {i}", "domain_id": domain.id}) for i in range(activity_count)]
+    workshop = crud.create_workshop(db, {"organization_id": org.id, "name": "Current state"})
+    return workshop, activities, roles
+
+
+def seed_backend_workshop(db, activity_count=3, role_count=3, name="Current state", template=None):
+    """A backend workshop with one domain; returns (workshop, domain, activities, roles)."""
+    template = template or models.Template(name="OT RACI", uploaded_filename="template.xlsx", file_hash="abc", parsed_json={})
+    workshop = models.Workshop(template=template, org_name="Contoso", workshop_name=name)
+    domain = models.Domain(workshop=workshop, sheet_name="APPLICATIONS RACI", display_name="Applications")
+    roles = [
+        models.Role(workshop=workshop, domain=domain, role_name=f"Role {i}", role_key=f"role_{i}") for i in range(role_count)
+    ]
+    activities = [
+        models.Activity(workshop=workshop, domain=domain, activity_text=f"Activity {i}", order_index=i) for i in range(activity_count)
+    ]
+    db.add_all([template, workshop, domain, *roles, *activities])
+    db.commit()
+    return workshop, domain, activities, roles
+
+
+def seed_backend_cell(db, value="A", name="Current state", template=None):
+    """A backend workshop with a single activity and role and one assignment; returns (workshop, assignment)."""
+    workshop, domain, (activity,), (role,) = seed_backend_workshop(db, 1, 1, name=name, template=template)
+    assignment = models.Assignment(workshop=workshop, domain_id=domain.id, activity=activity, role=role, raci_value=value)
+    db.add(assignment)
+    db.commit()
+    return workshop, assignment
@@ -0,0 +1,87 @@
+import csv
+import io
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import crud, main, services
+from backend.services.export_cache import ExportCache
+from factories import seed_workshop
+
+
+@pytest.fixture()
+def client(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "export_cache", ExportCache(tmp_path / "exports"))
+    return TestClient(main.app)
+
+
+def rows_of(response):
+    return list(csv.reader(io.StringIO(response.text)))
+
+
+def test_csv_exports_stream_every_row_and_serve_the_cached_copy(db, client, monkeypatch):
+    workshop, activities, roles = seed_workshop(db, activity_count=3, role_count=2)
+    for activity in activities:
+        crud.upsert_workshop_raci(db, {"workshop_id": workshop.id, "activity_id": activity.id, "role_id": roles[0].id, "value": "R"})
+    services.validate_workshop(db, workshop.id)
+    crud.add_actions_for_unactioned_issues(db, workshop.id)
+    db.commit()
+    monkeypatch.setattr(main, "CSV_CHUNK_ROWS", 1)
+
+    raci = client.get(f"/workshops/{workshop.id}/export/raci")
+    assert raci.status_code == 200 and raci.headers["content-type"].startswith("text/plain")
+    assert rows_of(raci) == [["Activity", "Role 0", "Role 1"]] + [[activity.name, "R", ""] for activity in activities]
+
+    gaps = rows_of(client.get(f"/workshops/{workshop.id}/export/gaps"))
+    assert gaps[0] == ["Activity ID", "Role ID", "Type", "Severity", "Notes"]
+    assert sorted((int(row[0]), row[2]) for row in gaps[1:]) == [(activity.id, "missing_A") for activity in activities]
+    actions = rows_of(client.get(f"/workshops/{workshop.id}/export/actions"))
+    assert actions[0] == ["Summary", "Owner Role", "Status", "Priority", "Due Date", "Issue ID"]
+    assert len(actions) == len(gaps)
+
+    # the same revision is served from the cache without rendering again
+    with monkeypatch.context() as patch:
+        patch.setattr(main, "_raci_matrix_csv", lambda workshop_id: pytest.fail("cached export was rendered again"))
+        cached = client.get(f"/workshops/{workshop.id}/export/raci")
+    assert cached.status_code == 200 and cached.text == raci.text
+
+    crud.upsert_workshop_raci(db, {"workshop_id": workshop.id, "activity_id": activities[0].id, "role_id": roles[1].id, "value": "A"})
+    assert rows_of(client.get(f"/workshops/{workshop.id}/export/raci"))[1] == [activities[0].name, "R", "A"]
+
+
+def test_list_endpoints_answer_304_while_the_table_is_unchanged(db, client):
+    workshop, _, _ = seed_workshop(db, role_count=2)
+    first = client.get("/roles", params={"organization_id": workshop.organization_id})
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and len(first.json()) == 2
+
+    for tag in (etag, etag[2:], f'"other", {etag}'):
+        repeat = client.get("/roles", params={"organization_id": workshop.organization_id}, headers={"If-None-Match": tag})
+        assert repeat.status_code == 304 and repeat.content == b"" and repeat.headers["etag"] == etag
+
+    client.post("/roles", json={"name": "Role 2", "organization_id": workshop.organization_id})
+    changed = client.get("/roles", params={"organization_id": workshop.organization_id}, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag and len(changed.json()) == 3
+
+
+def test_list_pages_follow_x_next_cursor_with_sparse_fields(db, client):
+    workshop, _, roles = seed_workshop(db, role_count=5)
+    params = {"organization_id": workshop.organization_id, "limit": 2, "fields": "name"}
+    seen, pages = [], 0
+    while True:
+        response = client.get("/roles", params=params)
+        assert response.status_code == 200 and response.headers["etag"]
+        seen.extend(response.json())
+        pages += 1
+        if "x-next-cursor" not in response.headers:
+            break
+        params["cursor"] = response.headers["x-next-cursor"]
+    assert pages == 3
+    assert seen == [{"id": role.id, "name": role.name} for role in roles]
+
+
+def test_list_endpoints_reject_unknown_fields_and_bad_cursors(db, client):
+    unknown = client.get("/roles", params={"fields": "name,salary"})
+    assert unknown.status_code == 400 and unknown.json()["detail"] == "Unknown fields: salary"
+    assert client.get("/roles", params={"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get("/workshops", params={"cursor": "1.2"}).status_code == 400
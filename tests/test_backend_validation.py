@@ -0,0 +1,55 @@
+import os
+import sys
+from pathlib import Path
+
+from sqlalchemy import event
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("RACI_DATABASE_URL", "sqlite://")
+
+from backend.db import models  # noqa: E402
+from backend.db.database import engine  # noqa: E402
+from backend.services import validation  # noqa: E402
+from factories import seed_backend_workshop  # noqa: E402
+
+
+def test_validate_workshop_in_fixed_queries_and_skips_open_duplicates(backend_db):
+    workshop, domain, activities, roles = seed_backend_workshop(backend_db, activity_count=20)
+    first, second = activities[:2]
+    cells = [(first, roles[0], "r"), (first, roles[1], "A"), (first, roles[2], "I"), (second, roles[0], "A"), (second, roles[1], "A")]
+    backend_db.add_all(
+        models.Assignment(workshop=workshop, domain_id=domain.id, activity=activity, role=role, raci_value=value)
+        for activity, role, value in cells
+    )
+    backend_db.commit()
+    revision = workshop.revision
+
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        result = validation.validate_workshop(backend_db, workshop.id)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert len(statements) <= 8
+
+    found = {(issue.activity_id, issue.issue_type) for issue in result["created"]}
+    assert (first.id, "missing_A") not in found and (first.id, "missing_R") not in found
+    assert {(second.id, "too_many_A"), (second.id, "missing_R")} <= found
+    assert {(activities[-1].id, "missing_A"), (activities[-1].id, "missing_R")} <= found
+    assert not any(issue_type == "communication_gap" for _, issue_type in found)
+    assert result["summary"]["issues_created"] == len(found) == 2 + 2 * 18
+    backend_db.refresh(workshop)
+    assert workshop.revision > revision
+
+    again = validation.validate_workshop(backend_db, workshop.id)
+    assert again["created"] == [] and again["summary"]["duplicates_skipped"] == len(found)
+
+    result["created"][0].status = "resolved"
+    backend_db.commit()
+    reopened = validation.validate_workshop(backend_db, workshop.id)
+    assert [(issue.activity_id, issue.issue_type) for issue in reopened["created"]] == [
+        (result["created"][0].activity_id, result["created"][0].issue_type)
+    ]
+    assert len(validation.validate_workshop(backend_db, workshop.id, skip_open_duplicates=False)["created"]) == len(found)
@@ -0,0 +1,72 @@
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.broadcast import CLOSE_TRY_AGAIN_LATER, BroadcastHub  # noqa: E402
+
+
+class FakeSocket:
+    def __init__(self, stall: bool = False):
+        self.sent = []
+        self.closed_with = None
+        self.stall = stall
+        self.incoming: asyncio.Queue = asyncio.Queue()
+
+    async def send_json(self, message):
+        if self.stall and message["type"] != "hello":
+            await asyncio.sleep(3600)
+        self.sent.append(message)
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+def cell(activity_id, role_id, value):
+    return {"workshop_id": 1, "activity_id": activity_id, "role_id": role_id, "value": value, "source": "workshop"}
+
+
+def test_hub_coalesces_batches_and_isolates_slow_consumers():
+    async def scenario():
+        hub = BroadcastHub(batch_window=0.05, max_pending=3, send_timeout=0.1)
+        fast, slow, other = FakeSocket(), FakeSocket(stall=True), FakeSocket()
+        serving = [
+            asyncio.ensure_future(hub.serve(fast, 1, hello={"type": "hello"})),
+            asyncio.ensure_future(hub.serve(slow, 1)),
+            asyncio.ensure_future(hub.serve(other, 2)),
+        ]
+        await asyncio.sleep(0.01)
+        assert hub.subscriber_count(1) == 2 and hub.subscriber_count() == 3
+
+        def edit():
+            for value in "RACI":
+                hub.publish(1, [cell(1, 1, value)])
+            hub.publish(1, [cell(2, 1, "A")])
+
+        # published from a request thread, as crud does
+        publisher = threading.Thread(target=edit)
+        publisher.start()
+        publisher.join()
+        await asyncio.sleep(0.2)
+        assert fast.sent == [
+            {"type": "hello"},
+            {"type": "cells", "workshop_id": 1, "cells": [{"activity_id": 1, "role_id": 1, "value": "I"}, {"activity_id": 2, "role_id": 1, "value": "A"}]},
+        ]
+        assert other.sent == []
+        assert slow.closed_with == CLOSE_TRY_AGAIN_LATER and hub.subscriber_count(1) == 1
+
+        hub.publish(1, [cell(a, 1, "R") for a in range(5)])
+        await asyncio.sleep(0.1)
+        assert fast.sent[-1] == {"type": "resync", "workshop_id": 1}
+
+        await fast.incoming.put({"type": "websocket.disconnect"})
+        await other.incoming.put({"type": "websocket.disconnect"})
+        await asyncio.wait_for(asyncio.gather(*serving), 1)
+        assert hub.subscriber_count() == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,200 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("RACI_DATABASE_URL", "sqlite://")
+
+from app import crud, models  # noqa: E402
+
+
+def test_bulk_upsert_workshop_raci_inserts_and_updates(db):
+    rows = [{"workshop_id": 1, "activity_id": a, "role_id": r, "value": "R"} for a in range(1, 4) for r in range(1, 3)]
+    created = crud.bulk_upsert_workshop_raci(db, rows)
+    assert len(created) == 6
+
+    updated = crud.bulk_upsert_workshop_raci(
+        db,
+        [
+            {"workshop_id": 1, "activity_id": 1, "role_id": 1, "value": "C"},
+            {"workshop_id": 1, "activity_id": 1, "role_id": 1, "value": "A", "source": "paste"},
+            {"workshop_id": 1, "activity_id": 9, "role_id": 1, "value": "I"},
+        ],
+    )
+    assert [(cell["activity_id"], cell["value"], cell["source"]) for cell in updated] == [(1, "A", "paste"), (9, "I", "workshop")]
+    assert updated[0]["id"] == created[0]["id"]
+    assert db.query(models.WorkshopRACI).count() == 7
+
+
+def test_bulk_upsert_workshop_raci_empty(db):
+    assert crud.bulk_upsert_workshop_raci(db, []) == []
+
+
+def test_role_load_summary_tracks_cell_writes(db):
+    import random
+
+    rng = random.Random(3)
+    for _ in range(200):
+        cell = {"workshop_id": 1, "activity_id": rng.randint(1, 6), "role_id": rng.randint(1, 4), "value": rng.choice(["R", "A", "C", "I", None])}
+        if rng.random() < 0.5:
+            crud.upsert_workshop_raci(db, cell)
+        else:
+            crud.bulk_upsert_workshop_raci(db, [cell, {**cell, "activity_id": cell["activity_id"] + 6}])
+
+    def snapshot():
+        return [
+            (row.role_id, row.count_r, row.count_a, row.count_c, row.count_i, row.count_none, row.last_activity_id)
+            for row in crud.list_role_load(db, 1)
+        ]
+
+    maintained = snapshot()
+    crud.refresh_role_load_summary(db, 1)
+    assert maintained == snapshot()
+    assert sum(sum(row[1:6]) for row in maintained) == db.query(models.WorkshopRACI).count()
+
+
+def test_workshop_revision_bumps_on_exported_writes(db):
+    org = crud.create_organization(db, {"name": "Contoso"})
+    domain = crud.create_domain(db, {"name": "Applications", "organization_id": org.id})
+    workshop = crud.create_workshop(db, {"organization_id": org.id, "name": "Current state"})
+    other = crud.create_workshop(db, {"organization_id": org.id + 1, "name": "Elsewhere"})
+    revisions = [workshop.revision]
+
+    def bumped():
+        db.refresh(workshop)
+        revisions.append(workshop.revision)
+        return revisions[-1] > revisions[-2]
+
+    role = crud.create_role(db, {"name": "CIO", "organization_id": org.id})
+    assert bumped()
+    activity = crud.create_activity(db, {"name": "Select vendor", "domain_id": domain.id})
+    assert bumped()
+    cell = {"workshop_id": workshop.id, "activity_id": activity.id, "role_id": role.id, "value": "R"}
+    crud.upsert_workshop_raci(db, cell)
+    assert bumped()
+    crud.bulk_upsert_workshop_raci(db, [{**cell, "value": "A"}])
+    assert bumped()
+    crud.add_issue(db, {"workshop_id": workshop.id, "activity_id": activity.id, "type": "missing_r"})
+    assert bumped()
+    assert crud.add_actions_for_unactioned_issues(db, workshop.id) == 1
+    assert bumped()
+    assert crud.add_actions_for_unactioned_issues(db, workshop.id) == 0
+    assert not bumped()
+    crud.add_action_item(db, {"workshop_id": workshop.id, "summary": "Follow up", "issue_id": None})
+    assert bumped()
+    crud.delete_issues(db, workshop.id)
+    assert bumped()
+    crud.list_issues(db, workshop.id)
+    assert not bumped()
+    db.refresh(other)
+    assert other.revision == 0
+
+
+def test_import_payload_bulk_inserts_and_validates_first(db):
+    import json
+
+    from app import schemas, services
+
+    data = json.loads((Path(__file__).resolve().parent.parent / "examples" / "seattle_city_light_import.json").read_text())
+    organization, timings = services.import_payload(db, schemas.ImportPayload(**data))
+    assert organization.name == "Seattle City Light"
+    assert set(timings) == {"validate", "organization", "domains", "roles", "activities", "recommended", "commit"}
+    assert len(crud.list_activities(db)) == len(data["activities"])
+    recommended = crud.list_recommended(db)
+    assert len(recommended) == len(data["recommended"])
+    first = data["recommended"][0]
+    activity = db.get(models.Activity, recommended[0].activity_id)
+    assert (activity.name, db.get(models.Role, recommended[0].role_id).name) == (first["activity_name"], first["role_name"])
+
+    data["recommended"].append({"activity_name": "Unknown", "role_name": "CIO", "value": "A"})
+    with pytest.raises(services.ImportValidationError):
+        services.import_payload(db, schemas.ImportPayload(**data))
+    assert len(crud.list_organizations(db)) == 1
+
+
+def test_sqlite_profile_and_read_only_connections(tmp_path):
+    from sqlalchemy import create_engine, exc, text
+
+    from app.database import apply_sqlite_profile
+
+    url = f"sqlite:///{tmp_path / 'raci.db'}"
+    writer = create_engine(url)
+    apply_sqlite_profile(writer, "production")
+    with writer.begin() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+
+    reader = create_engine(f"sqlite:///file:{tmp_path / 'raci.db'}?mode=ro&uri=true")
+    apply_sqlite_profile(reader, "production", read_only=True)
+    with reader.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 0
+        with pytest.raises(exc.OperationalError):
+            conn.execute(text("INSERT INTO t VALUES (1)"))
+
+    with pytest.raises(ValueError):
+        apply_sqlite_profile(writer, "turbo")
+    writer.dispose()
+    reader.dispose()
+
+
+
+def test_table_versions_track_list_writes(db):
+    assert crud.get_table_version(db, models.Organization) == 0
+    org = crud.create_organization(db, {"name": "Contoso"})
+    crud.create_organization(db, {"name": "Fabrikam"})
+    domain = crud.create_domain(db, {"name": "Applications", "organization_id": org.id})
+    crud.create_activity(db, {"name": "Select vendor", "domain_id": domain.id})
+    versions = {model: crud.get_table_version(db, model) for model in (models.Organization, models.Domain, models.Role, models.Activity)}
+    assert versions == {models.Organization: 2, models.Domain: 1, models.Role: 0, models.Activity: 1}
+    assert crud.get_workshop_revision(db, 404) is None
+
+
+def test_list_page_walks_keyset_pages(db):
+    org = crud.create_organization(db, {"name": "Contoso"})
+    for i in range(5):
+        crud.create_role(db, {"name": f"Role {i}", "organization_id": org.id, "category": "ot" if i % 2 else "it"})
+    criteria = [models.Role.category == "it"]
+
+    first = crud.list_page(db, models.Role, criteria, limit=2)
+    assert [role.name for role in first.items] == ["Role 0", "Role 2"] and first.next_cursor is not None
+    last = crud.list_page(db, models.Role, criteria, limit=2, cursor=first.next_cursor, fields=["name"])
+    assert last == crud.Page([{"id": first.items[-1].id + 2, "name": "Role 4"}], None)
+
+    crud.bulk_upsert_workshop_raci(db, [{"workshop_id": 1, "activity_id": a, "role_id": r, "value": "R"} for a in (3, 1, 2) for r in (2, 1)])
+    cell = models.WorkshopRACI
+    page = crud.list_page(db, cell, [cell.workshop_id == 1], limit=3, cursor="1.2", fields=["value"], keys=[cell.activity_id, cell.role_id])
+    assert [(row["activity_id"], row["role_id"]) for row in page.items] == [(2, 1), (2, 2), (3, 1)]
+    assert page.next_cursor == "3.1"
+
+    with pytest.raises(ValueError):
+        crud.list_page(db, models.Role, cursor="1.2")
+
+
+def test_change_feed_returns_compacted_changes_since_a_sequence(db):
+    from app import services
+
+    workshop = crud.create_workshop(db, {"organization_id": 1, "name": "Current state"})
+    head = services.change_feed(db, workshop.id)
+    assert head["changes"] == [] and head["last_seq"] == 0
+
+    cell = {"workshop_id": workshop.id, "activity_id": 1, "role_id": 1, "value": "R"}
+    crud.upsert_workshop_raci(db, cell)
+    crud.bulk_upsert_workshop_raci(db, [{**cell, "value": "A"}, {**cell, "role_id": 2, "value": "C"}])
+    issue_id = crud.add_issue(db, {"workshop_id": workshop.id, "activity_id": 1, "type": "missing_r"}).id
+    crud.add_actions_for_unactioned_issues(db, workshop.id)
+    crud.delete_issues(db, workshop.id)
+    crud.upsert_workshop_raci(db, {**cell, "workshop_id": workshop.id + 1})
+
+    feed = services.change_feed(db, workshop.id, since=0)
+    summary = [(change["entity"], change["op"], (change["data"] or {}).get("value")) for change in feed["changes"]]
+    assert summary == [("raci", "upsert", "A"), ("raci", "upsert", "C"), ("action", "upsert", None), ("issue", "delete", None)]
+    assert feed["changes"][-1]["id"] == issue_id and not feed["has_more"]
+    assert services.change_feed(db, workshop.id, since=feed["last_seq"])["changes"] == []
+
+    first = services.change_feed(db, workshop.id, since=0, limit=2)
+    assert first["has_more"] and [change["seq"] for change in first["changes"]] == [2]
+    rest = services.change_feed(db, workshop.id, since=first["last_seq"])
+    assert len(rest["changes"]) == 3 and rest["last_seq"] == feed["last_seq"]
@@ -0,0 +1,72 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from openpyxl import Workbook  # noqa: E402
+
+from backend.services.excel_ingest import classify_sheet, hash_file, iter_template, parse_template  # noqa: E402
+
+
+def build_workbook(tmp_path: Path) -> Path:
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "APPLICATIONS RACI"
+    ws["A1"] = "Activity"
+    ws["B1"] = "CIO"
+    ws["C1"] = "CISO"
+    ws["A2"] = "Planning"
+    ws["A3"] = "Select OT vendor"
+    ws["B3"] = "R"
+    ws["C3"] = "A"
+    inst = wb.create_sheet("Instructions")
+    inst["A1"] = "Rules of engagement"
+    lists = wb.create_sheet("Lists")
+    lists["A1"] = "R"
+    lists["A2"] = "A"
+    path = tmp_path / "template.xlsx"
+    wb.save(path)
+    return path
+
+
+def test_classify_sheet():
+    assert classify_sheet("APPLICATIONS RACI") == ("matrix",)
+    assert classify_sheet("Instructions") == ("instructions",)
+    assert classify_sheet("Lists") == ("lists",)
+    assert classify_sheet("Notes") == ()
+
+
+def test_parse_template(tmp_path):
+    parsed = parse_template(build_workbook(tmp_path))
+    assert [r["role_name"] for r in parsed["roles"]] == ["CIO", "CISO"]
+    activity = parsed["activities"][0]
+    assert activity["section_text"] == "Planning"
+    assert activity["cell_map"] == {"CIO": (3, 2), "CISO": (3, 3)}
+    assert activity["initial_assignments"] == {"CIO": "R", "CISO": "A"}
+    assert parsed["instructions"] == {"Instructions": "Rules of engagement"}
+    assert parsed["lists"] == {"Lists": ["R", "A"]}
+
+
+def test_iter_template_streams_records(tmp_path):
+    records = list(iter_template(build_workbook(tmp_path), include_cell_map=False))
+    assert [kind for kind, _ in records] == ["domain", "role", "role", "activity", "instructions", "lists"]
+    activity = records[3][1]
+    assert "cell_map" not in activity
+    assert activity["row_index"] == 3
+
+
+def test_parse_template_cached_skips_workbook_on_hit(tmp_path, monkeypatch):
+    from backend.services import template_cache
+
+    path = build_workbook(tmp_path)
+    cache = template_cache.TemplateParseCache(directory=tmp_path / "cache")
+    first = template_cache.parse_template_cached(path, cache=cache)
+    assert first["file_hash"] == hash_file(path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("workbook should not be opened on a cache hit")
+
+    monkeypatch.setattr(template_cache, "ParsedTemplate", fail)
+    assert template_cache.parse_template_cached(path, cache=cache) == first
+    cache.clear()
+    assert template_cache.parse_template_cached(path, cache=cache) == first
+    assert template_cache.TemplateParseCache(directory=tmp_path / "cache", parser_version="0").get(first["file_hash"]) is None
@@ -0,0 +1,162 @@
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("RACI_DATABASE_URL", "sqlite://")
+
+from openpyxl import Workbook  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from backend.db import models  # noqa: E402
+from backend.db.database import Base, engine  # noqa: E402
+from backend.services import export_jobs  # noqa: E402
+from backend.services.export_cache import ExportCache  # noqa: E402
+from factories import seed_backend_cell  # noqa: E402
+
+
+@pytest.fixture()
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(export_jobs, "export_cache", ExportCache(tmp_path / "exports"))
+    queue = export_jobs.ExportJobQueue(executor_factory=lambda: ThreadPoolExecutor(max_workers=1))
+    yield queue
+    queue.shutdown()
+
+
+def export_template(tmp_path):
+    """A template whose workbook has the seeded activity on row 2 and its role in column B."""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.title = "APPLICATIONS RACI"
+    sheet["A2"] = "Activity 0"
+    template_path = tmp_path / "template.xlsx"
+    workbook.save(template_path)
+    parsed = {"activities": [{"domain": "APPLICATIONS RACI", "activity_text": "Activity 0", "cell_map": {"Role 0": [2, 2]}}]}
+    return models.Template(name="OT RACI", uploaded_filename=str(template_path), file_hash="abc", parsed_json=parsed)
+
+
+def test_jobs_render_record_and_deduplicate(backend_db, queue, tmp_path):
+    workshop, assignment = seed_backend_cell(backend_db, template=export_template(tmp_path))
+
+    jobs = {export_type: queue.submit(backend_db, workshop.id, export_type) for export_type in export_jobs.EXPORT_SUFFIXES}
+    for export_type, job in jobs.items():
+        job.future.result(timeout=10)
+        assert job.status == export_jobs.DONE, job.error
+        assert Path(job.filepath).exists() and job.filepath.endswith(export_jobs.EXPORT_SUFFIXES[export_type])
+    assert {e.export_type for e in backend_db.query(models.Export)} == set(export_jobs.EXPORT_SUFFIXES)
+
+    assert queue.submit(backend_db, workshop.id, "pptx") is jobs["pptx"]
+    restarted = export_jobs.ExportJobQueue(executor_factory=lambda: pytest.fail("recorded export was rendered again"))
+    assert restarted.get(backend_db, jobs["pdf"].id).filepath == jobs["pdf"].filepath
+    assert restarted.submit(backend_db, workshop.id, "pdf").export_id == jobs["pdf"].export_id
+
+    assignment.raci_value = "R"
+    backend_db.commit()
+    changed = queue.submit(backend_db, workshop.id, "pptx")
+    assert changed.id != jobs["pptx"].id
+    changed.future.result(timeout=10)
+    assert changed.filepath != jobs["pptx"].filepath
+    assert not Path(jobs["pptx"].filepath).exists()  # superseded revision is dropped from the cache
+    assert backend_db.query(models.Export).count() == len(jobs) + 1
+
+
+def test_revision_bumps_on_workshop_content_writes(backend_db, tmp_path):
+    workshop, assignment = seed_backend_cell(backend_db, template=export_template(tmp_path))
+    revisions = [workshop.revision]
+
+    def bumped():
+        backend_db.refresh(workshop)
+        revisions.append(workshop.revision)
+        return revisions[-1] > revisions[-2]
+
+    assignment.raci_value = "C"
+    backend_db.commit()
+    assert bumped()
+    backend_db.add(
+        models.Issue(
+            workshop_id=workshop.id, domain_id=assignment.domain_id, activity_id=assignment.activity_id, issue_type="missing_a"
+        )
+    )
+    backend_db.commit()
+    assert bumped()
+    backend_db.add(models.Action(workshop=workshop, description="Assign an owner"))
+    backend_db.commit()
+    assert bumped()
+    backend_db.delete(assignment)
+    backend_db.commit()
+    assert bumped()
+    backend_db.add(models.Template(name="Unrelated", uploaded_filename="other.xlsx", file_hash="def", parsed_json={}))
+    backend_db.commit()
+    assert not bumped()
+
+    # only backend sessions carry the hook, not every SQLAlchemy session in the process
+    with Session(bind=engine) as other:
+        other.add(
+            models.Note(
+                workshop_id=workshop.id, domain_id=assignment.domain_id, activity_id=assignment.activity_id, note_text="Elsewhere"
+            )
+        )
+        other.commit()
+    assert not bumped()
+
+
+def test_render_cached_serves_current_revision_and_evicts(backend_db, tmp_path):
+    workshop, assignment = seed_backend_cell(backend_db, template=export_template(tmp_path))
+    cache = ExportCache(tmp_path / "cache", max_bytes=10**9)
+
+    path, rendered = export_jobs.render_cached(backend_db, workshop.id, "actions_csv", cache)
+    assert rendered and path.name == f"workshop_{workshop.id}_r{workshop.revision}_actions_csv.csv"
+    assert export_jobs.render_cached(backend_db, workshop.id, "actions_csv", cache) == (path, False)
+
+    pptx, _ = export_jobs.render_cached(backend_db, workshop.id, "pptx", cache)
+    cache.max_bytes = pptx.stat().st_size
+    os.utime(path, (0, 0))
+    cache.evict()
+    assert pptx.exists() and not path.exists()
+    assert export_jobs.render_cached(backend_db, workshop.id, "actions_csv", cache)[1]
+
+
+def test_failed_job_reports_error_and_can_be_retried(backend_db, queue, tmp_path):
+    workshop, _ = seed_backend_cell(backend_db, template=export_template(tmp_path))
+    workshop.template.uploaded_filename = str(tmp_path / "missing.xlsx")
+    backend_db.commit()
+
+    job = queue.submit(backend_db, workshop.id, "excel")
+    with pytest.raises(Exception):
+        job.future.result(timeout=10)
+    assert job.status == export_jobs.FAILED and "missing.xlsx" in job.error
+    assert queue.submit(backend_db, workshop.id, "excel") is not job
+
+    with pytest.raises(ValueError):
+        queue.submit(backend_db, workshop.id, "docx")
+
+
+def test_upgrade_adds_columns_missing_from_an_older_database(tmp_path):
+    from sqlalchemy import create_engine, text
+
+    from backend.db.migrations import upgrade
+
+    old = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with old.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE workshops (id INTEGER PRIMARY KEY, template_id INTEGER NOT NULL, org_name TEXT,"
+                " workshop_name TEXT NOT NULL, status TEXT, created_at TIMESTAMP)"
+            )
+        )
+        conn.execute(
+            text("CREATE TABLE snapshots (id INTEGER PRIMARY KEY, workshop_id INTEGER NOT NULL, created_at TIMESTAMP, blob_json JSON NOT NULL)")
+        )
+        conn.execute(text("INSERT INTO workshops (id, template_id, workshop_name) VALUES (1, 1, 'Current state')"))
+    Base.metadata.create_all(bind=old)
+
+    added = upgrade(old)
+    assert {"workshops.revision", "snapshots.revision", "snapshots.kind", "snapshots.base_id", "snapshots.payload"} <= set(added)
+    assert "ix_snapshots_workshop_id" in added
+    with old.connect() as conn:
+        assert conn.execute(text("SELECT revision FROM workshops WHERE id = 1")).scalar() == 0
+    assert upgrade(old) == []
@@ -0,0 +1,61 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("RACI_DATABASE_URL", "sqlite://")
+
+from app import crud  # noqa: E402
+from app.matrix import RaciMatrix, compare_cells  # noqa: E402
+
+
+def test_counts_loads_and_cells():
+    matrix = RaciMatrix.from_cells(
+        [(10, 1, "R"), (10, 2, "a"), (11, 1, "A"), (11, 2, "A"), (12, 3, None)],
+        activity_ids=[10, 11, 12, 13],
+    )
+    assert matrix.shape == (4, 3)
+    assert matrix.role_ids == [1, 2, 3]
+    assert matrix.get(10, 2) == "A" and matrix.get(13, 1) is None
+    assert matrix.count_per_activity("A") == [1, 2, 0, 0]
+    assert matrix.activity_counts()[11] == {None: 1, "R": 0, "A": 2, "C": 0, "I": 0}
+    assert matrix.role_loads()[1] == {None: 2, "R": 1, "A": 1, "C": 0, "I": 0}
+    assert matrix.row_values(10) == {1: "R", 2: "A"}
+    assert list(matrix.cells()) == [(10, 1, "R"), (10, 2, "A"), (11, 1, "A"), (11, 2, "A")]
+
+    with pytest.raises(ValueError):
+        matrix.set(10, 1, "X")
+
+
+def test_diff_aligns_axes():
+    before = RaciMatrix.from_cells([(1, 1, "R"), (1, 2, "A"), (2, 1, "C")])
+    after = before.copy()
+    after.set(1, 2, "C")
+    assert before.diff(after) == [(1, 2, "A", "C")]
+
+    other_axes = RaciMatrix.from_cells([(2, 1, "C"), (1, 1, "R"), (3, 3, "I")])
+    assert before.diff(other_axes) == [(1, 2, "A", None)]
+
+
+def test_compare_cells_keeps_input_order():
+    actual = RaciMatrix.from_cells([(1, 1, "R"), (1, 2, "A"), (2, 1, "None")])
+    recommended = [(2, 1, "C"), (1, 1, "R"), (1, 2, ""), (9, 9, "I"), (9, 8, None), (2, 1, None)]
+    assert compare_cells(actual, recommended) == [(2, 1, "C", None), (1, 2, None, "A"), (9, 9, "I", None)]
+    assert compare_cells(actual, []) == []
+
+
+def test_from_workshop_covers_the_organization(db):
+    org = crud.create_organization(db, {"name": "Contoso"})
+    domain = crud.create_domain(db, {"name": "Applications", "organization_id": org.id})
+    roles = [crud.create_role(db, {"name": f"Role {i}", "organization_id": org.id}) for i in range(2)]
+    activities = [crud.create_activity(db, {"name": f"Activity {i}", "domain_id": domain.id}) for i in range(3)]
+    workshop = crud.create_workshop(db, {"organization_id": org.id, "name": "Current state"})
+    crud.bulk_upsert_workshop_raci(db, [{"workshop_id": workshop.id, "activity_id": activities[1].id, "role_id": roles[0].id, "value": "R"}])
+
+    matrix = RaciMatrix.from_workshop(db, workshop.id)
+    assert matrix.activity_ids == [a.id for a in activities]
+    assert matrix.role_ids == [r.id for r in roles]
+    assert list(matrix.cells()) == [(activities[1].id, roles[0].id, "R")]
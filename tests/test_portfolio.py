@@ -0,0 +1,86 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("RACI_DATABASE_URL", "sqlite://")
+
+from app import crud, portfolio  # noqa: E402
+
+
+def seed_organization(db, workshop_count=3):
+    org = crud.create_organization(db, {"name": "Contoso"})
+    domain = crud.create_domain(db, {"name": "Applications", "organization_id": org.id})
+    roles = [crud.create_role(db, {"name": f"Role {i}", "organization_id": org.id}) for i in range(2)]
+    activities = [crud.create_activity(db, {"name": f"Activity {i}", "domain_id": domain.id}) for i in range(2)]
+    workshops = [crud.create_workshop(db, {"organization_id": org.id, "name": f"Workshop {i}"}) for i in range(workshop_count)]
+    return org, workshops, activities, roles
+
+
+def test_validate_portfolio_rolls_up_issues_and_role_load(db):
+    org, workshops, activities, roles = seed_organization(db)
+    other = crud.create_organization(db, {"name": "Fabrikam"})
+    crud.create_workshop(db, {"organization_id": other.id, "name": "Elsewhere"})
+    first, second = activities
+    cells = [
+        {"workshop_id": workshops[0].id, "activity_id": first.id, "role_id": roles[0].id, "value": "A"},
+        {"workshop_id": workshops[0].id, "activity_id": second.id, "role_id": roles[0].id, "value": "R"},
+        {"workshop_id": workshops[1].id, "activity_id": first.id, "role_id": roles[0].id, "value": "R"},
+        {"workshop_id": workshops[1].id, "activity_id": first.id, "role_id": roles[1].id, "value": "A"},
+    ]
+    crud.bulk_upsert_workshop_raci(db, cells)
+
+    seen = []
+    summary = portfolio.validate_portfolio(org.id, overload_threshold=1, progress=lambda done, total: seen.append((done, total)))
+    assert seen == [(0, 3), (1, 3), (2, 3), (3, 3)]
+    assert summary["workshops"] == summary["validated"] == 3 and summary["errors"] == []
+    assert [row["workshop_id"] for row in summary["per_workshop"]] == [w.id for w in workshops]
+    issues = [issue for workshop in workshops for issue in crud.list_issues(db, workshop.id)]
+    assert summary["issues"] == len(issues) == sum(summary["issues_by_type"].values())
+    assert summary["issues_by_type"]["missing_A"] == 1 + 1 + 2
+    assert summary["issues_by_severity"] == {
+        severity: sum(issue.severity == severity for issue in issues) for severity in {i.severity for i in issues}
+    }
+    loads = {row["role_id"]: row for row in summary["role_load"]}
+    assert loads[roles[0].id] == {
+        "role_id": roles[0].id,
+        "responsible": 2,
+        "accountable": 1,
+        "total": 3,
+        "workshops": 2,
+        "overloaded_workshops": 1,
+    }
+    assert summary["overloaded_roles"] == [roles[0].id]
+
+
+def test_runner_reports_progress_and_reuses_active_run(monkeypatch):
+    release = threading.Event()
+
+    def fake_validate(organization_id, overload_threshold, full, workers, progress):
+        progress(1, 2)
+        release.wait(5)
+        progress(2, 2)
+        return {"organization_id": organization_id}
+
+    monkeypatch.setattr(portfolio, "validate_portfolio", fake_validate)
+    runner = portfolio.PortfolioRunner()
+    run = runner.start(7)
+    assert runner.start(7) is run and runner.start(8) is not run
+    release.set()
+    for _ in range(100):
+        if run.status == portfolio.DONE:
+            break
+        threading.Event().wait(0.01)
+    assert run.to_dict() == {
+        "id": run.id,
+        "organization_id": 7,
+        "status": portfolio.DONE,
+        "total": 2,
+        "completed": 2,
+        "error": None,
+        "rollup": {"organization_id": 7},
+    }
+    assert runner.get(run.id) is run and runner.start(7) is not run
@@ -0,0 +1,105 @@
+import os
+import sys
+from pathlib import Path
+
+from sqlalchemy import create_engine, event, inspect, text
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("RACI_DATABASE_URL", "sqlite://")
+
+from app import crud, migrations, models, services  # noqa: E402
+from app.database import Base, engine  # noqa: E402
+from common import schema  # noqa: E402
+
+# tables that grow with workshop size; a filtered query against them must never scan
+HOT_TABLES = {"workshop_raci", "issues", "actions", "recommended_raci", "activities", "domains", "roles", "role_load_summary", "validation_dirty", "workshop_changes"}
+
+
+def record_statements():
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().split()[0].upper() in {"SELECT", "UPDATE", "DELETE"}:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", _record)
+    return statements, lambda: event.remove(engine, "before_cursor_execute", _record)
+
+
+def full_scans(statements):
+    scans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters):
+                words = row[3].split()
+                if words[0] == "SCAN" and words[1] in HOT_TABLES:
+                    scans.append((" ".join(statement.split())[:120], row[3]))
+    return scans
+
+
+def test_hot_queries_use_indexes(db):
+    org = crud.create_organization(db, {"name": "Contoso"})
+    domain = crud.create_domain(db, {"name": "Applications", "organization_id": org.id})
+    roles = [crud.create_role(db, {"name": f"Role {i}", "organization_id": org.id}) for i in range(3)]
+    activities = [crud.create_activity(db, {"name": f"Activity {i}", "domain_id": domain.id}) for i in range(3)]
+    workshop = crud.create_workshop(db, {"organization_id": org.id, "name": "Current state"})
+    crud.set_recommended_raci(db, [{"activity_id": activities[0].id, "role_id": roles[0].id, "value": "A"}])
+
+    statements, stop = record_statements()
+    try:
+        cells = [{"workshop_id": workshop.id, "activity_id": a.id, "role_id": r.id, "value": "R"} for a in activities for r in roles]
+        crud.bulk_upsert_workshop_raci(db, cells)
+        services.validate_workshop(db, workshop.id)
+        crud.upsert_workshop_raci(db, {**cells[0], "value": "A"})
+        services.validate_workshop(db, workshop.id)
+        services.generate_actions_from_issues(db, workshop.id)
+        issue = crud.list_issues(db, workshop.id)[0]
+        crud.find_action_for_issue(db, issue.id)
+        crud.list_actions(db, workshop.id)
+        crud.get_activity_assignments(db, workshop.id, activities[0].id)
+        crud.load_recommended_for_activity(db, activities[0].id)
+        crud.list_recommended_for_workshop(db, workshop.id)
+        list(crud.iter_raci_matrix(db, workshop.id))
+        crud.list_domains(db, org.id)
+        crud.list_roles(db, org.id)
+        crud.list_activities(db, domain.id)
+        raci = models.WorkshopRACI
+        keys = [raci.activity_id, raci.role_id]
+        crud.list_page(db, raci, [raci.workshop_id == workshop.id], limit=2, cursor="1.1", keys=keys)
+        crud.list_page(db, models.Role, [models.Role.organization_id == org.id], limit=2, cursor="1", fields=["name"])
+        crud.list_changes(db, workshop.id, since=0)
+        crud.latest_change_seq(db, workshop.id)
+    finally:
+        stop()
+
+    assert statements
+    assert full_scans(statements) == []
+
+
+def test_upgrade_adds_columns_and_indexes_to_existing_database(tmp_path):
+    old = create_engine(f"sqlite:///{tmp_path / 'raci.db'}")
+    Base.metadata.create_all(bind=old)
+    with old.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.drop(bind=conn)
+        conn.execute(text("ALTER TABLE workshops DROP COLUMN revision"))
+        conn.execute(text("INSERT INTO workshops (organization_id, name) VALUES (1, 'Current state')"))
+        conn.execute(
+            text("INSERT INTO workshop_raci (workshop_id, activity_id, role_id, value) VALUES (1, 1, 1, 'R'), (1, 1, 1, 'A'), (1, 2, 1, 'C')")
+        )
+        conn.execute(text("INSERT INTO actions (workshop_id, issue_id, summary) VALUES (1, 5, 'first'), (1, 5, 'again'), (1, NULL, 'manual')"))
+    assert schema.missing_indexes(old, Base.metadata)
+
+    created = migrations.upgrade(old)
+    assert "workshops.revision" in created
+    assert "ux_workshop_raci_cell" in created and "ux_actions_issue" in created
+    assert schema.missing_indexes(old, Base.metadata) == []
+    assert {index["name"] for index in inspect(old).get_indexes("issues")} >= {"ix_issues_workshop_activity", "ix_issues_workshop_role"}
+    with old.connect() as conn:
+        assert conn.execute(text("SELECT revision FROM workshops")).scalar_one() == 0
+        assert conn.execute(text("SELECT activity_id, value FROM workshop_raci ORDER BY id")).all() == [(1, "A"), (2, "C")]
+        assert conn.execute(text("SELECT issue_id, summary FROM actions ORDER BY id")).all() == [(5, "first"), (None, "again"), (None, "manual")]
+    assert migrations.upgrade(old) == []
+    old.dispose()
@@ -0,0 +1,73 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.services.rules import ROLE, RuleRegistry, registry  # noqa: E402
+
+
+def fresh_registry():
+    # the built-in rules on a registry of their own, so counters start at zero
+    copy = RuleRegistry()
+    for spec in registry.rules():
+        copy.register(spec.name, spec.scope, kinds=spec.kinds)(spec.factory)
+    return copy
+
+
+def test_compiled_rules_run_in_one_pass_and_count_per_rule():
+    rules = fresh_registry()
+    rules.add_count_rule(7, "consulted_cap", "c", maximum=1, severity="Low")
+    compiled = rules.compile(["exactly_one_A", "at_least_one_R", "communication_gap"], organization_id=7)
+
+    consumed = []
+
+    def subjects():
+        for subject in [(1, {"A": 1, "R": 1, "I": 1}), (2, {"A": 2, "C": 2}), (3, {"R": 2})]:
+            consumed.append(subject[0])
+            yield subject[0], subject[1], None
+
+    findings = compiled.evaluate_activities(subjects())
+    assert consumed == [1, 2, 3]
+    assert [(f.activity_id, f.kind) for f in findings] == [
+        (2, "multiple_A"),
+        (2, "no_R"),
+        (2, "consulted_cap"),
+        (3, "missing_A"),
+        (3, "communication_gap"),
+    ]
+    stats = {(s["organization_id"], s["name"]): s for s in rules.stats()}
+    assert {key: (s["calls"], s["findings"]) for key, s in stats.items()} == {
+        (None, "exactly_one_A"): (3, 2),
+        (None, "at_least_one_R"): (3, 1),
+        (None, "communication_gap"): (3, 1),
+        (7, "consulted_cap"): (3, 1),
+    }
+    assert all(s["seconds"] >= 0 for s in stats.values())
+
+    # other organizations do not see the rule
+    assert "consulted_cap" not in rules.compile([], organization_id=8).names
+
+
+def test_role_rules_bind_options_at_compile_time():
+    rules = fresh_registry()
+    rules.add_count_rule(1, "accountable_cap", "A", maximum=2, scope=ROLE)
+    compiled = rules.compile(["overload"], organization_id=1, overload_threshold=3)
+    findings = compiled.evaluate_roles([(10, {"R": 2, "A": 2}, 5), (11, {"A": 3}, 6), (12, {"R": 1}, 7)])
+    assert [(f.role_id, f.activity_id, f.kind) for f in findings] == [
+        (10, 5, "role_overload"),
+        (11, 6, "accountable_cap"),
+    ]
+
+
+def test_invalid_rules_are_rejected():
+    rules = fresh_registry()
+    with pytest.raises(ValueError):
+        rules.compile(["no_such_rule"])
+    with pytest.raises(ValueError):
+        rules.add_count_rule(1, "bad", "X", minimum=1)
+    with pytest.raises(ValueError):
+        rules.add_count_rule(1, "unbounded", "R")
+    with pytest.raises(ValueError):
+        rules.register("weird", "workshop")
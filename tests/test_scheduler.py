@@ -0,0 +1,80 @@
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("RACI_DATABASE_URL", "sqlite://")
+
+from backend.db import models  # noqa: E402
+from backend.db.database import engine  # noqa: E402
+from backend.services import snapshots  # noqa: E402
+from backend.services.scheduler import Scheduler  # noqa: E402
+from factories import seed_backend_cell  # noqa: E402
+
+
+def test_tick_revalidates_and_snapshots_only_changed_workshops(backend_db):
+    first, assignment = seed_backend_cell(backend_db)
+    second, _ = seed_backend_cell(backend_db, name="Future state")
+    scheduler = Scheduler(interval=0, snapshot_interval=0)
+
+    done = asyncio.run(scheduler.tick())
+    assert done["validated"] == done["snapshotted"] == [first.id, second.id] and done["deferred"] == []
+    assert {issue.issue_type for issue in backend_db.query(models.Issue).filter_by(workshop_id=first.id)} == {"missing_R"}
+    backend_db.expire_all()
+    snapshot = backend_db.query(models.Snapshot).filter_by(workshop_id=first.id).one()
+    assert snapshot.revision == first.revision
+    assert snapshots.cells_at(backend_db, snapshot) == {(assignment.activity_id, assignment.role_id): "A"}
+
+    done = asyncio.run(scheduler.tick())
+    assert done["validated"] == done["snapshotted"] == []
+
+    assignment.raci_value = "R"
+    backend_db.commit()
+    done = asyncio.run(scheduler.tick())
+    assert done["validated"] == done["snapshotted"] == [first.id]
+    assert backend_db.query(models.Snapshot).count() == 3
+
+    # snapshots wait out the snapshot interval; validation does not
+    scheduler.snapshot_interval = 3600
+    assignment.raci_value = "C"
+    backend_db.commit()
+    done = asyncio.run(scheduler.tick())
+    assert done["validated"] == [first.id] and done["snapshotted"] == []
+
+
+def test_tick_waits_for_interactive_requests(backend_db):
+    seed_backend_cell(backend_db)
+    scheduler = Scheduler(interval=0)
+
+    async def scenario():
+        with scheduler.interactive():
+            tick = asyncio.ensure_future(scheduler.tick())
+            await asyncio.sleep(0.2)
+            assert not tick.done()
+            assert backend_db.query(models.Issue).count() == 0
+        done = await asyncio.wait_for(tick, 5)
+        assert done["validated"]
+
+    asyncio.run(scenario())
+
+
+def test_session_restores_the_pooled_connection_busy_timeout(backend_db):
+    def busy_timeout():
+        with engine.connect() as connection:
+            return connection.exec_driver_sql("PRAGMA busy_timeout").scalar()
+
+    with engine.connect() as connection:
+        connection.exec_driver_sql("PRAGMA busy_timeout=4321")
+    scheduler = Scheduler(interval=0, busy_timeout_ms=250)
+    with scheduler._session() as session:
+        assert session.connection().exec_driver_sql("PRAGMA busy_timeout").scalar() == 250
+    assert busy_timeout() == 4321
+
+
+def test_jittered_delay_stays_in_bounds():
+    scheduler = Scheduler(interval=100, jitter=0.25)
+    delays = [scheduler.next_delay() for _ in range(200)]
+    assert all(75 <= delay <= 125 for delay in delays) and len(set(delays)) > 1
@@ -0,0 +1,69 @@
+import json
+import os
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("RACI_DATABASE_URL", "sqlite://")
+
+from backend.db import models  # noqa: E402
+from backend.services import snapshots  # noqa: E402
+from factories import seed_backend_workshop  # noqa: E402
+
+
+def edit(backend_db, workshop, domain, activities, roles, rng, count):
+    """Randomly set, change or clear ``count`` cells; returns the resulting cells."""
+    for _ in range(count):
+        activity, role = rng.choice(activities), rng.choice(roles)
+        assignment = backend_db.query(models.Assignment).filter_by(workshop_id=workshop.id, activity_id=activity.id, role_id=role.id).first()
+        value = rng.choice(["R", "A", "C", "I", None])
+        if assignment is None:
+            backend_db.add(models.Assignment(workshop=workshop, domain_id=domain.id, activity=activity, role=role, raci_value=value))
+        else:
+            assignment.raci_value = value
+    backend_db.commit()
+    return snapshots.current_cells(backend_db, workshop.id)[1]
+
+
+def test_snapshots_rebuild_every_revision_and_diff_between_any_two(backend_db):
+    workshop, domain, activities, roles = seed_backend_workshop(backend_db, activity_count=30, role_count=8)
+    rng = random.Random(11)
+    taken = []
+    for count in [120] + [rng.randint(1, 6) for _ in range(11)] + [150, 3]:
+        expected = edit(backend_db, workshop, domain, activities, roles, rng, count)
+        taken.append((snapshots.write_snapshot(backend_db, workshop.id, base_every=5), expected))
+
+    kinds = [snapshot.kind for snapshot, _ in taken]
+    assert kinds[0] == snapshots.BASE and kinds.count(snapshots.BASE) >= 3 and snapshots.DELTA in kinds
+    assert all(snapshot.blob_json["depth"] < 5 for snapshot, _ in taken)
+    for snapshot, expected in taken:
+        assert snapshots.cells_at(backend_db, snapshot) == expected
+        assert snapshots.snapshot_at_revision(backend_db, workshop.id, snapshot.revision).id == snapshot.id
+
+    pairs = [(0, 1), (2, 4), (1, 9), (12, 3), (5, 5)]
+    for a, b in pairs:
+        (older, before), (newer, after) = taken[a], taken[b]
+        expected = sorted(
+            (key[0], key[1], before.get(key), after.get(key))
+            for key in before.keys() | after.keys()
+            if before.get(key) != after.get(key)
+        )
+        assert snapshots.diff_snapshots(backend_db, older, newer) == expected
+
+    deltas = [snapshot for snapshot, _ in taken if snapshot.kind == snapshots.DELTA]
+    full_json = len(json.dumps([[k[0], k[1], v] for k, v in taken[-1][1].items()]))
+    assert all(len(snapshot.payload) < full_json / 4 for snapshot in deltas)
+
+
+def test_snapshot_at_an_unchanged_revision_is_reused(backend_db):
+    workshop, domain, activities, roles = seed_backend_workshop(backend_db, activity_count=3, role_count=2)
+    edit(backend_db, workshop, domain, activities, roles, random.Random(1), 4)
+    first = snapshots.write_snapshot(backend_db, workshop.id)
+    assert snapshots.write_snapshot(backend_db, workshop.id).id == first.id
+    assert backend_db.query(models.Snapshot).count() == 1
+    with pytest.raises(LookupError):
+        snapshots.write_snapshot(backend_db, workshop.id + 1)
@@ -0,0 +1,240 @@
+import os
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+os.environ.setdefault("RACI_DATABASE_URL", "sqlite://")
+
+from app import crud, services  # noqa: E402
+from app.database import engine  # noqa: E402
+from backend.services.rules import registry as rule_registry  # noqa: E402
+from factories import seed_workshop  # noqa: E402
+
+
+def count_statements():
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    return statements, lambda: event.remove(engine, "before_cursor_execute", _record)
+
+
+def test_validate_workshop_rules(db):
+    workshop, activities, roles = seed_workshop(db)
+    first, second, third = activities
+    cells = [
+        (first, roles[0], "R"),
+        (first, roles[1], "A"),
+        (second, roles[0], "A"),
+        (second, roles[1], "A"),
+        (third, roles[2], "C"),
+    ]
+    for activity, role, value in cells:
+        crud.upsert_workshop_raci(db, {"workshop_id": workshop.id, "activity_id": activity.id, "role_id": role.id, "value": value})
+    crud.set_recommended_raci(db, [{"activity_id": first.id, "role_id": roles[0].id, "value": "A"}])
+
+    result = services.validate_workshop(db, workshop.id, overload_threshold=1)
+    found = [(issue.activity_id, issue.role_id, issue.type) for issue in result["created_issues"]]
+
+    assert found == [
+        (first.id, roles[0].id, "deviation_from_recommended"),
+        (second.id, None, "multiple_A"),
+        (second.id, None, "no_R"),
+        (third.id, None, "missing_A"),
+        (third.id, None, "no_R"),
+        (second.id, roles[0].id, "role_overload"),
+        (second.id, roles[1].id, "role_overload"),
+    ]
+    assert result["stats"]["total_assignments"] == 5
+    assert [i.type for i in crud.list_issues(db, workshop.id)] == [t for _, _, t in found]
+
+
+def test_validate_workshop_replaces_previous_issues(db):
+    workshop, _, _ = seed_workshop(db, activity_count=2)
+    services.validate_workshop(db, workshop.id)
+    services.validate_workshop(db, workshop.id)
+    assert len(crud.list_issues(db, workshop.id)) == 4
+
+
+def test_validate_workshop_query_count_is_constant(db):
+    small, _, _ = seed_workshop(db, activity_count=2)
+    large, _, _ = seed_workshop(db, activity_count=40)
+
+    counts = []
+    for workshop in (small, large):
+        statements, stop = count_statements()
+        try:
+            services.validate_workshop(db, workshop.id)
+        finally:
+            stop()
+        counts.append(len(statements))
+    assert counts[0] == counts[1]
+
+
+def issue_keys(issues):
+    return sorted((i.activity_id, i.role_id or 0, i.type, i.notes) for i in issues)
+
+
+def test_incremental_validation_matches_full(db):
+    import random
+
+    workshop, activities, roles = seed_workshop(db, activity_count=8, role_count=4)
+    crud.set_recommended_raci(db, [{"activity_id": activities[0].id, "role_id": roles[0].id, "value": "R"}])
+    services.validate_workshop(db, workshop.id, overload_threshold=2)
+
+    rng = random.Random(7)
+    for _ in range(30):
+        activity, role = rng.choice(activities), rng.choice(roles)
+        cell = {"workshop_id": workshop.id, "activity_id": activity.id, "role_id": role.id, "value": rng.choice("RACI")}
+        if rng.random() < 0.5:
+            crud.upsert_workshop_raci(db, cell)
+        else:
+            crud.bulk_upsert_workshop_raci(db, [cell])
+        services.validate_workshop(db, workshop.id, overload_threshold=2)
+        incremental = issue_keys(crud.list_issues(db, workshop.id))
+        services.validate_workshop(db, workshop.id, overload_threshold=2, full=True)
+        assert incremental == issue_keys(crud.list_issues(db, workshop.id))
+
+
+def test_incremental_validation_only_touches_dirty_keys(db):
+    workshop, activities, roles = seed_workshop(db, activity_count=3)
+    services.validate_workshop(db, workshop.id)
+    untouched = {i.id for i in crud.list_issues(db, workshop.id) if i.activity_id != activities[0].id}
+
+    crud.upsert_workshop_raci(db, {"workshop_id": workshop.id, "activity_id": activities[0].id, "role_id": roles[0].id, "value": "A"})
+    result = services.validate_workshop(db, workshop.id)
+
+    assert [i.type for i in result["created_issues"]] == ["no_R"]
+    assert untouched <= {i.id for i in crud.list_issues(db, workshop.id)}
+    assert services.validate_workshop(db, workshop.id)["created_issues"] == []
+
+
+def test_generate_actions_from_issues_is_batched_and_idempotent(db):
+    from sqlalchemy.exc import IntegrityError
+
+    workshop, _, _ = seed_workshop(db, activity_count=30)
+    services.validate_workshop(db, workshop.id)
+    issues = crud.list_issues(db, workshop.id)
+    crud.add_action_item(db, {"workshop_id": workshop.id, "issue_id": issues[0].id, "summary": "Handled already"})
+    workshop_id = workshop.id
+
+    statements, stop = count_statements()
+    try:
+        actions = services.generate_actions_from_issues(db, workshop_id)
+    finally:
+        stop()
+    assert len(statements) == 4  # INSERT ... SELECT, the revision bump, the change log, then the read-back
+    assert [a.issue_id for a in actions] == [i.id for i in issues]
+    assert actions[0].summary == "Handled already"
+    assert actions[1].summary == f"Resolve {issues[1].type} for activity {issues[1].activity_id}"
+    assert actions[1].status == "planned"
+
+    assert [a.id for a in services.generate_actions_from_issues(db, workshop.id)] == [a.id for a in actions]
+    with pytest.raises(IntegrityError):
+        crud.add_action_item(db, {"workshop_id": workshop.id, "issue_id": issues[1].id, "summary": "Duplicate"})
+
+
+def test_deviation_report_lists_cells_and_domain_rates(db):
+    workshop, activities, roles = seed_workshop(db, activity_count=2, role_count=2)
+    other = crud.create_domain(db, {"name": "Infrastructure", "organization_id": workshop.organization_id})
+    infra = crud.create_activity(db, {"name": "Patch", "domain_id": other.id})
+    crud.bulk_upsert_workshop_raci(
+        db,
+        [
+            {"workshop_id": workshop.id, "activity_id": activities[0].id, "role_id": roles[0].id, "value": "A"},
+            {"workshop_id": workshop.id, "activity_id": activities[1].id, "role_id": roles[1].id, "value": "None"},
+            {"workshop_id": workshop.id, "activity_id": infra.id, "role_id": roles[0].id, "value": "R"},
+        ],
+    )
+    crud.set_recommended_raci(
+        db,
+        [
+            {"activity_id": activities[0].id, "role_id": roles[0].id, "value": "A"},
+            {"activity_id": activities[0].id, "role_id": roles[1].id, "value": "R"},
+            {"activity_id": activities[1].id, "role_id": roles[1].id, "value": None},
+            {"activity_id": infra.id, "role_id": roles[0].id, "value": "C"},
+        ],
+    )
+
+    report = services.deviation_report(db, workshop.id)
+    assert report["deviations"] == [
+        {"activity_id": activities[0].id, "role_id": roles[1].id, "recommended": "R", "actual": None},
+        {"activity_id": infra.id, "role_id": roles[0].id, "recommended": "C", "actual": "R"},
+    ]
+    rates = {row["domain_id"]: row["deviation_rate"] for row in report["domains"]}
+    assert rates == {activities[0].domain_id: 1 / 3, other.id: 1.0}
+
+    issues = services.validate_workshop(db, workshop.id)["created_issues"]
+    deviations = [(i.activity_id, i.role_id) for i in issues if i.type == "deviation_from_recommended"]
+    assert deviations == [(d["activity_id"], d["role_id"]) for d in report["deviations"]]
+
+
+def test_organization_rules_run_with_built_in_rules(db):
+    workshop, activities, roles = seed_workshop(db, activity_count=2)
+    for role in roles:
+        crud.upsert_workshop_raci(db, {"workshop_id": workshop.id, "activity_id": activities[0].id, "role_id": role.id, "value": "C"})
+    rule_registry.add_count_rule(workshop.organization_id, "too_many_consulted", "C", maximum=2)
+    try:
+        result = services.validate_workshop(db, workshop.id)
+    finally:
+        rule_registry.remove("too_many_consulted", workshop.organization_id)
+    assert [(i.activity_id, i.type) for i in result["created_issues"]] == [
+        (activities[0].id, "missing_A"),
+        (activities[0].id, "no_R"),
+        (activities[0].id, "too_many_consulted"),
+        (activities[1].id, "missing_A"),
+        (activities[1].id, "no_R"),
+    ]
+    assert any(s["name"] == "too_many_consulted" and s["calls"] == 2 for s in rule_registry.stats())
+
+
+def test_incremental_validation_replaces_organization_role_rule_issues(db):
+    workshop, activities, roles = seed_workshop(db, activity_count=3, role_count=2)
+    rule_registry.add_count_rule(workshop.organization_id, "max_one_A", "A", maximum=1, scope="role")
+    try:
+        for activity in activities[:2]:
+            crud.upsert_workshop_raci(db, {"workshop_id": workshop.id, "activity_id": activity.id, "role_id": roles[0].id, "value": "A"})
+        services.validate_workshop(db, workshop.id)
+        for activity in activities:
+            crud.upsert_workshop_raci(db, {"workshop_id": workshop.id, "activity_id": activity.id, "role_id": roles[0].id, "value": "A"})
+            services.validate_workshop(db, workshop.id)
+        incremental = issue_keys(crud.list_issues(db, workshop.id))
+        services.validate_workshop(db, workshop.id, full=True)
+        full = issue_keys(crud.list_issues(db, workshop.id))
+    finally:
+        rule_registry.remove("max_one_A", workshop.organization_id)
+    assert [key for key in incremental if key[2] == "max_one_A"] == [
+        (activities[2].id, roles[0].id, "max_one_A", "Expected at most 1 A per role")
+    ]
+    assert incremental == full
+
+
+def test_new_activities_and_recommendations_are_checked_incrementally(db):
+    workshop, activities, roles = seed_workshop(db, activity_count=2)
+    other, _, _ = seed_workshop(db, activity_count=1)
+    services.validate_workshop(db, workshop.id)
+    services.validate_workshop(db, other.id)
+
+    added = crud.create_activity(db, {"name": "Activity 2", "domain_id": activities[0].domain_id})
+    crud.set_recommended_raci(db, [{"activity_id": activities[0].id, "role_id": roles[0].id, "value": "R"}])
+
+    assert crud.get_validation_state(db, workshop.id) is not None
+    assert crud.get_validation_state(db, other.id) is not None
+    assert crud.claim_dirty_keys(db, other.id) == (set(), set())
+    created = services.validate_workshop(db, workshop.id)["created_issues"]
+    assert sorted((i.activity_id, i.type) for i in created) == [
+        (activities[0].id, "deviation_from_recommended"),
+        (activities[0].id, "missing_A"),
+        (activities[0].id, "no_R"),
+        (added.id, "missing_A"),
+        (added.id, "no_R"),
+    ]
+    incremental = issue_keys(crud.list_issues(db, workshop.id))
+    services.validate_workshop(db, workshop.id, full=True)
+    assert incremental == issue_keys(crud.list_issues(db, workshop.id))